@@ -0,0 +1,212 @@
+"""
+Measure throughput and p50/p99 latency of every endpoint under concurrency.
+
+The app runs in-process against the fake BigQuery backend, whose jobs take
+``--latency`` seconds, and a synthetic sincera_data.db. Requests go straight
+to the ASGI app, so the figures are the service's own cost plus the simulated
+BigQuery time, without network or HTTP parsing. Each endpoint gets
+``--requests`` requests from ``--concurrency`` concurrent clients, with
+domains drawn at random from the synthetic ones.
+
+Usage: python -m benchmarks.endpoints [--requests N] [--concurrency N] [--latency SECONDS]
+           [--domains N] [--cache] [--rollup] [--sincera-db PATH] [--only SUBSTRING]
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from benchmarks.harness import configure, percentile, request
+from src.fake_bigquery import synthetic_domain
+from src.rollup import ROLLUP_SOURCES
+
+
+ADHOC_QUERY = "SELECT * FROM ozone.fct_smart_bidstream__root LIMIT {rows}"
+
+Value = Union[Any, Callable[[random.Random], Any]]
+
+
+class Scenario:
+    """One endpoint call; ``path``, ``params`` and ``body`` may be functions of a random generator."""
+
+    __slots__ = ("name", "method", "path", "params", "body")
+
+    def __init__(self, name: str, method: str, path: Value, params: Value = None, body: Value = None):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.params = params
+        self.body = body
+
+    @staticmethod
+    def _resolve(value: Value, rng: random.Random) -> Any:
+        return value(rng) if callable(value) else value
+
+    async def send(self, app, rng: random.Random) -> int:
+        status, _, _ = await request(
+            app,
+            self.method,
+            self._resolve(self.path, rng),
+            self._resolve(self.params, rng),
+            self._resolve(self.body, rng),
+            keep_body=False
+        )
+        return status
+
+
+def scenarios(domains: List[str], state: Dict[str, str], batch_size: int) -> List[Scenario]:
+    def domain(rng):
+        return {"domain": rng.choice(domains)}
+
+    def batch(rng):
+        return {"domains": rng.sample(domains, min(batch_size, len(domains)))}
+
+    def query(rows):
+        return {"query": ADHOC_QUERY.format(rows=rows)}
+
+    return [
+        Scenario("GET /", "GET", "/"),
+        Scenario("GET /health", "GET", "/health"),
+        Scenario("GET /metrics", "GET", "/metrics"),
+        Scenario("GET /cache/stats", "GET", "/cache/stats"),
+        Scenario("GET /fill-rate", "GET", "/fill-rate", domain),
+        Scenario("POST /fill-rate/batch", "POST", "/fill-rate/batch", body=batch),
+        Scenario("GET /attention", "GET", "/attention", domain),
+        Scenario("POST /attention/batch", "POST", "/attention/batch", body=batch),
+        Scenario("GET /domain-history", "GET", "/domain-history", domain),
+        Scenario("POST /domain-history/batch", "POST", "/domain-history/batch", body=batch),
+        Scenario("GET /domain-site-info", "GET", "/domain-site-info", domain),
+        Scenario("POST /domain-site-info/batch", "POST", "/domain-site-info/batch", body=batch),
+        Scenario(
+            "GET /publishers", "GET", "/publishers",
+            lambda rng: {"sort_by": rng.choice(["id_absorption_rate", "avg_cpu", "cpu_per_mb"]), "limit": 100}
+        ),
+        Scenario("GET /publisher-dashboard", "GET", "/publisher-dashboard", domain),
+        Scenario("POST /query/dry-run", "POST", "/query/dry-run", body=query(1000)),
+        Scenario("POST /query json 1k rows", "POST", "/query", body=query(1000)),
+        Scenario("POST /query page 1k rows", "POST", "/query", {"page_size": 1000}, query(10000)),
+        Scenario("POST /query ndjson 10k rows", "POST", "/query", {"format": "ndjson"}, query(10000)),
+        Scenario("POST /query csv 10k rows", "POST", "/query", {"format": "csv"}, query(10000)),
+        Scenario("POST /query arrow 10k rows", "POST", "/query", {"format": "arrow"}, query(10000)),
+        Scenario("POST /query parquet 10k rows", "POST", "/query", {"format": "parquet"}, query(10000)),
+        Scenario(
+            "GET /query/{job_id}/pages", "GET", f"/query/{state['page_job_id']}/pages",
+            lambda rng: {"page_token": str(rng.randrange(0, 9000, 1000)), "page_size": 1000}
+        ),
+        Scenario("POST /jobs", "POST", "/jobs", body=query(10000)),
+        Scenario("GET /jobs", "GET", "/jobs"),
+        Scenario("GET /jobs/{job_id}", "GET", f"/jobs/{state['job_id']}"),
+        Scenario("GET /jobs/{job_id}/results", "GET", f"/jobs/{state['job_id']}/results"),
+        Scenario("POST /exports 10k rows", "POST", "/exports", body=query(10000)),
+        Scenario("GET /datasets", "GET", "/datasets"),
+        Scenario("GET /datasets/{dataset_id}/tables", "GET", "/datasets/ozone/tables"),
+        Scenario(
+            "GET /datasets/{dataset_id}/tables/{table_id}/schema", "GET",
+            "/datasets/ozone/tables/fct_smart_bidstream__root/schema"
+        ),
+        Scenario("POST /catalog/invalidate", "POST", "/catalog/invalidate", {"dataset_id": "ozone"}),
+    ]
+
+
+async def measure(app, scenario: Scenario, requests: int, concurrency: int, seed: int) -> Dict[str, Any]:
+    rng = random.Random(seed)
+    latencies: List[float] = []
+    errors = 0
+    remaining = iter(range(requests))
+
+    async def client():
+        nonlocal errors
+        for _ in remaining:
+            start = time.perf_counter()
+            status = await scenario.send(app, rng)
+            latencies.append(time.perf_counter() - start)
+            if status >= 400:
+                errors += 1
+
+    for _ in range(min(concurrency, requests)):
+        await scenario.send(app, rng)
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {
+        "throughput": requests / elapsed,
+        "p50": percentile(latencies, 0.50),
+        "p99": percentile(latencies, 0.99),
+        "errors": errors,
+    }
+
+
+async def wait_for_rollups(main_module):
+    """Wait for the rollup manager's first refresh of every source."""
+    while True:
+        watermarks = [
+            await asyncio.to_thread(main_module.rollup_store.watermark, source) for source in ROLLUP_SOURCES.values()
+        ]
+        if all(watermark is not None for watermark in watermarks):
+            return
+        await asyncio.sleep(0.5)
+
+
+async def run(args):
+    # Settings are read when src.main is imported, so it is imported after configure()
+    from src import main as main_module
+
+    app = main_module.app
+    domains = [synthetic_domain(i) for i in range(args.domains)]
+    async with app.router.lifespan_context(app):
+        if args.rollup:
+            await wait_for_rollups(main_module)
+        _, job, _ = await request(app, "POST", "/jobs", body={"query": ADHOC_QUERY.format(rows=10000)})
+        _, page, _ = await request(app, "POST", "/query", {"page_size": 1000}, {"query": ADHOC_QUERY.format(rows=10000)})
+        state = {
+            "job_id": json.loads(job)["job_id"],
+            "page_job_id": json.loads(page)["job_id"],
+        }
+
+        print(
+            f"{args.requests} requests per endpoint, concurrency {args.concurrency}, "
+            f"BigQuery latency {args.latency * 1000:.0f} ms, cache {'on' if args.cache else 'off'}, "
+            f"rollups {'on' if args.rollup else 'off'}"
+        )
+        print(f"{'endpoint':52} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+        for index, scenario in enumerate(scenarios(domains, state, args.batch_size)):
+            if args.only and args.only not in scenario.name:
+                continue
+            result = await measure(app, scenario, args.requests, args.concurrency, seed=index)
+            print(
+                f"{scenario.name:52} {result['throughput']:9.1f} {result['p50'] * 1000:9.2f} "
+                f"{result['p99'] * 1000:9.2f} {result['errors']:7d}"
+            )
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200, help="requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=16, help="concurrent clients")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds each fake BigQuery job takes")
+    parser.add_argument("--domains", type=int, default=1000, help="synthetic domains")
+    parser.add_argument("--batch-size", type=int, default=100, help="domains per batch request")
+    parser.add_argument("--cache", action="store_true", help="enable the result cache")
+    parser.add_argument("--rollup", action="store_true", help="serve metrics from the rollup store")
+    parser.add_argument("--sincera-db", help="existing sincera_data.db to use instead of a generated one")
+    parser.add_argument("--only", help="only run endpoints whose name contains this")
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args()
+    configure(
+        latency=args.latency,
+        domains=args.domains,
+        sincera_db=args.sincera_db,
+        cache=args.cache,
+        rollup=args.rollup
+    )
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Shared setup for the benchmarks: run the API in-process against the fake
+BigQuery backend and a synthetic sincera_data.db, and drive it over ASGI
+without a network or an HTTP client dependency.
+"""
+
+import asyncio
+import json
+import math
+import os
+import tempfile
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlencode
+
+from benchmarks.sincera_data import generate
+
+
+def configure(
+    latency: float = 0.05,
+    query_rows: int = 100000,
+    domains: int = 1000,
+    sincera_db: Optional[str] = None,
+    cache: bool = False,
+    rollup: bool = False,
+    **settings: Any
+) -> str:
+    """Point the app's settings at the fake backend and scratch files; call before importing ``src.main``.
+
+    Without ``sincera_db`` a database with ``domains`` publishers is generated.
+    Returns the scratch directory.
+    """
+    workdir = tempfile.mkdtemp(prefix="bigquery-api-bench-")
+    if sincera_db is None:
+        sincera_db = os.path.join(workdir, "sincera_data.db")
+        generate(sincera_db, domains)
+    environment = {
+        "bigquery_backend": "fake",
+        "fake_bigquery_latency": latency,
+        "fake_bigquery_query_rows": query_rows,
+        "fake_bigquery_domains": domains,
+        "sincera_db_path": sincera_db,
+        "result_cache_enabled": cache,
+        "rollup_enabled": rollup,
+        "rollup_db_path": os.path.join(workdir, "rollup.db"),
+        "job_store_path": os.path.join(workdir, "jobs.db"),
+        "export_dir": os.path.join(workdir, "exports"),
+        "timing_log_enabled": False,
+        **settings,
+    }
+    for name, value in environment.items():
+        os.environ[name.upper()] = str(value).lower() if isinstance(value, bool) else str(value)
+    return workdir
+
+
+async def request(
+    app,
+    method: str,
+    path: str,
+    params: Optional[Dict[str, Any]] = None,
+    body: Any = None,
+    keep_body: bool = True
+) -> Tuple[int, bytes, int]:
+    """Send one request straight to an ASGI app, returning the status, body and body size.
+
+    With ``keep_body`` False the body is counted and dropped as it streams, as a
+    client writing it elsewhere would, and an empty body is returned.
+    """
+    payload = json.dumps(body, default=str).encode("utf-8") if body is not None else b""
+    headers = [(b"host", b"benchmark")]
+    if body is not None:
+        headers += [(b"content-type", b"application/json"), (b"content-length", str(len(payload)).encode("ascii"))]
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode("utf-8"),
+        "query_string": urlencode(params or {}, doseq=True).encode("ascii"),
+        "root_path": "",
+        "headers": headers,
+        "client": ("127.0.0.1", 50000),
+        "server": ("benchmark", 80),
+    }
+    received = False
+    disconnected = asyncio.Event()
+    status = 0
+    chunks: List[bytes] = []
+    size = 0
+
+    async def receive():
+        nonlocal received
+        if received:
+            # The client stays connected until the response is complete, as a real server reports it
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+        received = True
+        return {"type": "http.request", "body": payload, "more_body": False}
+
+    async def send(message):
+        nonlocal status, size
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if keep_body:
+                chunks.append(chunk)
+
+    try:
+        await app(scope, receive, send)
+    finally:
+        disconnected.set()
+    return status, b"".join(chunks), size
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of a list of values."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
@@ -0,0 +1,106 @@
+"""
+Measure the memory one large /query costs in each response format.
+
+Each measurement runs in a fresh process against the fake BigQuery backend.
+The synthetic result table is built and every code path warmed up before
+the measured request, whose body is counted and dropped as it streams.
+"peak RSS growth" is how far the request raised the process's high-water
+resident set, covering Arrow buffers as well as Python objects; "Python
+heap peak" is the tracemalloc peak of a second, traced run of the same request.
+
+Usage: python -m benchmarks.query_memory [--rows N ...] [--formats FORMAT ...]
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Any, Dict, List, Optional
+
+from benchmarks.harness import configure, request
+
+
+FORMATS = ("json", "ndjson", "csv", "arrow", "parquet")
+QUERY = "SELECT * FROM ozone.fct_smart_bidstream__root"
+
+
+def _max_rss_bytes() -> int:
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+async def _measure(format: str, rows: int) -> Dict[str, Any]:
+    from src import main as main_module
+
+    app = main_module.app
+    params = {"format": format}
+    async with app.router.lifespan_context(app):
+        await asyncio.to_thread(main_module.bq_client.client.bidstream_table)
+        status, _, _ = await request(app, "POST", "/query", params, {"query": f"{QUERY} LIMIT 100"}, keep_body=False)
+        if status != 200:
+            raise RuntimeError(f"/query returned {status}")
+        gc.collect()
+
+        baseline = _max_rss_bytes()
+        start = time.perf_counter()
+        _, _, size = await request(app, "POST", "/query", params, {"query": QUERY}, keep_body=False)
+        seconds = time.perf_counter() - start
+        rss_growth = _max_rss_bytes() - baseline
+
+        gc.collect()
+        tracemalloc.start()
+        await request(app, "POST", "/query", params, {"query": QUERY}, keep_body=False)
+        _, heap_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return {
+        "format": format, "rows": rows, "bytes": size, "seconds": seconds,
+        "rss_growth": rss_growth, "heap_peak": heap_peak,
+    }
+
+
+def measure(format: str, rows: int) -> Dict[str, Any]:
+    """Measure one format and row count in this process; the settings must not have been loaded yet."""
+    configure(latency=0, query_rows=rows, domains=100)
+    return asyncio.run(_measure(format, rows))
+
+
+def measure_in_subprocess(format: str, rows: int) -> Dict[str, Any]:
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.query_memory", "--measure", format, str(rows)],
+        check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[100000, 500000], help="result sizes to measure")
+    parser.add_argument("--formats", nargs="+", default=list(FORMATS), choices=FORMATS)
+    parser.add_argument("--measure", nargs=2, metavar=("FORMAT", "ROWS"), help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args()
+    if args.measure:
+        print(json.dumps(measure(args.measure[0], int(args.measure[1]))))
+        return
+
+    mb = 1024 * 1024
+    print(f"{'format':8} {'rows':>9} {'body MB':>9} {'seconds':>8} {'peak RSS growth MB':>19} {'Python heap peak MB':>20}")
+    for rows in args.rows:
+        for format in args.formats:
+            result = measure_in_subprocess(format, rows)
+            print(
+                f"{format:8} {rows:9d} {result['bytes'] / mb:9.1f} {result['seconds']:8.2f} "
+                f"{result['rss_growth'] / mb:19.1f} {result['heap_peak'] / mb:20.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Compare the CPU cost of serializing metric and ad-hoc query responses.
+
+"legacy" builds a pydantic record per row and lets FastAPI validate and encode
+the response against its response_model, as the endpoints used to.
+"fast" checks the rows against the record schema once and encodes them with
+orjson, as the endpoints do now.
+
+Usage: python -m benchmarks.serialization [--rows N] [--repeats N]
+"""
+
+import argparse
+import asyncio
+import time
+from datetime import date
+from decimal import Decimal
+from typing import List, Optional
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from src.models import DomainHistoryRecord, DomainHistoryResponse, QueryResponse
+from src.serialization import RecordSchema, dumps
+
+
+def domain_history_rows(count: int):
+    return [
+        {
+            "publisher_id": str(i % 500),
+            "domain": f"site{i % 2000}.example",
+            "ad_unit_id": f"unit-{i}",
+            "ad_requests_est": float(i * 37),
+            "rev_oz_net_usd": Decimal(i) / 7,
+            "bid_rate": 0.41,
+            "bid_cpm": 1.7,
+            "win_rate": 0.12,
+            "fill_rate": 0.55,
+            "impression_cpm": 2.3,
+        }
+        for i in range(count)
+    ]
+
+
+def legacy_domain_history(rows):
+    records = [DomainHistoryRecord(**row) for row in rows]
+    field = create_response_field(name="response", type_=DomainHistoryResponse)
+    content = DomainHistoryResponse(
+        data=records, row_count=len(records), start_date=date(2024, 1, 1), end_date=date(2024, 1, 1)
+    )
+    body = asyncio.run(serialize_response(field=field, response_content=content))
+    return JSONResponse(body).body
+
+
+def fast_domain_history(rows):
+    records = RecordSchema(DomainHistoryRecord).rows(rows)
+    return dumps({
+        "data": records,
+        "row_count": len(records),
+        "start_date": date(2024, 1, 1),
+        "end_date": date(2024, 1, 1),
+        "bytes_processed": None,
+    })
+
+
+def legacy_query(rows):
+    field = create_response_field(name="response", type_=QueryResponse)
+    body = asyncio.run(serialize_response(field=field, response_content=QueryResponse(data=rows, row_count=len(rows))))
+    return JSONResponse(body).body
+
+
+def fast_query(rows):
+    return dumps({"data": rows, "row_count": len(rows)})
+
+
+def cpu_per_thousand_rows(func, rows, repeats: int) -> float:
+    func(rows)
+    start = time.process_time()
+    for _ in range(repeats):
+        func(rows)
+    return (time.process_time() - start) / repeats / len(rows) * 1000 * 1000
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000, help="rows per response")
+    parser.add_argument("--repeats", type=int, default=5, help="timed serializations per case")
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args()
+    count = args.rows
+    repeats = args.repeats
+    rows = domain_history_rows(count)
+    print(f"{count} rows, {repeats} repeats, CPU ms per 1000 rows")
+    for name, legacy, fast in (
+        ("/domain-history", legacy_domain_history, fast_domain_history),
+        ("/query", legacy_query, fast_query),
+    ):
+        before = cpu_per_thousand_rows(legacy, rows, repeats)
+        after = cpu_per_thousand_rows(fast, rows, repeats)
+        print(f"{name:16} legacy {before:8.3f}  fast {after:8.3f}  speedup {before / after:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
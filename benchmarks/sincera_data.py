@@ -0,0 +1,169 @@
+"""
+Generate a synthetic sincera_data.db with the same schema as the real one.
+
+Publishers use the fake BigQuery backend's domain names, so the same domains
+have site info, bidstream and attention rows. Each domain gets ``snapshots``
+publisher_data rows a day apart, like repeated Sincera pulls, so latest-row
+lookups have history to skip.
+
+Usage: python -m benchmarks.sincera_data [--path PATH] [--domains N] [--snapshots N] [--force]
+"""
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from src.fake_bigquery import synthetic_domain, synthetic_publisher_id
+from src.sincera_store import prepare_database
+
+
+SCHEMA = """
+    CREATE TABLE ecosystem_data (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        data_json TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE publisher_data (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        domain TEXT NOT NULL,
+        publisher_id INTEGER,
+        name TEXT,
+        status TEXT,
+        primary_supply_type TEXT,
+        pub_description TEXT,
+        categories TEXT,
+        slug TEXT,
+        avg_ads_to_content_ratio REAL,
+        avg_ads_in_view REAL,
+        avg_ad_refresh REAL,
+        total_unique_gpids INTEGER,
+        id_absorption_rate REAL,
+        avg_page_weight REAL,
+        avg_cpu REAL,
+        total_supply_paths INTEGER,
+        reseller_count INTEGER,
+        owner_domain TEXT,
+        raw_data_json TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE(domain, created_at)
+    );
+    CREATE TABLE publisher_metrics (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        analysis_name TEXT NOT NULL,
+        publisher_count INTEGER,
+        summary_stats TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    """
+
+CATEGORIES = (
+    "news", "entertainment", "sports", "technology", "Style & Fashion", "Business and Finance",
+    "Politics", "Travel", "Food & Drink", "Automotive", "Health", "Gaming",
+)
+SUPPLY_TYPES = ("web", "web", "web", "app", "ctv")
+STATUSES = ("available", "available", "available", "unavailable")
+
+INSERT_PUBLISHER = """
+    INSERT INTO publisher_data (
+        domain, publisher_id, name, status, primary_supply_type, pub_description, categories, slug,
+        avg_ads_to_content_ratio, avg_ads_in_view, avg_ad_refresh, total_unique_gpids, id_absorption_rate,
+        avg_page_weight, avg_cpu, total_supply_paths, reseller_count, owner_domain, raw_data_json,
+        created_at, updated_at
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """
+
+
+def publisher_rows(domain_count: int, snapshots: int, seed: int = 0):
+    """Yield publisher_data rows, oldest snapshot first, in INSERT_PUBLISHER order."""
+    rng = random.Random(seed)
+    latest = datetime.now(timezone.utc).replace(hour=1, minute=0, second=0, microsecond=0)
+    for snapshot in range(snapshots):
+        created_at = latest - timedelta(days=snapshots - 1 - snapshot)
+        for index in range(domain_count):
+            domain = synthetic_domain(index)
+            publisher = {
+                "publisher_id": synthetic_publisher_id(domain),
+                "name": f"Publisher {index}",
+                "visit_enabled": True,
+                "status": rng.choice(STATUSES),
+                "primary_supply_type": rng.choice(SUPPLY_TYPES),
+                "domain": domain,
+                "pub_description": f"Synthetic publisher {index} for benchmarks.",
+                "categories": rng.sample(CATEGORIES, rng.randint(1, 6)),
+                "slug": f"publisher-{index}",
+                "avg_ads_to_content_ratio": round(rng.uniform(0.02, 0.4), 5),
+                "avg_ads_in_view": round(rng.uniform(0.5, 4.0), 5),
+                "avg_ad_refresh": round(rng.uniform(0, 60), 3),
+                "total_unique_gpids": rng.randint(1, 2000),
+                "id_absorption_rate": round(rng.uniform(0, 1), 3),
+                "avg_page_weight": round(rng.uniform(1, 80), 4),
+                "avg_cpu": round(rng.uniform(10, 900), 4),
+                "total_supply_paths": rng.randint(1, 500),
+                "reseller_count": rng.randint(0, 300),
+                "owner_domain": f"owner{index % 997}.example",
+                "updated_at": created_at.isoformat().replace("+00:00", "Z"),
+            }
+            yield (
+                domain, publisher["publisher_id"], publisher["name"], publisher["status"],
+                publisher["primary_supply_type"], publisher["pub_description"], json.dumps(publisher["categories"]),
+                publisher["slug"], publisher["avg_ads_to_content_ratio"], publisher["avg_ads_in_view"],
+                publisher["avg_ad_refresh"], publisher["total_unique_gpids"], publisher["id_absorption_rate"],
+                publisher["avg_page_weight"], publisher["avg_cpu"], publisher["total_supply_paths"],
+                publisher["reseller_count"], publisher["owner_domain"], json.dumps(publisher),
+                created_at.strftime("%Y-%m-%d %H:%M:%S"), created_at.strftime("%Y-%m-%d %H:%M:%S"),
+            )
+
+
+def generate(path: str, domain_count: int = 100000, snapshots: int = 3, seed: int = 0, overwrite: bool = False):
+    """Write a new synthetic database to ``path``; an existing file is only replaced with ``overwrite``."""
+    if os.path.exists(path):
+        if not overwrite:
+            raise FileExistsError(f"{path} already exists")
+        os.remove(path)
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.executescript(SCHEMA)
+        conn.executemany(INSERT_PUBLISHER, publisher_rows(domain_count, snapshots, seed))
+        conn.execute(
+            "INSERT INTO ecosystem_data (data_json) VALUES (?)",
+            (json.dumps({"known_adsystems": 2500, "sincera_ecosystem_size": domain_count}),)
+        )
+        conn.commit()
+    finally:
+        conn.close()
+    prepare_database(path)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--path", default="sincera_data.synthetic.db", help="database file to write")
+    parser.add_argument("--domains", type=int, default=100000, help="domains to generate")
+    parser.add_argument("--snapshots", type=int, default=3, help="publisher_data rows per domain")
+    parser.add_argument("--force", action="store_true", help="replace the file at --path if it already exists")
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args()
+    if os.path.exists(args.path) and not args.force:
+        raise SystemExit(f"{args.path} already exists; pass --force to replace it")
+    start = time.perf_counter()
+    generate(args.path, args.domains, args.snapshots, overwrite=args.force)
+    size = os.path.getsize(args.path)
+    print(
+        f"Wrote {args.domains * args.snapshots} publisher rows for {args.domains} domains to {args.path} "
+        f"({size / 1024 / 1024:.1f} MB) in {time.perf_counter() - start:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Measure the cost of sincera_data.db lookups through SinceraStore.
+
+Runs single-domain lookups, batch lookups and ranking pages against a
+synthetic database (or ``--db``), reporting operations per second and p50/p99
+latency. The store is opened read-only, as the app opens it, so it never adds
+indexes: a generated database is prepared by the generator, and a ``--db``
+file must already have them (run ``python -m src.sincera_migrate`` on it).
+
+Usage: python -m benchmarks.sqlite_lookups [--db PATH] [--domains N] [--snapshots N] [--iterations N]
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from typing import Callable, List, Optional
+
+from benchmarks.harness import percentile
+from benchmarks.sincera_data import generate
+from src.sincera_store import SinceraStore
+
+
+def measure(operation: Callable[[random.Random], None], iterations: int, seed: int = 0) -> List[float]:
+    rng = random.Random(seed)
+    for _ in range(min(10, max(1, iterations // 10))):
+        operation(rng)
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        operation(rng)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def walk_ranking(store: SinceraStore, sort_by: str, pages: int):
+    def operation(rng):
+        cursor = None
+        for _ in range(pages):
+            _, cursor = store.rank_publishers(sort_by, limit=100, cursor=cursor)
+            if cursor is None:
+                break
+    return operation
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", help="existing sincera_data.db to measure instead of a generated one")
+    parser.add_argument("--domains", type=int, default=100000, help="domains in the generated database")
+    parser.add_argument("--snapshots", type=int, default=3, help="rows per domain in the generated database")
+    parser.add_argument("--iterations", type=int, default=1000, help="timed calls per single-row lookup")
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args()
+    path = args.db
+    if path is None:
+        path = os.path.join(tempfile.mkdtemp(prefix="sincera-bench-"), "sincera_data.db")
+        start = time.perf_counter()
+        generate(path, args.domains, args.snapshots)
+        print(f"Generated {args.domains} domains x {args.snapshots} snapshots in {time.perf_counter() - start:.1f}s")
+
+    store = SinceraStore(path)
+    store.open()
+    try:
+        with store.connection() as conn:
+            domains = [row[0] for row in conn.execute("SELECT DISTINCT domain FROM publisher_data")]
+        print(f"{path}: {os.path.getsize(path) / 1024 / 1024:.1f} MB, {len(domains)} domains")
+
+        iterations = args.iterations
+        cases = [
+            ("get_latest", lambda rng: store.get_latest(rng.choice(domains)), iterations),
+            ("get_latest unknown domain", lambda rng: store.get_latest("unknown.example"), iterations),
+            ("get_many 100 domains", lambda rng: store.get_many(rng.sample(domains, min(100, len(domains)))),
+             max(1, iterations // 10)),
+            ("get_many 1000 domains", lambda rng: store.get_many(rng.sample(domains, min(1000, len(domains)))),
+             max(1, iterations // 100)),
+            ("rank_publishers first page", lambda rng: store.rank_publishers("id_absorption_rate", limit=100), 10),
+            ("rank_publishers cpu_per_mb page", lambda rng: store.rank_publishers("cpu_per_mb", limit=100), 10),
+            ("rank_publishers 10 pages by cursor", walk_ranking(store, "avg_cpu", 10), 3),
+        ]
+        print(f"{'operation':36} {'ops/s':>10} {'p50 ms':>9} {'p99 ms':>9}")
+        for name, operation, count in cases:
+            timings = measure(operation, count)
+            print(
+                f"{name:36} {len(timings) / sum(timings):10.1f} "
+                f"{percentile(timings, 0.50) * 1000:9.3f} {percentile(timings, 0.99) * 1000:9.3f}"
+            )
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
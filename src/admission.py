@@ -0,0 +1,193 @@
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+from .metrics import ADMISSION_QUEUE_DEPTH, ADMISSION_REJECTIONS
+
+
+# Pools in the order their waiters are admitted when they tie on priority
+INTERACTIVE = "interactive"
+METADATA = "metadata"
+ADHOC = "adhoc"
+POOLS = (INTERACTIVE, METADATA, ADHOC)
+
+FOREGROUND = 0
+BACKGROUND = 1
+
+_priority: ContextVar[int] = ContextVar("admission_priority", default=FOREGROUND)
+
+
+@contextmanager
+def background() -> Iterator[None]:
+    """Make the BigQuery calls started inside the block, and tasks created in it, wait behind request traffic."""
+    token = _priority.set(BACKGROUND)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class AdmissionRejected(Exception):
+    """A call was shed because its pool's queue was full or no slot freed up within the pool's wait limit."""
+
+    def __init__(self, pool: str, retry_after: int, message: str):
+        super().__init__(message)
+        self.pool = pool
+        self.retry_after = retry_after
+
+
+class AdmissionPool:
+    """Limits for one kind of BigQuery call; ``None`` leaves a limit unbounded."""
+
+    __slots__ = (
+        "name", "max_concurrent", "max_queue", "max_wait", "rank", "active", "queued", "waiters", "hold_seconds",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrent: Optional[int] = None,
+        max_queue: Optional[int] = None,
+        max_wait: Optional[float] = None
+    ):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.rank = POOLS.index(name) if name in POOLS else len(POOLS)
+        self.active = 0
+        # Foreground waiters, which are the ones max_queue bounds
+        self.queued = 0
+        self.waiters: List[Tuple[int, int, asyncio.Future]] = []
+        # Moving average of how long a call holds its slot, for Retry-After estimates
+        self.hold_seconds = 1.0
+
+    def has_room(self) -> bool:
+        return self.max_concurrent is None or self.active < self.max_concurrent
+
+
+class AdmissionController:
+    """Admits BigQuery calls into separate concurrency pools under one overall limit.
+
+    Each pool caps its own running calls, so a burst of ad-hoc queries cannot
+    take the slots the metric endpoints need, and ``max_concurrent`` caps
+    them all together. When a slot frees up it goes to the best waiter among
+    the pools with room: foreground calls before those started under
+    ``background()``, then interactive before metadata before ad-hoc calls,
+    then first come first served.
+
+    A foreground call is rejected with AdmissionRejected straight away when
+    its pool already has ``max_queue`` calls waiting, and once it has waited
+    ``max_wait`` seconds. Background calls are never rejected and do not
+    count against the queue limit. Pools not given are unbounded apart from
+    the overall limit.
+    """
+
+    def __init__(self, max_concurrent: int = 8, pools: Optional[List[AdmissionPool]] = None):
+        self.max_concurrent = max_concurrent
+        self.pools: Dict[str, AdmissionPool] = {name: AdmissionPool(name) for name in POOLS}
+        for pool in pools or []:
+            self.pools[pool.name] = pool
+        self.active = 0
+        self._sequence = itertools.count()
+
+    def _has_room(self, pool: AdmissionPool) -> bool:
+        return self.active < self.max_concurrent and pool.has_room()
+
+    def _set_depth(self, pool: AdmissionPool):
+        ADMISSION_QUEUE_DEPTH.labels(pool.name).set(len(pool.waiters))
+
+    def _dispatch(self):
+        """Hand free slots to the best waiters of the pools that have room."""
+        while self.active < self.max_concurrent:
+            best = None
+            for pool in self.pools.values():
+                if pool.waiters and pool.has_room():
+                    priority, sequence, _ = pool.waiters[0]
+                    order = (priority, pool.rank, sequence)
+                    if best is None or order < best[0]:
+                        best = (order, pool)
+            if best is None:
+                return
+            pool = best[1]
+            priority, _, future = heapq.heappop(pool.waiters)
+            if priority == FOREGROUND:
+                pool.queued -= 1
+            self._set_depth(pool)
+            pool.active += 1
+            self.active += 1
+            future.set_result(None)
+
+    def _release(self, pool: AdmissionPool, held: float):
+        pool.active -= 1
+        self.active -= 1
+        pool.hold_seconds += 0.2 * (held - pool.hold_seconds)
+        self._dispatch()
+
+    def _withdraw(self, pool: AdmissionPool, entry: Tuple[int, int, asyncio.Future]):
+        """Take a waiter that gave up out of its queue, or give back the slot it was just handed."""
+        future = entry[2]
+        if future.done():
+            self._release(pool, 0.0)
+            return
+        future.cancel()
+        pool.waiters.remove(entry)
+        heapq.heapify(pool.waiters)
+        if entry[0] == FOREGROUND:
+            pool.queued -= 1
+        self._set_depth(pool)
+
+    def retry_after(self, pool: AdmissionPool) -> int:
+        """Estimate the seconds until a call rejected from ``pool`` could be admitted, between 1 and 60."""
+        slots = max(1, min(pool.max_concurrent or self.max_concurrent, self.max_concurrent))
+        return max(1, min(60, math.ceil((len(pool.waiters) + 1) * pool.hold_seconds / slots)))
+
+    def _reject(self, pool: AdmissionPool, reason: str, message: str) -> AdmissionRejected:
+        ADMISSION_REJECTIONS.labels(pool.name, reason).inc()
+        return AdmissionRejected(pool.name, self.retry_after(pool), f"BigQuery {pool.name} pool is busy: {message}")
+
+    async def _acquire(self, pool: AdmissionPool, bounded: bool):
+        if not pool.waiters and self._has_room(pool):
+            pool.active += 1
+            self.active += 1
+            return
+
+        foreground = _priority.get() == FOREGROUND
+        bounded = bounded and foreground
+        if bounded and pool.max_queue is not None and pool.queued >= pool.max_queue:
+            raise self._reject(pool, "queue_full", f"{pool.queued} calls already waiting")
+
+        entry = (_priority.get(), next(self._sequence), asyncio.get_running_loop().create_future())
+        heapq.heappush(pool.waiters, entry)
+        if foreground:
+            pool.queued += 1
+        self._set_depth(pool)
+        try:
+            await asyncio.wait({entry[2]}, timeout=pool.max_wait if bounded else None)
+        except asyncio.CancelledError:
+            self._withdraw(pool, entry)
+            raise
+        if not entry[2].done():
+            self._withdraw(pool, entry)
+            raise self._reject(pool, "timeout", f"no slot within {pool.max_wait:g}s")
+
+    @asynccontextmanager
+    async def admit(self, name: str, bounded: bool = True) -> AsyncIterator[None]:
+        """Hold a slot in pool ``name`` for the duration of the block.
+
+        With ``bounded`` False the call waits as long as it takes, for calls
+        that must not fail halfway, such as the next page of a stream already
+        being sent.
+        """
+        pool = self.pools[name]
+        await self._acquire(pool, bounded)
+        admitted_at = time.monotonic()
+        try:
+            yield
+        finally:
+            self._release(pool, time.monotonic() - admitted_at)
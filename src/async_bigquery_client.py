@@ -0,0 +1,346 @@
+import asyncio
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from time import perf_counter
+from typing import List, Dict, Any, Optional, Callable, Awaitable, AsyncIterator, Iterator, Set
+import pyarrow
+
+from .admission import AdmissionController, ADHOC, METADATA, background
+from .bigquery_client import BigQueryClient, QueryResult, is_rate_limit_error
+from .read_streams import (
+    ReadSession, StreamProvider, BigQueryStorageProvider, contains_order_by, iter_parallel_batches
+)
+from .cache import QueryResultCache, make_cache_key
+from .metrics import JOBS_IN_FLIGHT, RATE_LIMIT_RETRIES, observe_stage, record_query
+from .serialization import dumps
+from .singleflight import SingleFlight
+
+
+_EXHAUSTED = object()
+
+
+def _result_size(result: QueryResult) -> int:
+    """Approximate size of a result's rows in bytes, as the length of their JSON encoding."""
+    return len(dumps(result.rows))
+
+
+class _ThreadedIterator:
+    """A blocking iterator advanced on worker threads that can be closed from the event loop at any time.
+
+    A generator cannot be closed while a thread is inside ``next`` on it, so
+    ``close`` during a fetch only marks the iterator closed, and the worker
+    closes it as soon as that fetch returns. Fetches started after ``close``
+    return nothing.
+    """
+
+    def __init__(self, open_iterator: Callable[[], Iterator[Any]]):
+        self._open_iterator = open_iterator
+        self._iterator: Optional[Iterator[Any]] = None
+        self._lock = threading.Lock()
+        self._fetching = False
+        self._closed = False
+
+    def _fetch(self, reopen: bool) -> Any:
+        with self._lock:
+            if self._closed:
+                return _EXHAUSTED
+            self._fetching = True
+        try:
+            if reopen:
+                self._close_iterator()
+                self._iterator = self._open_iterator()
+            return next(self._iterator, _EXHAUSTED)
+        finally:
+            with self._lock:
+                self._fetching = False
+                closed = self._closed
+            if closed:
+                self._close_iterator()
+
+    def first(self) -> Any:
+        """Open a fresh iterator, replacing any earlier one, and fetch its first item."""
+        return self._fetch(reopen=True)
+
+    def next(self) -> Any:
+        return self._fetch(reopen=False)
+
+    def _close_iterator(self):
+        if self._iterator is not None:
+            self._iterator.close()
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            if self._fetching:
+                return
+        self._close_iterator()
+
+
+class AsyncBigQueryClient:
+    """Runs BigQueryClient calls on a bounded thread pool so the event loop stays free.
+
+    Job submission and result polling both happen inside the wrapped synchronous
+    call, so they are executed on the executor. Every call is admitted through
+    ``admission`` into a pool for its kind of work: ``interactive`` for the
+    metric endpoints, ``adhoc`` for user queries, jobs and read streams, and
+    ``metadata`` for dry runs, job status and catalog lookups. Without a
+    controller, ``max_concurrent_jobs`` caps all calls together.
+
+    A call BigQuery rejects for rate limits is retried up to
+    ``rate_limit_retries`` times after an exponentially growing, jittered
+    delay, during which its slot is given back.
+    """
+
+    def __init__(
+        self,
+        client: BigQueryClient,
+        max_workers: int = 16,
+        max_concurrent_jobs: int = 8,
+        cache: Optional[QueryResultCache] = None,
+        stream_provider: Optional[StreamProvider] = None,
+        admission: Optional[AdmissionController] = None,
+        rate_limit_retries: int = 4,
+        rate_limit_backoff: float = 1.0,
+        rate_limit_max_backoff: float = 32.0
+    ):
+        self.client = client
+        self.cache = cache
+        self.stream_provider = stream_provider or BigQueryStorageProvider(client)
+        self._single_flight = SingleFlight()
+        self._revalidations: Set[asyncio.Task] = set()
+        self.max_concurrent_jobs = max_concurrent_jobs
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bigquery")
+        self.admission = admission or AdmissionController(max_concurrent_jobs)
+        self.rate_limit_retries = rate_limit_retries
+        self.rate_limit_backoff = rate_limit_backoff
+        self.rate_limit_max_backoff = rate_limit_max_backoff
+
+    async def _run(self, pool: str, func: Callable, *args, bounded: bool = True, retry: bool = True) -> Any:
+        attempt = 0
+        while True:
+            queued_at = perf_counter()
+            async with self.admission.admit(pool, bounded):
+                observe_stage("queue", perf_counter() - queued_at)
+                JOBS_IN_FLIGHT.inc()
+                try:
+                    loop = asyncio.get_running_loop()
+                    return await loop.run_in_executor(self._executor, func, *args)
+                except Exception as e:
+                    if not retry or attempt >= self.rate_limit_retries or not is_rate_limit_error(e):
+                        raise
+                finally:
+                    JOBS_IN_FLIGHT.dec()
+            # Full jitter keeps retries from a burst of rejected calls from arriving together
+            delay = random.uniform(0, min(self.rate_limit_max_backoff, self.rate_limit_backoff * 2 ** attempt))
+            attempt += 1
+            RATE_LIMIT_RETRIES.labels(pool).inc()
+            await asyncio.sleep(delay)
+
+    async def run_query(
+        self,
+        query: str,
+        parameters: Optional[Dict[str, Any]] = None,
+        use_cache: bool = False,
+        maximum_bytes_billed: Optional[int] = None,
+        pool: str = ADHOC
+    ) -> QueryResult:
+        """Execute a BigQuery SQL query off the event loop and return its rows and job statistics.
+
+        Concurrent calls with the same SQL text, parameters and bytes budget
+        share one BigQuery job. With ``use_cache`` the result is also served
+        from, and stored in, the result cache; a cached result reports no bytes
+        processed. A stale cached result is served as is while a background
+        job refreshes it. The job runs in admission pool ``pool``.
+        """
+        key = make_cache_key(query, parameters, maximum_bytes_billed)
+
+        async def run() -> QueryResult:
+            result = await self._run(pool, self.client.run_query, query, parameters, maximum_bytes_billed)
+            record_query(result)
+            if use_cache and self.cache:
+                # Encoding a large result to measure it takes long enough to stall the event loop
+                size = await asyncio.get_running_loop().run_in_executor(self._executor, _result_size, result)
+                self._cache_set(key, result, size=size)
+            return result
+
+        if use_cache and self.cache:
+            cached, fresh = self.cache.lookup(key)
+            if cached is not None:
+                if not fresh:
+                    self._revalidate(key, run)
+                return QueryResult(cached.rows, job_id=cached.job_id, total_bytes_processed=0,
+                                   total_bytes_billed=0, cache_hit=True)
+
+        return await self._single_flight.do(key, run)
+
+    def _cache_set(self, key: str, result: QueryResult, day: Optional[date] = None, size: Optional[int] = None):
+        self.cache.set(key, result, size=_result_size(result) if size is None else size, day=day)
+
+    def cache_result(
+        self, query: str, parameters: Optional[Dict[str, Any]], result: QueryResult, day: Optional[date] = None
+    ):
+        """Store a result as if ``query`` had produced it, for later ``use_cache`` calls to be served from.
+
+        ``day`` is the UTC date the query's window was resolved for, when that is not today.
+        """
+        if self.cache:
+            self._cache_set(make_cache_key(query, parameters), result, day)
+
+    def _revalidate(self, key: str, run: Callable[[], Awaitable[QueryResult]]):
+        """Refresh a stale cache entry in the background, unless a refresh for it is already running."""
+        if self._single_flight.running(key):
+            return
+
+        async def revalidate():
+            try:
+                with background():
+                    await self._single_flight.do(key, run)
+            except Exception as e:
+                print(f"Failed to refresh a stale cached result: {e}")
+
+        task = asyncio.ensure_future(revalidate())
+        self._revalidations.add(task)
+        task.add_done_callback(self._revalidations.discard)
+
+    def is_cached(self, query: str, parameters: Optional[Dict[str, Any]] = None) -> bool:
+        """Whether the result cache holds a fresh result for a query."""
+        return bool(self.cache) and self.cache.is_fresh(make_cache_key(query, parameters))
+
+    async def execute_query(
+        self,
+        query: str,
+        parameters: Optional[Dict[str, Any]] = None,
+        use_cache: bool = False,
+        maximum_bytes_billed: Optional[int] = None,
+        pool: str = ADHOC
+    ) -> List[Dict[str, Any]]:
+        """Execute a BigQuery SQL query off the event loop and return its rows."""
+        result = await self.run_query(query, parameters, use_cache, maximum_bytes_billed, pool)
+        return result.rows
+
+    async def dry_run(self, query: str, parameters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Estimate the bytes a BigQuery SQL query would process, off the event loop."""
+        return await self._run(METADATA, self.client.dry_run, query, parameters)
+
+    async def execute_query_page(
+        self,
+        query: str,
+        parameters: Optional[Dict[str, Any]] = None,
+        page_size: int = 1000,
+        maximum_bytes_billed: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Execute a BigQuery SQL query off the event loop and return its first page of results."""
+        return await self._run(ADHOC, self.client.execute_query_page, query, parameters, page_size, maximum_bytes_billed)
+
+    async def get_query_page(
+        self, job_id: str, page_token: Optional[str] = None, page_size: int = 1000, location: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Read a page of a finished query job's results off the event loop."""
+        return await self._run(ADHOC, self.client.get_query_page, job_id, page_token, page_size, location)
+
+    async def submit_query(
+        self, query: str, parameters: Optional[Dict[str, Any]] = None, maximum_bytes_billed: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Start a BigQuery query job off the event loop without waiting for it to finish."""
+        return await self._run(ADHOC, self.client.submit_query, query, parameters, maximum_bytes_billed)
+
+    async def get_job_status(self, job_id: str, location: Optional[str] = None) -> Dict[str, Any]:
+        """Get the state and statistics of a BigQuery job off the event loop."""
+        return await self._run(METADATA, self.client.get_job_status, job_id, location)
+
+    async def _iterate(self, pool: str, open_iterator: Callable[[], Iterator[Any]]) -> AsyncIterator[Any]:
+        """Advance a blocking iterator on the executor, yielding each item as it arrives.
+
+        A concurrency slot is only held while the next item is being fetched, not
+        while the caller is consuming it. Only the first fetch can be rejected by
+        admission control or retried, with a fresh iterator, on a rate-limit
+        error; once items have been yielded the stream waits for slots as long
+        as it takes. Closing the stream, including by cancelling it mid-fetch,
+        closes the iterator once no worker is advancing it.
+        """
+        iterator = _ThreadedIterator(open_iterator)
+        try:
+            item = await self._run(pool, iterator.first)
+            while item is not _EXHAUSTED:
+                yield item
+                item = await self._run(pool, iterator.next, bounded=False, retry=False)
+        finally:
+            iterator.close()
+
+    def stream_query(
+        self,
+        query: str,
+        parameters: Optional[Dict[str, Any]] = None,
+        page_size: Optional[int] = None,
+        maximum_bytes_billed: Optional[int] = None
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Execute a BigQuery SQL query and yield result pages as they are downloaded."""
+        return self._iterate(
+            ADHOC, lambda: self.client.iter_query_pages(query, parameters, page_size, maximum_bytes_billed)
+        )
+
+    def stream_job_pages(
+        self, job_id: str, location: Optional[str] = None, page_size: Optional[int] = None
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Yield the result pages of a finished query job as they are downloaded."""
+        return self._iterate(ADHOC, lambda: self.client.iter_job_pages(job_id, location, page_size))
+
+    def stream_job_record_batches(self, job_id: str, location: Optional[str] = None) -> AsyncIterator[pyarrow.RecordBatch]:
+        """Yield the results of a finished query job as Arrow record batches as they are downloaded."""
+        return self._iterate(ADHOC, lambda: self.client.iter_job_record_batches(job_id, location))
+
+    async def create_read_session(
+        self,
+        query: str,
+        parameters: Optional[Dict[str, Any]] = None,
+        maximum_bytes_billed: Optional[int] = None,
+        max_streams: int = 8
+    ) -> ReadSession:
+        """Run a query and open a read session over its results, split into up to ``max_streams`` streams."""
+        return await self._run(
+            ADHOC, self.stream_provider.open_session, query, parameters, maximum_bytes_billed, max_streams
+        )
+
+    async def stream_parallel_record_batches(
+        self,
+        query: str,
+        parameters: Optional[Dict[str, Any]] = None,
+        maximum_bytes_billed: Optional[int] = None,
+        max_streams: int = 8,
+        ordered: bool = True
+    ) -> AsyncIterator[pyarrow.RecordBatch]:
+        """Stream query results as Arrow record batches read from several streams in parallel.
+
+        Streams are only split for unordered reads of queries without an
+        ORDER BY; BigQuery's streams are not slices of the result order, so
+        anything else is read from a single stream. The streams are downloaded
+        on their own threads and merged in arrival order. Closing or
+        cancelling the stream stops those threads.
+        """
+        if ordered or contains_order_by(query):
+            max_streams = 1
+        session = await self.create_read_session(query, parameters, maximum_bytes_billed, max_streams)
+        batches = self._iterate(ADHOC, lambda: iter_parallel_batches(self.stream_provider, session, ordered))
+        try:
+            async for batch in batches:
+                yield batch
+        finally:
+            await batches.aclose()
+
+    async def get_table_schema(self, dataset_id: str, table_id: str) -> List[Dict[str, Any]]:
+        """Get the schema of a BigQuery table off the event loop."""
+        return await self._run(METADATA, self.client.get_table_schema, dataset_id, table_id)
+
+    async def list_datasets(self) -> List[str]:
+        """List all datasets in the project off the event loop."""
+        return await self._run(METADATA, self.client.list_datasets)
+
+    async def list_tables(self, dataset_id: str) -> List[str]:
+        """List all tables in a dataset off the event loop."""
+        return await self._run(METADATA, self.client.list_tables, dataset_id)
+
+    def shutdown(self):
+        """Stop accepting work and wait for running jobs to finish."""
+        self._executor.shutdown(wait=True)
@@ -1,6 +1,142 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterator, Union
+from datetime import date, datetime, time
+from decimal import Decimal
+from google.api_core import exceptions as google_exceptions
 from google.cloud import bigquery
+from google.cloud import bigquery_storage
+import pyarrow
 import os
+from time import perf_counter
+
+from .read_streams import contains_order_by
+
+
+class TypedParameter:
+    """A query parameter value with an explicit BigQuery type, such as ``DATE`` or ``ARRAY<INT64>``."""
+
+    __slots__ = ("type", "value")
+
+    def __init__(self, type: str, value: Any):
+        self.type = type.upper().replace(" ", "")
+        self.value = value
+
+    def __str__(self) -> str:
+        return f"{self.type}:{self.value}"
+
+
+# Checked in order: bool before int, datetime before date
+_PARAMETER_TYPES = (
+    (bool, "BOOL"),
+    (int, "INT64"),
+    (float, "FLOAT64"),
+    (Decimal, "NUMERIC"),
+    (datetime, "TIMESTAMP"),
+    (date, "DATE"),
+    (time, "TIME"),
+    (bytes, "BYTES"),
+)
+
+
+def _infer_type(value: Any) -> str:
+    for python_type, bigquery_type in _PARAMETER_TYPES:
+        if isinstance(value, python_type):
+            return bigquery_type
+    return "STRING"
+
+
+def query_parameter(
+    name: str, value: Any
+) -> Union[bigquery.ScalarQueryParameter, bigquery.ArrayQueryParameter]:
+    """Bind a value as a query parameter, inferring its BigQuery type unless it is a TypedParameter.
+
+    Lists and tuples become ARRAY parameters typed after their first non-null element.
+    """
+    if isinstance(value, TypedParameter):
+        parameter_type, value = value.type, value.value
+    elif isinstance(value, (list, tuple)):
+        element = next((item for item in value if item is not None), None)
+        parameter_type = f"ARRAY<{_infer_type(element)}>"
+    else:
+        parameter_type = _infer_type(value)
+    
+    if parameter_type.startswith("ARRAY<") and parameter_type.endswith(">"):
+        return bigquery.ArrayQueryParameter(name, parameter_type[6:-1], list(value))
+    return bigquery.ScalarQueryParameter(name, parameter_type, value)
+
+
+RATE_LIMIT_REASONS = frozenset({"rateLimitExceeded", "jobRateLimitExceeded", "quotaExceeded"})
+
+
+def _error_chain(error: Optional[BaseException]) -> Iterator[BaseException]:
+    """Yield an error and the errors it was raised from.
+
+    The client methods below re-raise API errors wrapped in a plain Exception,
+    so the original is found through the exception chain.
+    """
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        yield error
+        error = error.__cause__ or error.__context__
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """Whether an error, or an error it was raised from, is BigQuery rejecting a call for rate or quota limits."""
+    for cause in _error_chain(error):
+        if isinstance(cause, google_exceptions.TooManyRequests):
+            return True
+        if isinstance(cause, google_exceptions.GoogleAPICallError):
+            reasons = {item.get("reason") for item in cause.errors or [] if isinstance(item, dict)}
+            if reasons & RATE_LIMIT_REASONS:
+                return True
+    return False
+
+
+def is_request_error(error: BaseException) -> bool:
+    """Whether an error, or an error it was raised from, is a not found or bad request answer to the call itself."""
+    return any(
+        isinstance(cause, (google_exceptions.NotFound, google_exceptions.BadRequest)) for cause in _error_chain(error)
+    )
+
+
+class QueryResult:
+    """Rows of a finished query together with the job statistics BigQuery reported for it.
+
+    ``pending_seconds`` and ``execution_seconds`` come from the job's created,
+    started and ended times; ``download_seconds`` is the time spent reading the
+    result rows once the job finished.
+    """
+
+    __slots__ = (
+        "rows", "job_id", "total_bytes_processed", "total_bytes_billed", "cache_hit",
+        "pending_seconds", "execution_seconds", "download_seconds",
+    )
+
+    def __init__(
+        self,
+        rows: List[Dict[str, Any]],
+        job_id: Optional[str] = None,
+        total_bytes_processed: Optional[int] = None,
+        total_bytes_billed: Optional[int] = None,
+        cache_hit: bool = False,
+        pending_seconds: Optional[float] = None,
+        execution_seconds: Optional[float] = None,
+        download_seconds: Optional[float] = None
+    ):
+        self.rows = rows
+        self.job_id = job_id
+        self.total_bytes_processed = total_bytes_processed
+        self.total_bytes_billed = total_bytes_billed
+        self.cache_hit = cache_hit
+        self.pending_seconds = pending_seconds
+        self.execution_seconds = execution_seconds
+        self.download_seconds = download_seconds
+
+
+def _seconds_between(start: Optional[datetime], end: Optional[datetime]) -> Optional[float]:
+    if start is None or end is None:
+        return None
+    return (end - start).total_seconds()
 
 
 class BigQueryClient:
@@ -10,30 +146,242 @@ class BigQueryClient:
             raise ValueError("GOOGLE_CLOUD_PROJECT environment variable is required")
         
         self.client = bigquery.Client(project=self.project_id)
+        self.bqstorage_client = bigquery_storage.BigQueryReadClient()
     
-    def execute_query(self, query: str, parameters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
-        """Execute a BigQuery SQL query and return the results as a list of dictionaries."""
+    def _job_config(
+        self,
+        parameters: Optional[Dict[str, Any]] = None,
+        maximum_bytes_billed: Optional[int] = None,
+        dry_run: bool = False
+    ) -> Optional[bigquery.QueryJobConfig]:
+        """Build the job config binding the given query parameters with their BigQuery types.
+
+        ``maximum_bytes_billed`` makes BigQuery fail the job instead of billing
+        more than that many bytes; ``dry_run`` only validates and estimates it.
+        """
+        if not parameters and maximum_bytes_billed is None and not dry_run:
+            return None
+        job_config = bigquery.QueryJobConfig(
+            query_parameters=[query_parameter(key, value) for key, value in (parameters or {}).items()]
+        )
+        if maximum_bytes_billed is not None:
+            job_config.maximum_bytes_billed = maximum_bytes_billed
+        if dry_run:
+            job_config.dry_run = True
+            job_config.use_query_cache = False
+        return job_config
+    
+    def dry_run(self, query: str, parameters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Validate a query without running it and return its estimated bytes processed and referenced tables."""
+        try:
+            query_job = self.client.query(query, job_config=self._job_config(parameters, dry_run=True))
+            return {
+                "total_bytes_processed": query_job.total_bytes_processed or 0,
+                "referenced_tables": [
+                    f"{table.project}.{table.dataset_id}.{table.table_id}"
+                    for table in query_job.referenced_tables
+                ],
+            }
+        
+        except Exception as e:
+            raise Exception(f"BigQuery dry run error: {str(e)}")
+    
+    def run_query(
+        self, query: str, parameters: Optional[Dict[str, Any]] = None, maximum_bytes_billed: Optional[int] = None
+    ) -> QueryResult:
+        """Execute a BigQuery SQL query and return its rows as dictionaries along with the job statistics."""
         try:
-            if parameters:
-                job_config = bigquery.QueryJobConfig(
-                    query_parameters=[
-                        bigquery.ScalarQueryParameter(key, "STRING", value)
-                        for key, value in parameters.items()
-                    ]
-                )
-                query_job = self.client.query(query, job_config=job_config)
-            else:
-                query_job = self.client.query(query)
+            query_job = self.client.query(query, job_config=self._job_config(parameters, maximum_bytes_billed))
+            rows = query_job.result()
             
+            download_start = perf_counter()
             results = []
-            for row in query_job:
+            for row in rows:
                 results.append(dict(row))
             
-            return results
+            return QueryResult(
+                results,
+                job_id=query_job.job_id,
+                total_bytes_processed=query_job.total_bytes_processed,
+                total_bytes_billed=query_job.total_bytes_billed,
+                cache_hit=bool(query_job.cache_hit),
+                pending_seconds=_seconds_between(query_job.created, query_job.started),
+                execution_seconds=_seconds_between(query_job.started, query_job.ended),
+                download_seconds=perf_counter() - download_start
+            )
         
         except Exception as e:
             raise Exception(f"BigQuery execution error: {str(e)}")
     
+    def execute_query(
+        self, query: str, parameters: Optional[Dict[str, Any]] = None, maximum_bytes_billed: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Execute a BigQuery SQL query and return the results as a list of dictionaries."""
+        return self.run_query(query, parameters, maximum_bytes_billed).rows
+    
+    def iter_query_pages(
+        self,
+        query: str,
+        parameters: Optional[Dict[str, Any]] = None,
+        page_size: Optional[int] = None,
+        maximum_bytes_billed: Optional[int] = None
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """Execute a BigQuery SQL query and yield the results one page of dictionaries at a time."""
+        try:
+            query_job = self.client.query(query, job_config=self._job_config(parameters, maximum_bytes_billed))
+            for page in query_job.result(page_size=page_size).pages:
+                yield [dict(row) for row in page]
+        
+        except Exception as e:
+            raise Exception(f"BigQuery execution error: {str(e)}")
+    
+    def execute_query_page(
+        self,
+        query: str,
+        parameters: Optional[Dict[str, Any]] = None,
+        page_size: int = 1000,
+        maximum_bytes_billed: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Execute a BigQuery SQL query, wait for it to finish and return its first page of results."""
+        try:
+            query_job = self.client.query(query, job_config=self._job_config(parameters, maximum_bytes_billed))
+            query_job.result()
+            return self._read_page(query_job, None, page_size)
+        
+        except Exception as e:
+            raise Exception(f"BigQuery execution error: {str(e)}")
+    
+    def get_query_page(
+        self, job_id: str, page_token: Optional[str] = None, page_size: int = 1000, location: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Read a page of a finished query job's results from its destination table without re-running it."""
+        try:
+            query_job = self.client.get_job(job_id, location=location)
+            if query_job.state != "DONE":
+                raise Exception(f"Job {job_id} is not finished (state: {query_job.state})")
+            if query_job.error_result:
+                raise Exception(f"Job {job_id} failed: {query_job.error_result.get('message')}")
+            return self._read_page(query_job, page_token, page_size)
+        
+        except Exception as e:
+            raise Exception(f"Result page retrieval error: {str(e)}")
+    
+    def _read_page(self, query_job: bigquery.QueryJob, page_token: Optional[str], page_size: int) -> Dict[str, Any]:
+        page = {
+            "job_id": query_job.job_id,
+            "location": query_job.location,
+            "rows": [],
+            "total_rows": 0,
+            "page_token": None,
+        }
+        if query_job.destination is None:
+            return page
+        
+        rows = self.client.list_rows(
+            query_job.destination, page_token=page_token, page_size=page_size, max_results=page_size
+        )
+        first_page = next(iter(rows.pages), [])
+        page["rows"] = [dict(row) for row in first_page]
+        page["total_rows"] = rows.total_rows
+        page["page_token"] = rows.next_page_token
+        return page
+    
+    def submit_query(
+        self, query: str, parameters: Optional[Dict[str, Any]] = None, maximum_bytes_billed: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Start a BigQuery query job and return its status without waiting for it to finish."""
+        try:
+            query_job = self.client.query(query, job_config=self._job_config(parameters, maximum_bytes_billed))
+            return self._job_status(query_job)
+        
+        except Exception as e:
+            raise Exception(f"BigQuery execution error: {str(e)}")
+    
+    def get_job_status(self, job_id: str, location: Optional[str] = None) -> Dict[str, Any]:
+        """Get the state and statistics of a BigQuery job."""
+        try:
+            return self._job_status(self.client.get_job(job_id, location=location))
+        
+        except Exception as e:
+            raise Exception(f"Job status retrieval error: {str(e)}")
+    
+    @staticmethod
+    def _job_status(query_job: bigquery.QueryJob) -> Dict[str, Any]:
+        error = query_job.error_result.get("message") if query_job.error_result else None
+        return {
+            "job_id": query_job.job_id,
+            "location": query_job.location,
+            "state": query_job.state,
+            "error": error,
+            "total_bytes_processed": getattr(query_job, "total_bytes_processed", None),
+            "total_bytes_billed": getattr(query_job, "total_bytes_billed", None),
+        }
+    
+    def iter_job_pages(
+        self, job_id: str, location: Optional[str] = None, page_size: Optional[int] = None
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """Yield the results of a finished query job one page of dictionaries at a time."""
+        try:
+            query_job = self.client.get_job(job_id, location=location)
+            if query_job.destination is None:
+                return
+            for page in self.client.list_rows(query_job.destination, page_size=page_size).pages:
+                yield [dict(row) for row in page]
+        
+        except Exception as e:
+            raise Exception(f"Job result retrieval error: {str(e)}")
+    
+    def iter_job_record_batches(self, job_id: str, location: Optional[str] = None) -> Iterator[pyarrow.RecordBatch]:
+        """Yield the results of a finished query job as Arrow record batches."""
+        try:
+            query_job = self.client.get_job(job_id, location=location)
+            if query_job.destination is None:
+                return
+            rows = self.client.list_rows(query_job.destination)
+            # Read a single stream when row order matters, as QueryJob.result() does
+            rows._preserve_order = contains_order_by(query_job.query)
+            yield from rows.to_arrow_iterable(bqstorage_client=self.bqstorage_client)
+        
+        except Exception as e:
+            raise Exception(f"Job result retrieval error: {str(e)}")
+    
+    def create_read_session(
+        self,
+        query: str,
+        parameters: Optional[Dict[str, Any]] = None,
+        maximum_bytes_billed: Optional[int] = None,
+        max_streams: int = 8
+    ) -> bigquery_storage.types.ReadSession:
+        """Run a query and open a Storage Read API session over its result table, split into up to ``max_streams`` streams."""
+        try:
+            query_job = self.client.query(query, job_config=self._job_config(parameters, maximum_bytes_billed))
+            query_job.result()
+            table = query_job.destination
+            requested_session = bigquery_storage.types.ReadSession(
+                table=f"projects/{table.project}/datasets/{table.dataset_id}/tables/{table.table_id}",
+                data_format=bigquery_storage.types.DataFormat.ARROW
+            )
+            return self.bqstorage_client.create_read_session(
+                parent=f"projects/{self.client.project}",
+                read_session=requested_session,
+                max_stream_count=max_streams
+            )
+        
+        except Exception as e:
+            raise Exception(f"BigQuery read session error: {str(e)}")
+    
+    def iter_stream_record_batches(
+        self, session: bigquery_storage.types.ReadSession, stream_name: str
+    ) -> Iterator[pyarrow.RecordBatch]:
+        """Yield one read stream of a Storage Read API session as Arrow record batches."""
+        try:
+            reader = self.bqstorage_client.read_rows(stream_name)
+            for page in reader.rows(session).pages:
+                yield page.to_arrow()
+        
+        except Exception as e:
+            raise Exception(f"BigQuery read stream error: {str(e)}")
+    
     def get_table_schema(self, dataset_id: str, table_id: str) -> List[Dict[str, Any]]:
         """Get the schema of a BigQuery table."""
         try:
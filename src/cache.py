@@ -0,0 +1,178 @@
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Any, Optional, Tuple
+
+from .serialization import dumps
+
+
+def _typed_value(value: Any) -> Any:
+    # Keep the Python type in the key so a DATE and a STRING with the same text never collide
+    return [type(value).__name__, str(value)]
+
+
+# String and quoted-identifier literals and comments, whose whitespace is significant; a line comment keeps
+# its newline so text after it is never read as part of the comment
+_VERBATIM = re.compile(
+    r"'''.*?'''" r'|""".*?"""'
+    r"|'(?:\\.|[^'\\])*'" r'|"(?:\\.|[^"\\])*"' r"|`(?:\\.|[^`\\])*`"
+    r"|(?:--|#)[^\n]*\n?|/\*.*?\*/",
+    re.DOTALL
+)
+
+
+def normalize_query(query: str) -> str:
+    """Collapse runs of whitespace in SQL text to single spaces, outside string literals and comments."""
+    parts = []
+    position = 0
+    for match in _VERBATIM.finditer(query):
+        parts.append(re.sub(r"\s+", " ", query[position:match.start()]))
+        parts.append(match.group())
+        position = match.end()
+    parts.append(re.sub(r"\s+", " ", query[position:]))
+    return "".join(parts).strip()
+
+
+def make_cache_key(
+    query: str,
+    parameters: Optional[Dict[str, Any]] = None,
+    maximum_bytes_billed: Optional[int] = None
+) -> str:
+    """Build a cache key from whitespace-normalized SQL text, its typed parameters and the bytes budget.
+
+    The bytes budget is part of the key, so a result is never shared with a
+    caller whose job would have been capped lower.
+    """
+    return json.dumps(
+        [normalize_query(query), parameters or {}, maximum_bytes_billed],
+        sort_keys=True,
+        default=_typed_value
+    )
+
+
+def _end_of_utc_day(day: date) -> float:
+    """Return the timestamp at which ``day`` ends in UTC, when BigQuery's current_date rolls over."""
+    return datetime.combine(day + timedelta(days=1), datetime.min.time(), tzinfo=timezone.utc).timestamp()
+
+
+class _CacheEntry:
+    __slots__ = ("value", "size", "fresh_until", "expires_at")
+
+    def __init__(self, value: Any, size: int, fresh_until: float, expires_at: float):
+        self.value = value
+        self.size = size
+        self.fresh_until = fresh_until
+        self.expires_at = expires_at
+
+
+class QueryResultCache:
+    """LRU cache of query results bounded by entry count and approximate size in bytes.
+
+    Entries are fresh for ``ttl_seconds`` or until the next UTC date boundary,
+    whichever comes first, so results for ``current_date - N`` queries never
+    outlive the day they were computed for. ``lookup`` keeps returning an
+    entry for ``stale_seconds`` after that, marked stale, so callers can serve
+    it while they refresh it.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttl_seconds: int = 3600,
+        stale_seconds: int = 0
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self._entries: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def lookup(self, key: str) -> Tuple[Optional[Any], bool]:
+        """Return the cached value for a key and whether it is fresh, or (None, False) if it is missing or expired."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at <= now:
+                self._remove(key)
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None, False
+            self._entries.move_to_end(key)
+            if entry.fresh_until <= now:
+                self.stale_hits += 1
+                return entry.value, False
+            self.hits += 1
+            return entry.value, True
+
+    def is_fresh(self, key: str) -> bool:
+        """Whether a key has a fresh entry, without counting a lookup or touching its recency."""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and entry.fresh_until > time.time()
+
+    def set(self, key: str, value: Any, size: Optional[int] = None, day: Optional[date] = None):
+        """Store a value, evicting least recently used entries to stay within bounds.
+
+        ``size`` is the value's approximate size in bytes; by default it is
+        measured as the length of its JSON encoding. ``day`` is the UTC date
+        the value's query was resolved for, today by default; the entry stops
+        being fresh when that day ends, so a result warmed ahead for tomorrow
+        stays fresh through tomorrow.
+        """
+        if size is None:
+            size = len(dumps(value))
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        if day is None:
+            day = datetime.fromtimestamp(now, tz=timezone.utc).date()
+        fresh_until = min(now + self.ttl_seconds, _end_of_utc_day(day))
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = _CacheEntry(value, size, fresh_until, fresh_until + self.stale_seconds)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self.evictions += 1
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+    def clear(self):
+        """Drop every cached entry."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the cache counters and current size."""
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
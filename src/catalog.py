@@ -0,0 +1,125 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from .admission import AdmissionRejected
+from .bigquery_client import is_request_error
+from .singleflight import SingleFlight
+
+
+CatalogKey = Tuple[str, ...]
+
+
+class _CatalogEntry:
+    __slots__ = ("value", "loaded_at")
+
+    def __init__(self, value: Any, loaded_at: float):
+        self.value = value
+        self.loaded_at = loaded_at
+
+
+class MetadataCatalog:
+    """In-process cache of dataset lists, table lists and table schemas.
+
+    Entries load lazily on first use and are refreshed by ``run`` every
+    ``refresh_interval`` seconds; an entry older than ``max_age`` (because
+    refreshes are failing) is reloaded on access instead. Every BigQuery call
+    the catalog makes updates its connectivity state, which ``status`` reports
+    without calling BigQuery; lookups BigQuery answers with not found or bad
+    request do not count as failures. ``client`` is anything with the
+    AsyncBigQueryClient ``list_datasets``, ``list_tables`` and
+    ``get_table_schema`` methods.
+    """
+
+    def __init__(self, client, refresh_interval: float = 300.0, max_age: float = 900.0):
+        self.client = client
+        self.refresh_interval = refresh_interval
+        self.max_age = max_age
+        self._entries: Dict[CatalogKey, _CatalogEntry] = {}
+        self._single_flight = SingleFlight()
+        self.last_success: Optional[float] = None
+        self.last_failure: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    def _loader(self, key: CatalogKey) -> Callable[[], Awaitable[Any]]:
+        kind, *args = key
+        if kind == "datasets":
+            return self.client.list_datasets
+        if kind == "tables":
+            return lambda: self.client.list_tables(*args)
+        return lambda: self.client.get_table_schema(*args)
+
+    async def _load(self, key: CatalogKey) -> Any:
+        async def load() -> Any:
+            try:
+                value = await self._loader(key)()
+            except AdmissionRejected:
+                # Shed by admission control, which says nothing about BigQuery's availability
+                raise
+            except Exception as e:
+                # A dataset or table that does not exist says nothing about BigQuery's availability
+                if not is_request_error(e):
+                    self.last_failure = time.monotonic()
+                    self.last_error = str(e)
+                raise
+            self.last_success = time.monotonic()
+            self._entries[key] = _CatalogEntry(value, self.last_success)
+            return value
+
+        return await self._single_flight.do("\0".join(key), load)
+
+    async def _get(self, key: CatalogKey) -> Any:
+        entry = self._entries.get(key)
+        if entry is not None and time.monotonic() - entry.loaded_at < self.max_age:
+            return entry.value
+        return await self._load(key)
+
+    async def datasets(self) -> List[str]:
+        return await self._get(("datasets",))
+
+    async def tables(self, dataset_id: str) -> List[str]:
+        return await self._get(("tables", dataset_id))
+
+    async def schema(self, dataset_id: str, table_id: str) -> List[Dict[str, Any]]:
+        return await self._get(("schema", dataset_id, table_id))
+
+    def invalidate(self, dataset_id: Optional[str] = None, table_id: Optional[str] = None) -> int:
+        """Drop cached entries for a table, a dataset (its table list and schemas) or, with no arguments, everything."""
+        if dataset_id is None:
+            keys = list(self._entries)
+        elif table_id is None:
+            keys = [key for key in self._entries if key[0] != "datasets" and key[1] == dataset_id]
+        else:
+            keys = [("schema", dataset_id, table_id)]
+        removed = 0
+        for key in keys:
+            if self._entries.pop(key, None) is not None:
+                removed += 1
+        return removed
+
+    async def refresh(self):
+        """Reload the dataset list and every cached entry, keeping the old value of any that fails."""
+        keys = set(self._entries) | {("datasets",)}
+        await asyncio.gather(*(self._load(key) for key in keys), return_exceptions=True)
+
+    async def run(self):
+        """Refresh the catalog now and then every ``refresh_interval`` seconds until cancelled."""
+        while True:
+            await self.refresh()
+            await asyncio.sleep(self.refresh_interval)
+
+    def status(self) -> Dict[str, Any]:
+        """Report connectivity from the catalog's most recent BigQuery calls, without making one."""
+        now = time.monotonic()
+        if self.last_success is None and self.last_failure is None:
+            state = "unknown"
+        elif self.last_failure is None or (self.last_success or 0) > self.last_failure:
+            state = "connected"
+        else:
+            state = "disconnected"
+        return {
+            "bigquery": state,
+            "last_success_age_seconds": None if self.last_success is None else round(now - self.last_success, 3),
+            "last_error": self.last_error if state == "disconnected" else None,
+            "entries": len(self._entries),
+        }
@@ -4,10 +4,63 @@ from pydantic_settings import BaseSettings
 
 
 class Settings(BaseSettings):
-    google_cloud_project: str
+    google_cloud_project: Optional[str] = None
     google_application_credentials: Optional[str] = None
+    bigquery_backend: str = "bigquery"
+    fake_bigquery_latency: float = 0.05
+    fake_bigquery_query_rows: int = 100000
+    fake_bigquery_domains: int = 1000
     host: str = "0.0.0.0"
     port: int = 8000
+    bigquery_max_workers: int = 16
+    bigquery_max_concurrent_jobs: int = 8
+    bigquery_interactive_max_concurrent: int = 8
+    bigquery_interactive_max_queue: int = 100
+    bigquery_interactive_max_wait: float = 10.0
+    bigquery_adhoc_max_concurrent: int = 3
+    bigquery_adhoc_max_queue: int = 10
+    bigquery_adhoc_max_wait: float = 30.0
+    bigquery_metadata_max_concurrent: int = 2
+    bigquery_metadata_max_queue: int = 50
+    bigquery_metadata_max_wait: float = 5.0
+    bigquery_rate_limit_retries: int = 4
+    bigquery_rate_limit_backoff: float = 1.0
+    bigquery_rate_limit_max_backoff: float = 32.0
+    query_stream_page_size: int = 10000
+    query_max_page_size: int = 50000
+    read_max_streams: int = 8
+    metadata_refresh_interval: float = 300.0
+    metadata_max_age: float = 900.0
+    timing_log_enabled: bool = True
+    job_store_path: str = "jobs.db"
+    export_dir: str = "exports"
+    export_max_streams: int = 8
+    maximum_bytes_billed: Optional[int] = 100 * 1024 ** 3
+    query_preflight_enabled: bool = True
+    result_cache_enabled: bool = True
+    result_cache_max_entries: int = 1024
+    result_cache_max_bytes: int = 64 * 1024 * 1024
+    result_cache_ttl_seconds: int = 3600
+    result_cache_stale_seconds: int = 3600
+    prewarm_enabled: bool = True
+    prewarm_top_domains: int = 100
+    prewarm_batch_size: int = 500
+    prewarm_interval: float = 300.0
+    prewarm_lead_seconds: float = 900.0
+    prewarm_partition_delay: float = 7200.0
+    prewarm_traffic_half_life: float = 86400.0
+    batch_max_domains: int = 10000
+    metric_max_window_days: int = 366
+    rollup_enabled: bool = True
+    rollup_db_path: str = "rollup.db"
+    rollup_backfill_days: int = 31
+    rollup_lookback_days: int = 2
+    rollup_refresh_interval: float = 3600.0
+    sincera_db_path: str = "sincera_data.db"
+    sincera_pool_size: int = 4
+    sincera_mmap_size: int = 256 * 1024 * 1024
+    sincera_snapshot_enabled: bool = False
+    sincera_snapshot_check_interval: float = 30.0
     
     class Config:
         env_file = ".env"
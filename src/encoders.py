@@ -0,0 +1,124 @@
+import csv
+import io
+from datetime import date, datetime, time
+from typing import List, Dict, Any, Optional
+import pyarrow
+import pyarrow.ipc
+import pyarrow.parquet
+
+from .serialization import dumps
+
+
+def _csv_value(value: Any) -> Any:
+    # Write dates and times exactly as the JSON formats do
+    if isinstance(value, (datetime, date, time)):
+        return dumps(value)[1:-1].decode("ascii")
+    return value
+
+
+def encode_ndjson(rows: List[Dict[str, Any]]) -> bytes:
+    """Encode rows as newline-delimited JSON."""
+    return b"".join(dumps(row) + b"\n" for row in rows)
+
+
+def encode_csv(rows: List[Dict[str, Any]], fieldnames: Optional[List[str]] = None) -> bytes:
+    """Encode rows as CSV, writing a header line first when fieldnames are given."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if fieldnames:
+        writer.writerow(fieldnames)
+    for row in rows:
+        writer.writerow([_csv_value(value) for value in row.values()])
+    return buffer.getvalue().encode("utf-8")
+
+
+class NdjsonEncoder:
+    """Incrementally encodes pages of rows as newline-delimited JSON."""
+
+    def encode(self, rows: List[Dict[str, Any]]) -> bytes:
+        return encode_ndjson(rows)
+
+    def close(self) -> bytes:
+        return b""
+
+
+class CsvEncoder:
+    """Incrementally encodes pages of rows as CSV, with a header taken from the first row."""
+
+    def __init__(self):
+        self._header_written = False
+
+    def encode(self, rows: List[Dict[str, Any]]) -> bytes:
+        fieldnames = None
+        if rows and not self._header_written:
+            fieldnames = list(rows[0].keys())
+            self._header_written = True
+        return encode_csv(rows, fieldnames)
+
+    def close(self) -> bytes:
+        return b""
+
+
+class _ChunkSink:
+    """Write-only file object that hands back whatever was written since the last drain."""
+
+    def __init__(self):
+        self.closed = False
+        self._chunks = []
+        self._position = 0
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class ArrowEncoder:
+    """Incrementally encodes Arrow record batches as an Arrow IPC stream or a Parquet file.
+
+    Batches are handed to the Arrow writers as-is, so no per-row Python objects
+    are created. Each Parquet batch becomes its own row group, which lets the
+    file be sent while it is still being written.
+    """
+
+    def __init__(self, format: str):
+        if format not in ("arrow", "parquet"):
+            raise ValueError(f"Unsupported Arrow format: {format}")
+        self.format = format
+        self._sink = _ChunkSink()
+        self._file = pyarrow.PythonFile(self._sink, mode="w")
+        self._writer = None
+
+    def _open(self, schema: pyarrow.Schema):
+        if self.format == "parquet":
+            self._writer = pyarrow.parquet.ParquetWriter(self._file, schema)
+        else:
+            self._writer = pyarrow.ipc.new_stream(self._file, schema)
+
+    def encode(self, batch: pyarrow.RecordBatch) -> bytes:
+        if self._writer is None:
+            self._open(batch.schema)
+        self._writer.write_batch(batch)
+        return self._sink.drain()
+
+    def close(self) -> bytes:
+        if self._writer is None:
+            self._open(pyarrow.schema([]))
+        self._writer.close()
+        self._file.close()
+        return self._sink.drain()
@@ -0,0 +1,481 @@
+import random
+import re
+import threading
+import time
+import uuid
+import zlib
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import pyarrow
+import pyarrow.compute
+from google.api_core import exceptions as google_exceptions
+
+from .bigquery_client import QueryResult
+from .queries import (
+    FILL_RATE_QUERY, ATTENTION_QUERY, DOMAIN_HISTORY_QUERY, BIDSTREAM_ROLLUP_QUERY, ATTENTION_ROLLUP_QUERY,
+    bounds_dates
+)
+from .read_streams import FakeStreamProvider
+
+
+BIDSTREAM_TABLE = "ozone.fct_smart_bidstream__root"
+ATTENTION_TABLE = "ozpr-data-engineering-prod.prod_de_attention_metrics.fct_attention_metrics__beeswax"
+
+# Rough width of a bidstream row in BigQuery storage, used for bytes processed
+ROW_BYTES = 96
+
+_LIMIT = re.compile(r"\blimit\s+(\d+)\s*$", re.IGNORECASE)
+
+
+def synthetic_domain(index: int) -> str:
+    """Name of the ``index``-th domain served by the fake backend and written by the sincera_data.db generator."""
+    return f"publisher{index:06d}.example"
+
+
+def synthetic_publisher_id(domain: str) -> int:
+    return zlib.crc32(domain.encode("utf-8")) % 90000 + 10000
+
+
+def _template(query: str) -> str:
+    """The constant part of a query template, before its first placeholder."""
+    return query.split("{", 1)[0]
+
+
+@lru_cache(maxsize=65536)
+def _ad_unit_daily(domain: str, ad_unit_id: str) -> Tuple[float, float, float, float, float]:
+    """Daily ad requests, impressions, bids, bid revenue and net revenue of one ad unit."""
+    rng = random.Random(f"{domain}/{ad_unit_id}")
+    ad_requests = rng.uniform(1e6, 5e6)
+    ad_bids = ad_requests * rng.uniform(0.2, 0.8)
+    impressions = ad_bids * rng.uniform(0.05, 0.4)
+    bid_revenue = ad_bids * rng.uniform(0.5, 4.0) / 1000
+    net_revenue = impressions * rng.uniform(0.5, 3.0) / 1000
+    return ad_requests, impressions, ad_bids, bid_revenue, net_revenue
+
+
+@lru_cache(maxsize=65536)
+def _attention_daily(domain: str) -> Tuple[float, float, float, float]:
+    """Daily clicks, hovers, viewable and measured impressions of one domain."""
+    rng = random.Random(f"{domain}/attention")
+    measured = rng.uniform(1e5, 1e6)
+    clicks = measured * rng.uniform(0.001, 0.01)
+    hovers = measured * rng.uniform(0.01, 0.1)
+    viewable = measured * rng.uniform(0.4, 0.8)
+    return clicks, hovers, viewable, measured
+
+
+def _to_rows(table: pyarrow.Table) -> List[Dict[str, Any]]:
+    """Convert an Arrow table to row dictionaries, with UTC datetimes for its zone-aware timestamps."""
+    # pyarrow converts zone-aware timestamps one value at a time through the time zone
+    # database, so convert them as naive timestamps and attach UTC afterwards
+    utc_columns = []
+    for index, field in enumerate(table.schema):
+        if pyarrow.types.is_timestamp(field.type) and field.type.tz is not None:
+            table = table.set_column(index, field.name, table.column(index).cast(pyarrow.timestamp(field.type.unit)))
+            utc_columns.append(field.name)
+    rows = table.to_pylist()
+    for row in rows:
+        for name in utc_columns:
+            if row[name] is not None:
+                row[name] = row[name].replace(tzinfo=timezone.utc)
+    return rows
+
+
+def _ratio(numerator: float, denominator: float) -> Optional[float]:
+    return numerator / denominator if denominator else None
+
+
+class FakeBigQueryClient:
+    """Stand-in for BigQueryClient that serves synthetic bidstream and attention rows without GCP.
+
+    The metric and rollup queries in ``queries`` are recognized by their SQL
+    text and answered for the domains and dates in their parameters, with
+    ``ad_units`` ad units per domain; rollups cover the first ``domains``
+    synthetic domains. Figures are derived from a hash of the domain and ad
+    unit, so repeated queries agree. Any other query reads the first
+    ``query_rows`` rows of a synthetic bidstream table, or fewer if it ends
+    in ``LIMIT n``. Every job sleeps for ``latency`` seconds first, standing in
+    for BigQuery's queueing and execution time. Like BigQueryClient its methods
+    are blocking; ``stream_provider`` returns the provider to read it through.
+    """
+
+    def __init__(
+        self,
+        query_rows: int = 100000,
+        latency: float = 0.05,
+        domains: int = 1000,
+        ad_units: int = 20,
+        seed: int = 0
+    ):
+        self.project_id = "fake-project"
+        self.query_rows = query_rows
+        self.latency = latency
+        self.domains = domains
+        self.ad_units = ad_units
+        self.seed = seed
+        self._table: Optional[pyarrow.Table] = None
+        self._table_lock = threading.Lock()
+        self._jobs: Dict[str, Tuple[str, Optional[Dict[str, Any]]]] = {}
+
+    def stream_provider(self) -> FakeStreamProvider:
+        return _FakeBigQueryStreamProvider(self)
+
+    # Synthetic data
+
+    def bidstream_table(self) -> pyarrow.Table:
+        """The synthetic bidstream table ad-hoc queries read, built on first use."""
+        with self._table_lock:
+            if self._table is None:
+                self._table = self._build_bidstream_table()
+            return self._table
+
+    def _build_bidstream_table(self) -> pyarrow.Table:
+        rng = random.Random(self.seed)
+        count = self.query_rows
+        units_per_hour = self.domains * self.ad_units
+        unit_index = [i % units_per_hour for i in range(count)]
+        domain_index = pyarrow.array([unit // self.ad_units for unit in unit_index])
+        domain_names = [synthetic_domain(i) for i in range(self.domains)]
+        domains = pyarrow.array(domain_names)
+        publisher_ids = pyarrow.array([str(synthetic_publisher_id(domain)) for domain in domain_names])
+        ad_unit_ids = pyarrow.array([f"unit-{i}" for i in range(self.ad_units)])
+
+        hour = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+        hours = pyarrow.array(
+            [hour - timedelta(hours=i) for i in range(-(-count // units_per_hour))],
+            pyarrow.timestamp("us", tz="UTC")
+        )
+
+        def uniform(low: float, high: float) -> pyarrow.Array:
+            return pyarrow.array([rng.uniform(low, high) for _ in range(count)], pyarrow.float64())
+
+        multiply = pyarrow.compute.multiply
+        ad_requests = uniform(4e4, 2e5)
+        ad_bids = multiply(ad_requests, uniform(0.2, 0.8))
+        impressions = multiply(ad_bids, uniform(0.05, 0.4))
+        return pyarrow.table({
+            "date_hour": hours.take(pyarrow.array([i // units_per_hour for i in range(count)])),
+            "publisher_id": publisher_ids.take(domain_index),
+            "domain": domains.take(domain_index),
+            "ad_unit_id": ad_unit_ids.take(pyarrow.array([unit % self.ad_units for unit in unit_index])),
+            "ad_requests_est": ad_requests,
+            "impressions_est": impressions,
+            "ad_bids": ad_bids,
+            "ad_rev_bid_net_usd": pyarrow.compute.divide(multiply(ad_bids, uniform(0.5, 4.0)), 1000),
+            "ad_rev_oz_net_usd_est": pyarrow.compute.divide(multiply(impressions, uniform(0.5, 3.0)), 1000),
+        })
+
+    def _adhoc_table(self, query: str) -> pyarrow.Table:
+        table = self.bidstream_table()
+        limit = _LIMIT.search(query.strip())
+        if limit:
+            table = table.slice(0, int(limit.group(1)))
+        return table
+
+    @staticmethod
+    def _query_domains(parameters: Dict[str, Any]) -> List[str]:
+        if "domain" in parameters:
+            return [parameters["domain"]]
+        return list(parameters.get("domains", []))
+
+    @staticmethod
+    def _days(parameters: Dict[str, Any]) -> int:
+        start_date, end_date = bounds_dates(parameters)
+        return (end_date - start_date).days + 1
+
+    def _ad_units(self, ad_unit_ids: Optional[List[str]]) -> List[str]:
+        units = [f"unit-{i}" for i in range(self.ad_units)]
+        return [unit for unit in units if unit in ad_unit_ids] if ad_unit_ids else units
+
+    def _fill_rate_rows(self, parameters: Dict[str, Any]) -> List[Dict[str, Any]]:
+        days = self._days(parameters)
+        rows = []
+        for domain in self._query_domains(parameters):
+            for unit in self._ad_units(None):
+                ad_requests, impressions, _, _, _ = _ad_unit_daily(domain, unit)
+                rows.append({
+                    "publisher_id": str(synthetic_publisher_id(domain)),
+                    "domain": domain,
+                    "ad_unit_id": unit,
+                    "ad_requests_est": ad_requests * days,
+                    "impressions_est": impressions * days,
+                    "fill_rate": impressions / ad_requests,
+                })
+        rows.sort(key=lambda row: row["ad_requests_est"], reverse=True)
+        return rows
+
+    def _domain_history_rows(self, parameters: Dict[str, Any]) -> List[Dict[str, Any]]:
+        days = self._days(parameters)
+        rows = []
+        for domain in self._query_domains(parameters):
+            for unit in self._ad_units(parameters.get("ad_unit_ids")):
+                ad_requests, impressions, ad_bids, bid_revenue, net_revenue = _ad_unit_daily(domain, unit)
+                rows.append({
+                    "publisher_id": str(synthetic_publisher_id(domain)),
+                    "domain": domain,
+                    "ad_unit_id": unit,
+                    "ad_requests_est": ad_requests * days,
+                    "rev_oz_net_usd": net_revenue * days,
+                    "bid_rate": ad_bids / ad_requests,
+                    "bid_cpm": bid_revenue / ad_bids * 1000,
+                    "win_rate": impressions / ad_bids,
+                    "fill_rate": impressions / ad_requests,
+                    "impression_cpm": net_revenue / impressions * 1000,
+                })
+        return rows
+
+    def _attention_rows(self, parameters: Dict[str, Any]) -> List[Dict[str, Any]]:
+        days = self._days(parameters)
+        rows = []
+        for domain in self._query_domains(parameters):
+            clicks, hovers, viewable, measured = _attention_daily(domain)
+            rows.append({
+                "domain": domain,
+                "publisher_id": str(synthetic_publisher_id(domain)),
+                "tracker_ad_clicks": clicks * days,
+                "tracker_ad_hovers": hovers * days,
+                "vie_imps": viewable * days,
+                "vie_pct": _ratio(viewable, measured),
+                "click_pct": _ratio(clicks, measured),
+                "hover_pct": _ratio(hovers, measured),
+            })
+        return rows
+
+    def _rollup_days(self, parameters: Dict[str, Any]) -> Iterator[Tuple[date, datetime]]:
+        """Each day of a rollup query with the last hour it has data for, which is never in the future."""
+        now = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+        day, end_date = bounds_dates(parameters)
+        while day <= end_date:
+            last_hour = datetime(day.year, day.month, day.day, 23, tzinfo=timezone.utc)
+            if last_hour > now:
+                last_hour = now
+            if last_hour.date() == day:
+                yield day, last_hour
+            day += timedelta(days=1)
+
+    def _bidstream_rollup_rows(self, parameters: Dict[str, Any]) -> List[Dict[str, Any]]:
+        rows = []
+        for day, last_hour in self._rollup_days(parameters):
+            for index in range(self.domains):
+                domain = synthetic_domain(index)
+                for unit in self._ad_units(None):
+                    ad_requests, impressions, ad_bids, bid_revenue, net_revenue = _ad_unit_daily(domain, unit)
+                    rows.append({
+                        "day": day,
+                        "publisher_id": str(synthetic_publisher_id(domain)),
+                        "domain": domain,
+                        "ad_unit_id": unit,
+                        "ad_requests_est": ad_requests,
+                        "impressions_est": impressions,
+                        "ad_bids": ad_bids,
+                        "ad_rev_bid_net_usd": bid_revenue,
+                        "ad_rev_oz_net_usd_est": net_revenue,
+                        "last_event_at": last_hour,
+                    })
+        return rows
+
+    def _attention_rollup_rows(self, parameters: Dict[str, Any]) -> List[Dict[str, Any]]:
+        rows = []
+        for day, last_hour in self._rollup_days(parameters):
+            for index in range(self.domains):
+                domain = synthetic_domain(index)
+                clicks, hovers, viewable, measured = _attention_daily(domain)
+                rows.append({
+                    "day": day,
+                    "domain": domain,
+                    "publisher_id": str(synthetic_publisher_id(domain)),
+                    "tracker_ad_clicks": clicks,
+                    "tracker_ad_hovers": hovers,
+                    "dv_net_iab_viewable_imp": viewable,
+                    "dv_net_measured_imp": measured,
+                    "last_event_at": last_hour,
+                })
+        return rows
+
+    def _metric_source(self, query: str) -> Optional[Callable[[Dict[str, Any]], List[Dict[str, Any]]]]:
+        """The row generator answering a metric or rollup query, or None if the query is not one of them."""
+        for template, rows in (
+            (FILL_RATE_QUERY, self._fill_rate_rows),
+            (ATTENTION_QUERY, self._attention_rows),
+            (DOMAIN_HISTORY_QUERY, self._domain_history_rows),
+            (BIDSTREAM_ROLLUP_QUERY, self._bidstream_rollup_rows),
+            (ATTENTION_ROLLUP_QUERY, self._attention_rollup_rows),
+        ):
+            if query.startswith(_template(template)):
+                return rows
+        return None
+
+    def rows(self, query: str, parameters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Result rows of a query as dictionaries, as BigQueryClient.execute_query returns them."""
+        source = self._metric_source(query)
+        if source is None:
+            return _to_rows(self._adhoc_table(query))
+        return source(parameters or {})
+
+    def table(self, query: str, parameters: Optional[Dict[str, Any]] = None) -> pyarrow.Table:
+        """Result of a query as an Arrow table."""
+        source = self._metric_source(query)
+        if source is None:
+            return self._adhoc_table(query)
+        return pyarrow.Table.from_pylist(source(parameters or {}))
+
+    def _estimate_bytes(self, query: str, parameters: Optional[Dict[str, Any]]) -> int:
+        """Bytes a query would scan: every hourly row of the synthetic domains in its date range, or the rows an ad-hoc query reads."""
+        if self._metric_source(query) is None:
+            return self._adhoc_table(query).num_rows * ROW_BYTES
+        return self._days(parameters or {}) * 24 * self.domains * self.ad_units * ROW_BYTES
+
+    def _wait(self):
+        if self.latency > 0:
+            time.sleep(self.latency)
+
+    def _job(self, query: str, parameters: Optional[Dict[str, Any]]) -> str:
+        self._wait()
+        job_id = f"fake_{uuid.uuid4().hex}"
+        self._jobs[job_id] = (query, parameters)
+        return job_id
+
+    def _job_query(self, job_id: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+        if job_id not in self._jobs:
+            raise Exception(f"Job {job_id} not found")
+        return self._jobs[job_id]
+
+    # BigQueryClient methods
+
+    def dry_run(self, query: str, parameters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        return {
+            "total_bytes_processed": self._estimate_bytes(query, parameters),
+            "referenced_tables": [
+                f"{self.project_id}.{table}" for table in (BIDSTREAM_TABLE, ATTENTION_TABLE) if table in query
+            ],
+        }
+
+    def run_query(
+        self, query: str, parameters: Optional[Dict[str, Any]] = None, maximum_bytes_billed: Optional[int] = None
+    ) -> QueryResult:
+        job_id = self._job(query, parameters)
+        download_start = perf_counter()
+        rows = self.rows(query, parameters)
+        total_bytes = self._estimate_bytes(query, parameters)
+        return QueryResult(
+            rows,
+            job_id=job_id,
+            total_bytes_processed=total_bytes,
+            total_bytes_billed=total_bytes,
+            pending_seconds=0.0,
+            execution_seconds=self.latency,
+            download_seconds=perf_counter() - download_start
+        )
+
+    def execute_query(
+        self, query: str, parameters: Optional[Dict[str, Any]] = None, maximum_bytes_billed: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        return self.run_query(query, parameters, maximum_bytes_billed).rows
+
+    def iter_query_pages(
+        self,
+        query: str,
+        parameters: Optional[Dict[str, Any]] = None,
+        page_size: Optional[int] = None,
+        maximum_bytes_billed: Optional[int] = None
+    ) -> Iterator[List[Dict[str, Any]]]:
+        self._job(query, parameters)
+        yield from self._pages(query, parameters, page_size)
+
+    def _pages(
+        self, query: str, parameters: Optional[Dict[str, Any]], page_size: Optional[int]
+    ) -> Iterator[List[Dict[str, Any]]]:
+        for batch in self.table(query, parameters).to_batches(max_chunksize=page_size or 10000):
+            yield _to_rows(pyarrow.Table.from_batches([batch]))
+
+    def execute_query_page(
+        self,
+        query: str,
+        parameters: Optional[Dict[str, Any]] = None,
+        page_size: int = 1000,
+        maximum_bytes_billed: Optional[int] = None
+    ) -> Dict[str, Any]:
+        return self._read_page(self._job(query, parameters), None, page_size)
+
+    def get_query_page(
+        self, job_id: str, page_token: Optional[str] = None, page_size: int = 1000, location: Optional[str] = None
+    ) -> Dict[str, Any]:
+        return self._read_page(job_id, page_token, page_size)
+
+    def _read_page(self, job_id: str, page_token: Optional[str], page_size: int) -> Dict[str, Any]:
+        table = self.table(*self._job_query(job_id))
+        offset = int(page_token or 0)
+        next_offset = offset + page_size
+        return {
+            "job_id": job_id,
+            "location": "US",
+            "rows": _to_rows(table.slice(offset, page_size)),
+            "total_rows": table.num_rows,
+            "page_token": str(next_offset) if next_offset < table.num_rows else None,
+        }
+
+    def submit_query(
+        self, query: str, parameters: Optional[Dict[str, Any]] = None, maximum_bytes_billed: Optional[int] = None
+    ) -> Dict[str, Any]:
+        return self.get_job_status(self._job(query, parameters))
+
+    def get_job_status(self, job_id: str, location: Optional[str] = None) -> Dict[str, Any]:
+        total_bytes = self._estimate_bytes(*self._job_query(job_id))
+        return {
+            "job_id": job_id,
+            "location": "US",
+            "state": "DONE",
+            "error": None,
+            "total_bytes_processed": total_bytes,
+            "total_bytes_billed": total_bytes,
+        }
+
+    def iter_job_pages(
+        self, job_id: str, location: Optional[str] = None, page_size: Optional[int] = None
+    ) -> Iterator[List[Dict[str, Any]]]:
+        yield from self._pages(*self._job_query(job_id), page_size)
+
+    def iter_job_record_batches(self, job_id: str, location: Optional[str] = None) -> Iterator[pyarrow.RecordBatch]:
+        yield from self.table(*self._job_query(job_id)).to_batches()
+
+    def get_table_schema(self, dataset_id: str, table_id: str) -> List[Dict[str, Any]]:
+        if f"{dataset_id}.{table_id}" != BIDSTREAM_TABLE:
+            _raise_not_found("Schema retrieval error", f"Table {self.project_id}:{dataset_id}.{table_id}")
+        return [
+            {"name": field.name, "type": _FIELD_TYPES[str(field.type)], "mode": "NULLABLE", "description": None}
+            for field in self.bidstream_table().schema
+        ]
+
+    def list_datasets(self) -> List[str]:
+        return [BIDSTREAM_TABLE.split(".")[0]]
+
+    def list_tables(self, dataset_id: str) -> List[str]:
+        if dataset_id != BIDSTREAM_TABLE.split(".")[0]:
+            _raise_not_found("Table listing error", f"Dataset {self.project_id}:{dataset_id}")
+        return [BIDSTREAM_TABLE.split(".")[1]]
+
+
+def _raise_not_found(context: str, resource: str):
+    """Fail the way BigQueryClient does for a missing resource: the API's NotFound wrapped in a plain Exception."""
+    try:
+        raise google_exceptions.NotFound(f"Not found: {resource}")
+    except google_exceptions.NotFound as e:
+        raise Exception(f"{context}: {str(e)}")
+
+
+_FIELD_TYPES = {"timestamp[us, tz=UTC]": "TIMESTAMP", "string": "STRING", "double": "FLOAT"}
+
+
+class _FakeBigQueryStreamProvider(FakeStreamProvider):
+    """Read sessions over the results of a FakeBigQueryClient query."""
+
+    def __init__(self, client: FakeBigQueryClient, batch_size: int = 1024):
+        super().__init__(batch_size=batch_size)
+        self.client = client
+
+    def table_for(self, query: str, parameters: Optional[Dict[str, Any]] = None) -> pyarrow.Table:
+        self.client._wait()
+        return self.client.table(query, parameters)
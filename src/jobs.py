@@ -0,0 +1,135 @@
+import asyncio
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+
+JOBS_TABLE = """
+    CREATE TABLE IF NOT EXISTS query_jobs (
+        job_id TEXT PRIMARY KEY,
+        location TEXT,
+        query TEXT NOT NULL,
+        state TEXT NOT NULL,
+        error TEXT,
+        total_bytes_processed INTEGER,
+        total_bytes_billed INTEGER,
+        created_at TEXT NOT NULL,
+        updated_at TEXT NOT NULL
+    )
+    """
+
+JOB_COLUMNS = (
+    "job_id", "location", "query", "state", "error",
+    "total_bytes_processed", "total_bytes_billed", "created_at", "updated_at",
+)
+
+STATUS_COLUMNS = ("state", "error", "total_bytes_processed", "total_bytes_billed")
+
+
+class JobNotFoundError(Exception):
+    pass
+
+
+class JobNotReadyError(Exception):
+    pass
+
+
+class JobStore:
+    """Local SQLite record of the query jobs submitted through the job API."""
+
+    def __init__(self, db_path: str = "jobs.db"):
+        self.db_path = db_path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def open(self):
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute(JOBS_TABLE)
+        self._conn.commit()
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def add(self, query: str, status: Dict[str, Any]) -> Dict[str, Any]:
+        now = datetime.now(timezone.utc).isoformat()
+        job = {"query": query, "created_at": now, "updated_at": now}
+        job.update({column: status.get(column) for column in ("job_id", "location") + STATUS_COLUMNS})
+        with self._lock:
+            self._conn.execute(
+                f"INSERT INTO query_jobs ({', '.join(JOB_COLUMNS)}) VALUES ({', '.join('?' * len(JOB_COLUMNS))})",
+                [job[column] for column in JOB_COLUMNS]
+            )
+            self._conn.commit()
+        return job
+
+    def update(self, job_id: str, status: Dict[str, Any]):
+        assignments = ", ".join(f"{column} = ?" for column in STATUS_COLUMNS)
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE query_jobs SET {assignments}, updated_at = ? WHERE job_id = ?",
+                [status.get(column) for column in STATUS_COLUMNS]
+                + [datetime.now(timezone.utc).isoformat(), job_id]
+            )
+            self._conn.commit()
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(JOB_COLUMNS)} FROM query_jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+        return dict(zip(JOB_COLUMNS, row)) if row else None
+
+    def list(self, limit: int = 100) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(JOB_COLUMNS)} FROM query_jobs ORDER BY created_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [dict(zip(JOB_COLUMNS, row)) for row in rows]
+
+
+class JobManager:
+    """Submit, poll and fetch long-running queries without holding a request open.
+
+    ``client`` is anything with the AsyncBigQueryClient job methods
+    (``submit_query``, ``get_job_status``, ``stream_job_pages`` and
+    ``stream_job_record_batches``), so a stub can stand in for BigQuery.
+    """
+
+    def __init__(self, client, store: JobStore):
+        self.client = client
+        self.store = store
+
+    async def submit(
+        self, query: str, parameters: Optional[Dict[str, Any]] = None, maximum_bytes_billed: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Start a query job and record it, returning as soon as BigQuery has accepted it."""
+        status = await self.client.submit_query(query, parameters, maximum_bytes_billed)
+        return await asyncio.to_thread(self.store.add, query, status)
+
+    async def get(self, job_id: str) -> Dict[str, Any]:
+        """Return a tracked job, refreshing its state from BigQuery until it is done."""
+        job = await asyncio.to_thread(self.store.get, job_id)
+        if job is None:
+            raise JobNotFoundError(f"Unknown job: {job_id}")
+        if job["state"] != "DONE":
+            status = await self.client.get_job_status(job_id, job["location"])
+            await asyncio.to_thread(self.store.update, job_id, status)
+            job = await asyncio.to_thread(self.store.get, job_id)
+        return job
+
+    async def list(self, limit: int = 100) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(self.store.list, limit)
+
+    async def results(self, job_id: str, columnar: bool = False, page_size: Optional[int] = None) -> AsyncIterator[Any]:
+        """Return an iterator over a finished job's result pages, or record batches when ``columnar``."""
+        job = await self.get(job_id)
+        if job["state"] != "DONE":
+            raise JobNotReadyError(f"Job {job_id} is not finished (state: {job['state']})")
+        if job["error"]:
+            raise Exception(f"Job {job_id} failed: {job['error']}")
+        if columnar:
+            return self.client.stream_job_record_batches(job_id, job["location"])
+        return self.client.stream_job_pages(job_id, job["location"], page_size)
@@ -1,34 +1,232 @@
 from fastapi import FastAPI, HTTPException, Query
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, generate_latest
 from dotenv import load_dotenv
+from contextlib import asynccontextmanager
+import asyncio
 import os
 import sqlite3
-import json
-from typing import List, Optional
-
-from .bigquery_client import BigQueryClient
+from datetime import date
+from typing import List, Optional, AsyncIterator, Dict, Any, Tuple, Union
+
+from .admission import AdmissionController, AdmissionPool, AdmissionRejected, INTERACTIVE, ADHOC, METADATA, background
+from .bigquery_client import BigQueryClient, QueryResult, TypedParameter
+from .async_bigquery_client import AsyncBigQueryClient
+from .cache import QueryResultCache
+from .catalog import MetadataCatalog
+from .config import get_settings
+from .encoders import NdjsonEncoder, CsvEncoder, ArrowEncoder
 from .models import (
-    QueryRequest, QueryResponse, SchemaResponse, 
+    ResultFormat, QueryRequest, ExportRequest, ExportManifestResponse, DryRunResponse, QueryResponse, QueryPageResponse, JobResponse, JobListResponse, SchemaResponse, 
     DatasetListResponse, TableListResponse, ErrorResponse,
     FillRateResponse, FillRateRecord, AttentionResponse, AttentionRecord,
-    DomainHistoryResponse, DomainHistoryRecord, DomainSiteInfoResponse, DomainSiteInfoRecord
+    DomainHistoryResponse, DomainHistoryRecord, DomainSiteInfoResponse, DomainSiteInfoRecord,
+    CacheStatsResponse, CatalogInvalidateResponse, DomainBatchRequest, DomainHistoryBatchRequest,
+    FillRateBatchResponse, AttentionBatchResponse, DomainHistoryBatchResponse,
+    DashboardSection, DashboardAdUnit, DashboardPublisher, PublisherDashboardResponse,
+    DomainSiteInfoBatchResponse, PublisherSortField, SortOrder, PublisherRankingResponse
+)
+from .exports import Exporter
+from .fake_bigquery import FakeBigQueryClient
+from .metrics import MetricsMiddleware, ResultCacheCollector, configure_timing_log, timed
+from .jobs import JobStore, JobManager, JobNotFoundError, JobNotReadyError
+from .prewarm import CachePrewarmer, DomainTraffic
+from .read_streams import StreamProvider
+from .rollup import RollupStore, RollupManager, RollupSource, BIDSTREAM, ATTENTION
+from .serialization import RecordSchema, json_response
+from .sincera_store import SinceraStore
+from .sincera_snapshot import SinceraSnapshot
+from .queries import (
+    fill_rate_query, attention_query, domain_history_query, date_range,
+    FILL_RATE_DEFAULT_WINDOW, ATTENTION_DEFAULT_WINDOW, DOMAIN_HISTORY_DEFAULT_WINDOW
 )
 
 load_dotenv()
 
-app = FastAPI(
-    title="BigQuery Data Extraction API",
-    description="API for extracting data from BigQuery",
-    version="1.0.0"
+settings = get_settings()
+
+result_cache = None
+if settings.result_cache_enabled:
+    result_cache = QueryResultCache(
+        max_entries=settings.result_cache_max_entries,
+        max_bytes=settings.result_cache_max_bytes,
+        ttl_seconds=settings.result_cache_ttl_seconds,
+        stale_seconds=settings.result_cache_stale_seconds
+    )
+    REGISTRY.register(ResultCacheCollector(result_cache))
+
+if settings.timing_log_enabled:
+    configure_timing_log()
+
+
+def _bigquery_backend() -> Tuple[Any, Optional[StreamProvider]]:
+    """Build the backend selected by BIGQUERY_BACKEND and the stream provider to read it through.
+
+    ``fake`` serves synthetic rows without a GCP project, for local development and benchmarks.
+    """
+    if settings.bigquery_backend == "fake":
+        backend = FakeBigQueryClient(
+            query_rows=settings.fake_bigquery_query_rows,
+            latency=settings.fake_bigquery_latency,
+            domains=settings.fake_bigquery_domains
+        )
+        return backend, backend.stream_provider()
+    if settings.bigquery_backend != "bigquery":
+        raise ValueError(f"Unknown BigQuery backend: {settings.bigquery_backend}")
+    return BigQueryClient(), None
+
+
+admission = AdmissionController(
+    max_concurrent=settings.bigquery_max_concurrent_jobs,
+    pools=[
+        AdmissionPool(
+            INTERACTIVE,
+            max_concurrent=settings.bigquery_interactive_max_concurrent,
+            max_queue=settings.bigquery_interactive_max_queue,
+            max_wait=settings.bigquery_interactive_max_wait
+        ),
+        AdmissionPool(
+            ADHOC,
+            max_concurrent=settings.bigquery_adhoc_max_concurrent,
+            max_queue=settings.bigquery_adhoc_max_queue,
+            max_wait=settings.bigquery_adhoc_max_wait
+        ),
+        AdmissionPool(
+            METADATA,
+            max_concurrent=settings.bigquery_metadata_max_concurrent,
+            max_queue=settings.bigquery_metadata_max_queue,
+            max_wait=settings.bigquery_metadata_max_wait
+        ),
+    ]
 )
 
 try:
-    bq_client = BigQueryClient()
+    backend, stream_provider = _bigquery_backend()
+    bq_client = AsyncBigQueryClient(
+        backend,
+        max_workers=settings.bigquery_max_workers,
+        max_concurrent_jobs=settings.bigquery_max_concurrent_jobs,
+        cache=result_cache,
+        stream_provider=stream_provider,
+        admission=admission,
+        rate_limit_retries=settings.bigquery_rate_limit_retries,
+        rate_limit_backoff=settings.bigquery_rate_limit_backoff,
+        rate_limit_max_backoff=settings.bigquery_rate_limit_max_backoff
+    )
 except Exception as e:
     print(f"Failed to initialize BigQuery client: {e}")
     bq_client = None
 
 
+sincera_store = SinceraStore(
+    db_path=settings.sincera_db_path,
+    pool_size=settings.sincera_pool_size,
+    mmap_size=settings.sincera_mmap_size
+)
+
+sincera_snapshot = None
+if settings.sincera_snapshot_enabled:
+    sincera_snapshot = SinceraSnapshot(
+        db_path=settings.sincera_db_path,
+        check_interval=settings.sincera_snapshot_check_interval
+    )
+
+job_store = JobStore(settings.job_store_path)
+job_manager = JobManager(bq_client, job_store) if bq_client else None
+
+catalog = None
+if bq_client:
+    catalog = MetadataCatalog(
+        bq_client,
+        refresh_interval=settings.metadata_refresh_interval,
+        max_age=settings.metadata_max_age
+    )
+
+exporter = None
+if bq_client:
+    exporter = Exporter(bq_client, export_dir=settings.export_dir, max_streams=settings.export_max_streams)
+
+rollup_store = None
+rollup_manager = None
+if settings.rollup_enabled:
+    rollup_store = RollupStore(settings.rollup_db_path)
+    if bq_client:
+        rollup_manager = RollupManager(
+            bq_client,
+            rollup_store,
+            backfill_days=settings.rollup_backfill_days,
+            lookback_days=settings.rollup_lookback_days,
+            page_size=settings.query_stream_page_size
+        )
+
+domain_traffic = None
+prewarmer = None
+if settings.prewarm_enabled and result_cache and bq_client:
+    domain_traffic = DomainTraffic(half_life=settings.prewarm_traffic_half_life)
+    prewarmer = CachePrewarmer(
+        bq_client,
+        domain_traffic,
+        store=sincera_store,
+        rollup_store=rollup_store,
+        top_domains=settings.prewarm_top_domains,
+        batch_size=settings.prewarm_batch_size,
+        interval=settings.prewarm_interval,
+        lead_seconds=settings.prewarm_lead_seconds,
+        partition_delay=settings.prewarm_partition_delay
+    )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    sincera_store.open()
+    job_store.open()
+    background_tasks = []
+    if sincera_snapshot is not None:
+        try:
+            sincera_snapshot.load()
+        except (sqlite3.Error, OSError) as e:
+            print(f"Failed to load Sincera snapshot, serving from sincera_data.db until it loads: {e}")
+        background_tasks.append(asyncio.create_task(sincera_snapshot.watch()))
+    if rollup_store is not None:
+        rollup_store.open()
+    # Refreshes wait behind request traffic for BigQuery slots
+    with background():
+        if catalog is not None:
+            background_tasks.append(asyncio.create_task(catalog.run()))
+        if rollup_manager is not None:
+            background_tasks.append(asyncio.create_task(rollup_manager.run(settings.rollup_refresh_interval)))
+        if prewarmer is not None:
+            background_tasks.append(asyncio.create_task(prewarmer.run()))
+    yield
+    for task in background_tasks:
+        task.cancel()
+    sincera_store.close()
+    job_store.close()
+    if rollup_store is not None:
+        rollup_store.close()
+    if bq_client:
+        bq_client.shutdown()
+
+
+app = FastAPI(
+    title="BigQuery Data Extraction API",
+    description="API for extracting data from BigQuery",
+    version="1.0.0",
+    lifespan=lifespan
+)
+
+app.add_middleware(MetricsMiddleware)
+
+
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected_handler(request, exc):
+    return JSONResponse(
+        status_code=429,
+        content=ErrorResponse(error="Too many requests", detail=str(exc)).dict(),
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+
 @app.exception_handler(Exception)
 async def general_exception_handler(request, exc):
     return JSONResponse(
@@ -42,250 +240,556 @@ async def root():
     return {"message": "BigQuery Data Extraction API", "status": "running"}
 
 
-@app.post("/query", response_model=QueryResponse)
-async def execute_query(request: QueryRequest):
-    """Execute a BigQuery SQL query"""
+STREAMING_MEDIA_TYPES = {
+    ResultFormat.ndjson: "application/x-ndjson",
+    ResultFormat.csv: "text/csv",
+    ResultFormat.arrow: "application/vnd.apache.arrow.stream",
+    ResultFormat.parquet: "application/vnd.apache.parquet",
+}
+
+
+def _streaming_encoder(format: ResultFormat):
+    if format == ResultFormat.csv:
+        return CsvEncoder()
+    if format == ResultFormat.ndjson:
+        return NdjsonEncoder()
+    return ArrowEncoder(format.value)
+
+
+async def _encode_stream(first_chunk: Any, chunks: AsyncIterator[Any], encoder) -> AsyncIterator[bytes]:
+    """Encode result pages or record batches as they arrive, off the event loop."""
+    try:
+        chunk = first_chunk
+        while chunk is not None:
+            with timed("encoding"):
+                encoded = await asyncio.to_thread(encoder.encode, chunk)
+            yield encoded
+            chunk = await anext(chunks, None)
+        with timed("encoding"):
+            encoded = await asyncio.to_thread(encoder.close)
+        yield encoded
+    finally:
+        await chunks.aclose()
+
+
+def _bad_request(e: Exception) -> HTTPException:
+    """Report a failed BigQuery call as a 400, or as a 429 with Retry-After when admission control shed it"""
+    if isinstance(e, AdmissionRejected):
+        return HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    return HTTPException(status_code=400, detail=str(e))
+
+
+def _query_parameters(request: QueryRequest) -> Optional[Dict[str, Any]]:
+    """Attach the explicitly requested BigQuery types to an ad-hoc query's parameters"""
+    if not request.parameters or not request.parameter_types:
+        return request.parameters
+    return {
+        name: TypedParameter(request.parameter_types[name], value) if name in request.parameter_types else value
+        for name, value in request.parameters.items()
+    }
+
+
+def _requested_budget(request: QueryRequest) -> Optional[int]:
+    """Resolve an ad-hoc query's bytes budget; a request may lower the configured maximum but not raise it"""
+    if request.maximum_bytes_billed is None:
+        return settings.maximum_bytes_billed
+    if settings.maximum_bytes_billed is not None and request.maximum_bytes_billed > settings.maximum_bytes_billed:
+        raise HTTPException(
+            status_code=400,
+            detail=(
+                f"maximum_bytes_billed of {request.maximum_bytes_billed} bytes is over "
+                f"the configured maximum of {settings.maximum_bytes_billed} bytes"
+            )
+        )
+    return request.maximum_bytes_billed
+
+
+async def _bytes_budget(request: QueryRequest) -> Optional[int]:
+    """Resolve the bytes budget for an ad-hoc query and reject it up front if its dry-run estimate is over"""
+    budget = _requested_budget(request)
+    if budget is None or not settings.query_preflight_enabled:
+        return budget
+    
+    try:
+        estimate = await bq_client.dry_run(request.query, _query_parameters(request))
+    except Exception as e:
+        raise _bad_request(e)
+    if estimate["total_bytes_processed"] > budget:
+        raise HTTPException(
+            status_code=400,
+            detail=(
+                f"Query would process {estimate['total_bytes_processed']} bytes, "
+                f"over the maximum_bytes_billed budget of {budget} bytes"
+            )
+        )
+    return budget
+
+
+@app.post("/query/dry-run", response_model=DryRunResponse)
+async def dry_run_query(request: QueryRequest):
+    """Estimate the bytes a query would process and the tables it references, without running it"""
     if not bq_client:
         raise HTTPException(status_code=500, detail="BigQuery client not initialized")
     
+    budget = _requested_budget(request)
     try:
-        results = bq_client.execute_query(request.query, request.parameters)
-        return QueryResponse(data=results, row_count=len(results))
+        estimate = await bq_client.dry_run(request.query, _query_parameters(request))
+        return DryRunResponse(
+            **estimate,
+            maximum_bytes_billed=budget,
+            within_budget=budget is None or estimate["total_bytes_processed"] <= budget
+        )
     except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
+        raise _bad_request(e)
+
+
+@app.post("/query", response_model=Union[QueryResponse, QueryPageResponse])
+async def execute_query(
+    request: QueryRequest,
+    format: ResultFormat = ResultFormat.json,
+    page_size: Optional[int] = Query(None, ge=1, le=settings.query_max_page_size),
+    ordered: bool = True
+):
+    """Execute a BigQuery SQL query, optionally streaming the rows as NDJSON, CSV, Arrow IPC or Parquet.
+    
+    With ``page_size`` only the first page is returned, together with the job ID
+    and a page token for fetching the rest from ``/query/{job_id}/pages``.
+    With ``ordered=false`` Arrow IPC and Parquet results of a query without
+    ORDER BY are read over several parallel streams whose batches interleave;
+    otherwise they come from a single stream in the query's order.
+    """
+    if not bq_client:
+        raise HTTPException(status_code=500, detail="BigQuery client not initialized")
+    
+    budget = await _bytes_budget(request)
+    
+    if page_size is not None and format == ResultFormat.json:
+        try:
+            page = await bq_client.execute_query_page(request.query, _query_parameters(request), page_size, budget)
+            return _query_page_response(page)
+        except Exception as e:
+            raise _bad_request(e)
+    
+    if format != ResultFormat.json:
+        if format in (ResultFormat.arrow, ResultFormat.parquet):
+            chunks = bq_client.stream_parallel_record_batches(
+                request.query, _query_parameters(request), budget, settings.read_max_streams, ordered
+            )
+        else:
+            chunks = bq_client.stream_query(
+                request.query, _query_parameters(request), settings.query_stream_page_size, budget
+            )
+        # Fetch the first chunk before responding so query errors still surface as a 400
+        try:
+            first_chunk = await anext(chunks, None)
+        except Exception as e:
+            raise _bad_request(e)
+        return StreamingResponse(
+            _encode_stream(first_chunk, chunks, _streaming_encoder(format)),
+            media_type=STREAMING_MEDIA_TYPES[format]
+        )
+    
+    try:
+        results = await bq_client.execute_query(
+            request.query, _query_parameters(request), maximum_bytes_billed=budget
+        )
+        return json_response({"data": results, "row_count": len(results)})
+    except Exception as e:
+        raise _bad_request(e)
+
+
+def _query_page_response(page: Dict[str, Any]) -> Response:
+    return json_response({
+        "data": page["rows"],
+        "row_count": len(page["rows"]),
+        "total_rows": page["total_rows"],
+        "job_id": page["job_id"],
+        "location": page["location"],
+        "page_token": page["page_token"],
+    })
+
+
+@app.get("/query/{job_id}/pages", response_model=QueryPageResponse)
+async def get_query_page(
+    job_id: str,
+    page_token: Optional[str] = None,
+    page_size: int = Query(1000, ge=1, le=settings.query_max_page_size),
+    location: Optional[str] = None
+):
+    """Fetch a page of a finished query's results without re-running the query"""
+    if not bq_client:
+        raise HTTPException(status_code=500, detail="BigQuery client not initialized")
+    
+    try:
+        page = await bq_client.get_query_page(job_id, page_token, page_size, location)
+        return _query_page_response(page)
+    except Exception as e:
+        raise _bad_request(e)
+
+
+@app.post("/jobs", response_model=JobResponse, status_code=202)
+async def submit_job(request: QueryRequest):
+    """Start a long-running query and return its job ID without waiting for it to finish"""
+    if not job_manager:
+        raise HTTPException(status_code=500, detail="BigQuery client not initialized")
+    
+    budget = await _bytes_budget(request)
+    try:
+        return JobResponse(**await job_manager.submit(request.query, _query_parameters(request), budget))
+    except Exception as e:
+        raise _bad_request(e)
+
+
+@app.get("/jobs", response_model=JobListResponse)
+async def list_jobs(limit: int = Query(100, ge=1, le=1000)):
+    """List the most recently submitted jobs"""
+    if not job_manager:
+        raise HTTPException(status_code=500, detail="BigQuery client not initialized")
+    
+    jobs = await job_manager.list(limit)
+    return JobListResponse(jobs=[JobResponse(**job) for job in jobs])
+
+
+@app.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str):
+    """Get the state and bytes processed of a submitted job"""
+    if not job_manager:
+        raise HTTPException(status_code=500, detail="BigQuery client not initialized")
+    
+    try:
+        return JobResponse(**await job_manager.get(job_id))
+    except JobNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise _bad_request(e)
+
+
+@app.get("/jobs/{job_id}/results")
+async def get_job_results(job_id: str, format: ResultFormat = ResultFormat.ndjson):
+    """Stream the results of a finished job as NDJSON, CSV, Arrow IPC or Parquet"""
+    if not job_manager:
+        raise HTTPException(status_code=500, detail="BigQuery client not initialized")
+    if format == ResultFormat.json:
+        raise HTTPException(status_code=400, detail="Job results are streamed; use ndjson, csv, arrow or parquet")
+    
+    columnar = format in (ResultFormat.arrow, ResultFormat.parquet)
+    try:
+        chunks = await job_manager.results(job_id, columnar, settings.query_stream_page_size)
+        first_chunk = await anext(chunks, None)
+    except JobNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except JobNotReadyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise _bad_request(e)
+    return StreamingResponse(
+        _encode_stream(first_chunk, chunks, _streaming_encoder(format)),
+        media_type=STREAMING_MEDIA_TYPES[format]
+    )
+
+
+@app.post("/exports", response_model=ExportManifestResponse)
+async def export_query(request: ExportRequest):
+    """Write a query's results to sharded Parquet files, downloading several read streams in parallel.
+    
+    Returns the manifest of shard paths, row counts and sha256 checksums once
+    every shard has been written.
+    """
+    if not exporter:
+        raise HTTPException(status_code=500, detail="BigQuery client not initialized")
+    if request.max_streams is not None and request.max_streams < 1:
+        raise HTTPException(status_code=400, detail="max_streams must be at least 1")
+    
+    budget = await _bytes_budget(request)
+    try:
+        return ExportManifestResponse(
+            **await exporter.export(request.query, _query_parameters(request), budget, request.max_streams)
+        )
+    except Exception as e:
+        raise _bad_request(e)
 
 
 @app.get("/datasets", response_model=DatasetListResponse)
 async def list_datasets():
     """List all datasets in the project"""
-    if not bq_client:
+    if not catalog:
         raise HTTPException(status_code=500, detail="BigQuery client not initialized")
     
     try:
-        datasets = bq_client.list_datasets()
+        datasets = await catalog.datasets()
         return DatasetListResponse(datasets=datasets)
     except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
+        raise _bad_request(e)
 
 
 @app.get("/datasets/{dataset_id}/tables", response_model=TableListResponse)
 async def list_tables(dataset_id: str):
     """List all tables in a dataset"""
-    if not bq_client:
+    if not catalog:
         raise HTTPException(status_code=500, detail="BigQuery client not initialized")
     
     try:
-        tables = bq_client.list_tables(dataset_id)
+        tables = await catalog.tables(dataset_id)
         return TableListResponse(tables=tables)
     except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
+        raise _bad_request(e)
 
 
 @app.get("/datasets/{dataset_id}/tables/{table_id}/schema", response_model=SchemaResponse)
 async def get_table_schema(dataset_id: str, table_id: str):
     """Get the schema of a specific table"""
-    if not bq_client:
+    if not catalog:
         raise HTTPException(status_code=500, detail="BigQuery client not initialized")
     
     try:
-        schema = bq_client.get_table_schema(dataset_id, table_id)
+        schema = await catalog.schema(dataset_id, table_id)
         return SchemaResponse(fields=schema)
     except Exception as e:
+        raise _bad_request(e)
+
+
+@app.post("/catalog/invalidate", response_model=CatalogInvalidateResponse)
+async def invalidate_catalog(dataset_id: Optional[str] = None, table_id: Optional[str] = None):
+    """Drop cached metadata for a table, a dataset or, with no parameters, the whole catalog"""
+    if not catalog:
+        raise HTTPException(status_code=500, detail="BigQuery client not initialized")
+    if table_id is not None and dataset_id is None:
+        raise HTTPException(status_code=400, detail="table_id requires dataset_id")
+    
+    return CatalogInvalidateResponse(invalidated=catalog.invalidate(dataset_id, table_id))
+
+
+def _group_by_domain(domains: List[str], records: List[Any]) -> Dict[str, List[Any]]:
+    """Group records under each requested domain, keeping domains without rows as empty lists."""
+    grouped = {domain: [] for domain in domains}
+    for record in records:
+        grouped.setdefault(record["domain"], []).append(record)
+    return grouped
+
+
+def _validate_batch(domains: List[str]) -> List[str]:
+    """Deduplicate batch domains and enforce the configured batch size."""
+    domains = list(dict.fromkeys(domains))
+    if not domains:
+        raise HTTPException(status_code=400, detail="At least one domain is required")
+    if len(domains) > settings.batch_max_domains:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.batch_max_domains} domains can be requested at once"
+        )
+    return domains
+
+
+def _metric_window(
+    start_date: Optional[date], end_date: Optional[date], default_window: Tuple[int, int]
+) -> Tuple[date, date]:
+    """Resolve a metric date range and enforce the configured maximum window."""
+    try:
+        start_date, end_date = date_range(start_date, end_date, default_window)
+    except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    if (end_date - start_date).days + 1 > settings.metric_max_window_days:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Date ranges can span at most {settings.metric_max_window_days} days"
+        )
+    return start_date, end_date
+
+
+FILL_RATE_SCHEMA = RecordSchema(FillRateRecord)
+ATTENTION_SCHEMA = RecordSchema(AttentionRecord)
+DOMAIN_HISTORY_SCHEMA = RecordSchema(DomainHistoryRecord)
+
+
+def _record_traffic(domains: Union[str, List[str]]):
+    if domain_traffic is not None:
+        domain_traffic.record(domains)
+
+
+async def _rollup_covers(source: RollupSource, start_date: date, end_date: date) -> bool:
+    return rollup_store is not None and await asyncio.to_thread(rollup_store.covers, source, start_date, end_date)
+
+
+async def _fill_rate_records(
+    domains: Union[str, List[str]], start_date: date, end_date: date
+) -> Tuple[List[Dict[str, Any]], QueryResult]:
+    _record_traffic(domains)
+    if await _rollup_covers(BIDSTREAM, start_date, end_date):
+        records = await asyncio.to_thread(rollup_store.fill_rate, domains, start_date, end_date)
+        return records, QueryResult(records, total_bytes_processed=0, total_bytes_billed=0)
+    query, parameters = fill_rate_query(domains, start_date, end_date)
+    result = await bq_client.run_query(query, parameters, use_cache=True, pool=INTERACTIVE)
+    return FILL_RATE_SCHEMA.rows(result.rows), result
+
+
+async def _attention_records(
+    domains: Union[str, List[str]], start_date: date, end_date: date
+) -> Tuple[List[Dict[str, Any]], QueryResult]:
+    _record_traffic(domains)
+    if await _rollup_covers(ATTENTION, start_date, end_date):
+        records = await asyncio.to_thread(rollup_store.attention, domains, start_date, end_date)
+        return records, QueryResult(records, total_bytes_processed=0, total_bytes_billed=0)
+    query, parameters = attention_query(domains, start_date, end_date)
+    result = await bq_client.run_query(query, parameters, use_cache=True, pool=INTERACTIVE)
+    return ATTENTION_SCHEMA.rows(result.rows), result
+
+
+async def _domain_history_records(
+    domains: Union[str, List[str]], start_date: date, end_date: date, ad_unit_ids: Optional[List[str]] = None
+) -> Tuple[List[Dict[str, Any]], QueryResult]:
+    _record_traffic(domains)
+    if await _rollup_covers(BIDSTREAM, start_date, end_date):
+        records = await asyncio.to_thread(rollup_store.domain_history, domains, start_date, end_date, ad_unit_ids)
+        return records, QueryResult(records, total_bytes_processed=0, total_bytes_billed=0)
+    query, parameters = domain_history_query(domains, start_date, end_date, ad_unit_ids)
+    result = await bq_client.run_query(query, parameters, use_cache=True, pool=INTERACTIVE)
+    return DOMAIN_HISTORY_SCHEMA.rows(result.rows), result
 
 
 @app.get("/fill-rate", response_model=FillRateResponse)
-async def get_fill_rate(domain: str):
-    """Get fill rate data from yesterday for a specific domain"""
+async def get_fill_rate(domain: str, start_date: Optional[date] = None, end_date: Optional[date] = None):
+    """Get fill rate data for a specific domain over a date range (default: the day 30 days ago)"""
     if not bq_client:
         raise HTTPException(status_code=500, detail="BigQuery client not initialized")
     
-    fill_rate_query = """
-    SELECT
-        publisher_id,
-        domain,
-        ad_unit_id_feature as ad_unit_id,
-        sum(ad_requests_est) as ad_requests_est,
-        sum(impressions_est) as impressions_est,
-        safe_divide(sum(impressions_est),sum(ad_requests_est)) as fill_rate
-    FROM ozone.fct_smart_bidstream__root
-    WHERE date(date_hour) = current_date - 30
-        AND domain = @domain
-    GROUP BY ALL
-    HAVING ad_requests_est > 1000000
-    ORDER BY ad_requests_est DESC
-    """
+    start_date, end_date = _metric_window(start_date, end_date, FILL_RATE_DEFAULT_WINDOW)
+    try:
+        fill_rate_records, result = await _fill_rate_records(domain, start_date, end_date)
+        return json_response({
+            "data": fill_rate_records,
+            "row_count": len(fill_rate_records),
+            "start_date": start_date,
+            "end_date": end_date,
+            "bytes_processed": result.total_bytes_processed,
+        })
+    except Exception as e:
+        raise _bad_request(e)
+
+
+@app.post("/fill-rate/batch", response_model=FillRateBatchResponse)
+async def get_fill_rate_batch(request: DomainBatchRequest):
+    """Get fill rate data for many domains with a single BigQuery job"""
+    if not bq_client:
+        raise HTTPException(status_code=500, detail="BigQuery client not initialized")
     
+    domains = _validate_batch(request.domains)
+    start_date, end_date = _metric_window(request.start_date, request.end_date, FILL_RATE_DEFAULT_WINDOW)
     try:
-        results = bq_client.execute_query(fill_rate_query, {"domain": domain})
-        fill_rate_records = [FillRateRecord(**record) for record in results]
-        return FillRateResponse(data=fill_rate_records, row_count=len(fill_rate_records))
+        fill_rate_records, result = await _fill_rate_records(domains, start_date, end_date)
+        return json_response({
+            "data": _group_by_domain(domains, fill_rate_records),
+            "row_count": len(fill_rate_records),
+            "start_date": start_date,
+            "end_date": end_date,
+            "bytes_processed": result.total_bytes_processed,
+        })
     except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
+        raise _bad_request(e)
 
 
 @app.get("/attention", response_model=AttentionResponse)
-async def get_attention_metrics(domain: str):
-    """Get attention metrics from the last 30 days for a specific domain"""
+async def get_attention_metrics(domain: str, start_date: Optional[date] = None, end_date: Optional[date] = None):
+    """Get attention metrics for a specific domain over a date range (default: the last 7 days)"""
     if not bq_client:
         raise HTTPException(status_code=500, detail="BigQuery client not initialized")
     
-    attention_query = """
-    SELECT 
-        dv_delivery_domain as domain, 
-        publisher_id, 
-        sum(tracker_ad_clicks) as tracker_ad_clicks,
-        sum(tracker_ad_hovers) as tracker_ad_hovers,
-        sum(dv_net_iab_viewable_imp) as vie_imps,
-        safe_divide(
-          sum(dv_net_iab_viewable_imp),
-          sum(dv_net_measured_imp)
-        ) as vie_pct,
-        safe_divide(
-          sum(tracker_ad_clicks),
-          sum(dv_net_measured_imp)
-        ) as click_pct,
-        safe_divide(
-          sum(tracker_ad_hovers),
-          sum(dv_net_measured_imp)
-        ) as hover_pct,
-    FROM `ozpr-data-engineering-prod.prod_de_attention_metrics.fct_attention_metrics__beeswax`
-    WHERE date(ts) >= current_date - 7
-        AND dv_delivery_domain is not null
-        AND dv_delivery_domain = @domain
-    GROUP BY ALL
-    """
+    start_date, end_date = _metric_window(start_date, end_date, ATTENTION_DEFAULT_WINDOW)
+    try:
+        attention_records, result = await _attention_records(domain, start_date, end_date)
+        return json_response({
+            "data": attention_records,
+            "row_count": len(attention_records),
+            "start_date": start_date,
+            "end_date": end_date,
+            "bytes_processed": result.total_bytes_processed,
+        })
+    except Exception as e:
+        raise _bad_request(e)
+
+
+@app.post("/attention/batch", response_model=AttentionBatchResponse)
+async def get_attention_metrics_batch(request: DomainBatchRequest):
+    """Get attention metrics for many domains with a single BigQuery job"""
+    if not bq_client:
+        raise HTTPException(status_code=500, detail="BigQuery client not initialized")
     
+    domains = _validate_batch(request.domains)
+    start_date, end_date = _metric_window(request.start_date, request.end_date, ATTENTION_DEFAULT_WINDOW)
     try:
-        results = bq_client.execute_query(attention_query, {"domain": domain})
-        attention_records = [AttentionRecord(**record) for record in results]
-        return AttentionResponse(data=attention_records, row_count=len(attention_records))
+        attention_records, result = await _attention_records(domains, start_date, end_date)
+        return json_response({
+            "data": _group_by_domain(domains, attention_records),
+            "row_count": len(attention_records),
+            "start_date": start_date,
+            "end_date": end_date,
+            "bytes_processed": result.total_bytes_processed,
+        })
     except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
+        raise _bad_request(e)
 
 
 @app.get("/domain-history", response_model=DomainHistoryResponse)
-async def get_domain_history(domain: str, ad_unit_ids: Optional[List[str]] = Query(None)):
-    """Get domain history data from yesterday for a specific domain, optionally filtered by ad unit IDs"""
+async def get_domain_history(
+    domain: str,
+    ad_unit_ids: Optional[List[str]] = Query(None),
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None
+):
+    """Get domain history data for a specific domain over a date range (default: yesterday), optionally filtered by ad unit IDs"""
     if not bq_client:
         raise HTTPException(status_code=500, detail="BigQuery client not initialized")
     
-    # Build the base query
-    domain_history_query = """
-    select
-      publisher_id,
-      domain,
-      ad_unit_id_feature as ad_unit_id,
-      sum(ad_requests_est) as ad_requests_est,
-      sum(ad_rev_oz_net_usd_est) as rev_oz_net_usd,
-
-      safe_divide(
-        sum(ad_bids),
-        sum(ad_requests_est)
-      ) as bid_rate,
-
-      safe_divide(
-        sum(ad_rev_bid_net_usd),
-        sum(ad_bids)
-      ) *1000 as bid_cpm,
-
-      safe_divide(
-        sum(impressions_est),
-        sum(ad_bids)
-      ) as win_rate,
-
-      safe_divide(
-        sum(impressions_est),
-        sum(ad_requests_est)
-      ) as fill_rate,
-
-      safe_divide(
-        sum(ad_rev_oz_net_usd_est),
-        sum(impressions_est)
-      ) *1000 as impression_cpm
-
-    from ozone.fct_smart_bidstream__root
-    where date(date_hour) = current_date - 1
-    and domain = @domain
-    """
-    
-    # Add ad_unit_ids filter if provided
-    parameters = {"domain": domain}
-    if ad_unit_ids:
-        placeholders = ', '.join([f'@ad_unit_id_{i}' for i in range(len(ad_unit_ids))])
-        domain_history_query += f" and ad_unit_id_feature in ({placeholders})"
-        for i, ad_unit_id in enumerate(ad_unit_ids):
-            parameters[f'ad_unit_id_{i}'] = ad_unit_id
-    
-    domain_history_query += """
-    group by all
-    having ad_requests_est >= 10000    
-    """
+    start_date, end_date = _metric_window(start_date, end_date, DOMAIN_HISTORY_DEFAULT_WINDOW)
+    try:
+        domain_history_records, result = await _domain_history_records(domain, start_date, end_date, ad_unit_ids)
+        return json_response({
+            "data": domain_history_records,
+            "row_count": len(domain_history_records),
+            "start_date": start_date,
+            "end_date": end_date,
+            "bytes_processed": result.total_bytes_processed,
+        })
+    except Exception as e:
+        raise _bad_request(e)
+
+
+@app.post("/domain-history/batch", response_model=DomainHistoryBatchResponse)
+async def get_domain_history_batch(request: DomainHistoryBatchRequest):
+    """Get domain history data for many domains with a single BigQuery job"""
+    if not bq_client:
+        raise HTTPException(status_code=500, detail="BigQuery client not initialized")
     
+    domains = _validate_batch(request.domains)
+    start_date, end_date = _metric_window(request.start_date, request.end_date, DOMAIN_HISTORY_DEFAULT_WINDOW)
     try:
-        results = bq_client.execute_query(domain_history_query, parameters)
-        domain_history_records = [DomainHistoryRecord(**record) for record in results]
-        return DomainHistoryResponse(data=domain_history_records, row_count=len(domain_history_records))
+        domain_history_records, result = await _domain_history_records(
+            domains, start_date, end_date, request.ad_unit_ids
+        )
+        return json_response({
+            "data": _group_by_domain(domains, domain_history_records),
+            "row_count": len(domain_history_records),
+            "start_date": start_date,
+            "end_date": end_date,
+            "bytes_processed": result.total_bytes_processed,
+        })
     except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
+        raise _bad_request(e)
+
+
+async def _get_domain_site_info(domain: str) -> Optional[DomainSiteInfoRecord]:
+    """Look up a domain in the in-memory snapshot when enabled, otherwise in sincera_data.db"""
+    if sincera_snapshot is not None and sincera_snapshot.loaded:
+        return sincera_snapshot.get_latest(domain)
+    return await asyncio.to_thread(sincera_store.get_latest, domain)
 
 
 @app.get("/domain-site-info", response_model=DomainSiteInfoResponse)
 async def get_domain_site_info(domain: str):
     """Get domain site information from sincera_data.db"""
-    db_path = "sincera_data.db"
-    
     try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
+        record = await _get_domain_site_info(domain)
         
-        query = """
-        SELECT domain, publisher_id, name, status, primary_supply_type, pub_description,
-               categories, slug, avg_ads_to_content_ratio, avg_ads_in_view, 
-               avg_ad_refresh, total_unique_gpids, id_absorption_rate, avg_page_weight,
-               avg_cpu, total_supply_paths, reseller_count, owner_domain, 
-               created_at, updated_at
-        FROM publisher_data 
-        WHERE domain = ?
-        ORDER BY created_at DESC 
-        LIMIT 1
-        """
-        
-        cursor.execute(query, (domain,))
-        result = cursor.fetchone()
-        conn.close()
-        
-        if result:
-            categories_list = None
-            if result[6]:  # categories field
-                try:
-                    categories_list = json.loads(result[6])
-                except json.JSONDecodeError:
-                    categories_list = [result[6]]  # fallback to single item list
-            
-            record = DomainSiteInfoRecord(
-                domain=result[0],
-                publisher_id=result[1],
-                name=result[2],
-                status=result[3],
-                primary_supply_type=result[4],
-                pub_description=result[5],
-                categories=categories_list,
-                slug=result[7],
-                avg_ads_to_content_ratio=result[8],
-                avg_ads_in_view=result[9],
-                avg_ad_refresh=result[10],
-                total_unique_gpids=result[11],
-                id_absorption_rate=result[12],
-                avg_page_weight=result[13],
-                avg_cpu=result[14],
-                total_supply_paths=result[15],
-                reseller_count=result[16],
-                owner_domain=result[17],
-                created_at=result[18],
-                updated_at=result[19]
-            )
-            
+        if record:
             return DomainSiteInfoResponse(
                 data=record,
                 found=True,
@@ -304,14 +808,200 @@ async def get_domain_site_info(domain: str):
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 
+@app.post("/domain-site-info/batch", response_model=DomainSiteInfoBatchResponse)
+async def get_domain_site_info_batch(request: DomainBatchRequest):
+    """Get domain site information for many domains with a single lookup"""
+    domains = _validate_batch(request.domains)
+    
+    try:
+        if sincera_snapshot is not None and sincera_snapshot.loaded:
+            records = sincera_snapshot.get_many(domains)
+        else:
+            records = await asyncio.to_thread(sincera_store.get_many, domains)
+        missing = [domain for domain, record in records.items() if record is None]
+        return DomainSiteInfoBatchResponse(data=records, found=len(records) - len(missing), missing=missing)
+    except sqlite3.Error as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+
+@app.get("/publishers", response_model=PublisherRankingResponse)
+async def rank_publishers(
+    sort_by: PublisherSortField = PublisherSortField.id_absorption_rate,
+    order: SortOrder = SortOrder.desc,
+    status: Optional[str] = None,
+    primary_supply_type: Optional[str] = None,
+    owner_domain: Optional[str] = None,
+    min_value: Optional[float] = None,
+    max_value: Optional[float] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None
+):
+    """Rank the latest publisher_data rows by a metric, with optional filters and keyset pagination.
+    
+    ``min_value``/``max_value`` bound the metric being sorted on. Pass the
+    returned ``next_cursor`` to fetch the following page.
+    """
+    filters = {
+        column: value
+        for column, value in (
+            ("status", status),
+            ("primary_supply_type", primary_supply_type),
+            ("owner_domain", owner_domain),
+        )
+        if value is not None
+    }
+    
+    try:
+        records, next_cursor = await asyncio.to_thread(
+            sincera_store.rank_publishers,
+            sort_by.value,
+            order == SortOrder.desc,
+            filters,
+            min_value,
+            max_value,
+            limit,
+            cursor
+        )
+        return PublisherRankingResponse(
+            data=records, row_count=len(records), sort_by=sort_by, next_cursor=next_cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except sqlite3.Error as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+
+def _section_status(result: Any) -> DashboardSection:
+    if isinstance(result, BaseException):
+        return DashboardSection(status="error", error=str(result))
+    if isinstance(result, list):
+        return DashboardSection(status="ok", row_count=len(result))
+    return DashboardSection(status="ok", row_count=1 if result else 0)
+
+
+def _merge_dashboard_publishers(
+    fill_rate_records: List[Dict[str, Any]],
+    attention_records: List[Dict[str, Any]],
+    domain_history_records: List[Dict[str, Any]]
+) -> List[DashboardPublisher]:
+    """Merge metric rows per publisher_id, and per ad_unit_id within each publisher"""
+    publishers: Dict[Optional[str], DashboardPublisher] = {}
+    ad_units: Dict[tuple, DashboardAdUnit] = {}
+    
+    def publisher(publisher_id: Optional[str]) -> DashboardPublisher:
+        if publisher_id not in publishers:
+            publishers[publisher_id] = DashboardPublisher(publisher_id=publisher_id)
+        return publishers[publisher_id]
+    
+    def ad_unit(publisher_id: Optional[str], ad_unit_id: Optional[str]) -> DashboardAdUnit:
+        key = (publisher_id, ad_unit_id)
+        if key not in ad_units:
+            ad_units[key] = DashboardAdUnit(ad_unit_id=ad_unit_id)
+            publisher(publisher_id).ad_units.append(ad_units[key])
+        return ad_units[key]
+    
+    # Records were already checked against their schema, so they are constructed without revalidation
+    for record in fill_rate_records:
+        ad_unit(record["publisher_id"], record["ad_unit_id"]).fill_rate = FillRateRecord.model_construct(**record)
+    for record in domain_history_records:
+        ad_unit(record["publisher_id"], record["ad_unit_id"]).domain_history = (
+            DomainHistoryRecord.model_construct(**record)
+        )
+    for record in attention_records:
+        publisher(record["publisher_id"]).attention.append(AttentionRecord.model_construct(**record))
+    
+    return list(publishers.values())
+
+
+async def _bigquery_unavailable():
+    raise Exception("BigQuery client not initialized")
+
+
+@app.get("/publisher-dashboard", response_model=PublisherDashboardResponse)
+async def get_publisher_dashboard(
+    domain: str,
+    ad_unit_ids: Optional[List[str]] = Query(None),
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None
+):
+    """Get fill rate, attention, domain history and site info for a domain in one call.
+    
+    All four sources are fetched concurrently; a failing source is reported in
+    its section status instead of failing the whole response. A missing start
+    or end date is filled in from each metric's own default window.
+    """
+    fill_rate_window = _metric_window(start_date, end_date, FILL_RATE_DEFAULT_WINDOW)
+    attention_window = _metric_window(start_date, end_date, ATTENTION_DEFAULT_WINDOW)
+    domain_history_window = _metric_window(start_date, end_date, DOMAIN_HISTORY_DEFAULT_WINDOW)
+    if bq_client:
+        bigquery_sources = [
+            _fill_rate_records(domain, *fill_rate_window),
+            _attention_records(domain, *attention_window),
+            _domain_history_records(domain, *domain_history_window, ad_unit_ids),
+        ]
+    else:
+        bigquery_sources = [_bigquery_unavailable() for _ in range(3)]
+    
+    fill_rate, attention, domain_history, site_info = await asyncio.gather(
+        *bigquery_sources,
+        _get_domain_site_info(domain),
+        return_exceptions=True
+    )
+    fill_rate, attention, domain_history = (
+        result if isinstance(result, BaseException) else result[0]
+        for result in (fill_rate, attention, domain_history)
+    )
+    
+    sections = {
+        "fill_rate": _section_status(fill_rate),
+        "attention": _section_status(attention),
+        "domain_history": _section_status(domain_history),
+        "site_info": _section_status(site_info),
+    }
+    publishers = _merge_dashboard_publishers(
+        fill_rate if isinstance(fill_rate, list) else [],
+        attention if isinstance(attention, list) else [],
+        domain_history if isinstance(domain_history, list) else []
+    )
+    
+    failed = sum(1 for section in sections.values() if section.status == "error")
+    if failed == 0:
+        status = "ok"
+    elif failed == len(sections):
+        status = "error"
+    else:
+        status = "partial"
+    
+    return PublisherDashboardResponse(
+        domain=domain,
+        status=status,
+        sections=sections,
+        site_info=site_info if isinstance(site_info, DomainSiteInfoRecord) else None,
+        publishers=publishers
+    )
+
+
+@app.get("/cache/stats", response_model=CacheStatsResponse)
+async def get_cache_stats():
+    """Get hit, miss and eviction counters for the metric result cache"""
+    if not result_cache:
+        return CacheStatsResponse(enabled=False)
+    return CacheStatsResponse(enabled=True, **result_cache.stats())
+
+
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus metrics: request and stage latency histograms, BigQuery bytes and rows, cache and in-flight gauges"""
+    return Response(content=generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
+
+
 @app.get("/health")
 async def health_check():
-    """Health check endpoint"""
-    if not bq_client:
+    """Health check endpoint, answered from the metadata catalog's last BigQuery calls"""
+    if not catalog:
         return {"status": "unhealthy", "error": "BigQuery client not initialized"}
     
-    try:
-        bq_client.list_datasets()
-        return {"status": "healthy", "bigquery": "connected"}
-    except Exception as e:
-        return {"status": "unhealthy", "error": str(e)}
\ No newline at end of file
+    status = catalog.status()
+    if status["bigquery"] == "disconnected":
+        return {"status": "unhealthy", "error": status["last_error"], **status}
+    return {"status": "healthy", **status}
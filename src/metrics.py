@@ -0,0 +1,176 @@
+import json
+import logging
+import sys
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional
+
+from prometheus_client import Counter, Gauge, Histogram
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "Time to serve a request, including streaming the body",
+    ["method", "route"], buckets=LATENCY_BUCKETS
+)
+REQUESTS = Counter("http_requests_total", "Requests served", ["method", "route", "status"])
+REQUESTS_IN_PROGRESS = Gauge("http_requests_in_progress", "Requests currently being served")
+
+STAGE_DURATION = Histogram(
+    "extraction_stage_duration_seconds",
+    "Time spent in each stage of an extraction: queue (waiting for a BigQuery slot in this process), "
+    "pending and execution (from BigQuery job statistics), download, validation and encoding",
+    ["route", "stage"], buckets=LATENCY_BUCKETS
+)
+BYTES_PROCESSED = Counter("bigquery_bytes_processed_total", "Bytes processed by BigQuery jobs", ["route"])
+BYTES_BILLED = Counter("bigquery_bytes_billed_total", "Bytes billed for BigQuery jobs", ["route"])
+ROWS_RETURNED = Counter("bigquery_rows_returned_total", "Rows returned by BigQuery jobs", ["route"])
+JOBS_IN_FLIGHT = Gauge("bigquery_jobs_in_flight", "BigQuery calls currently running on the executor")
+ADMISSION_QUEUE_DEPTH = Gauge(
+    "bigquery_admission_queue_depth", "Calls waiting for a BigQuery slot in each admission pool", ["pool"]
+)
+ADMISSION_REJECTIONS = Counter(
+    "bigquery_admission_rejections_total", "Calls shed by admission control because a pool's queue was full "
+    "or the wait for a slot ran out", ["pool", "reason"]
+)
+RATE_LIMIT_RETRIES = Counter(
+    "bigquery_rate_limit_retries_total", "BigQuery calls retried after a rate-limit error", ["pool"]
+)
+
+timing_logger = logging.getLogger("bigquery_api.timing")
+
+
+class _RequestTimings:
+    __slots__ = ("scope", "stages")
+
+    def __init__(self, scope: Dict[str, Any]):
+        self.scope = scope
+        self.stages: Dict[str, float] = {}
+
+
+_current_request: ContextVar[Optional[_RequestTimings]] = ContextVar("current_request", default=None)
+_route_paths: Dict[Any, str] = {}
+
+
+def _route_label(scope: Dict[str, Any]) -> str:
+    """Return the route template a request matched, so labels stay bounded for paths with IDs."""
+    endpoint = scope.get("endpoint")
+    if endpoint is None:
+        return "unmatched"
+    if endpoint not in _route_paths:
+        _route_paths[endpoint] = next(
+            (route.path for route in scope["app"].routes if getattr(route, "endpoint", None) is endpoint),
+            "unmatched"
+        )
+    return _route_paths[endpoint]
+
+
+def current_route() -> str:
+    request = _current_request.get()
+    return _route_label(request.scope) if request is not None else "background"
+
+
+def observe_stage(stage: str, seconds: float):
+    """Record time spent in one stage, both in the histogram and in the current request's timing log."""
+    STAGE_DURATION.labels(current_route(), stage).observe(seconds)
+    request = _current_request.get()
+    if request is not None:
+        request.stages[stage] = request.stages.get(stage, 0.0) + seconds
+
+
+@contextmanager
+def timed(stage: str) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, time.perf_counter() - start)
+
+
+def record_query(result) -> None:
+    """Record the job statistics of a finished query from its QueryResult."""
+    route = current_route()
+    for stage in ("pending", "execution", "download"):
+        seconds = getattr(result, f"{stage}_seconds")
+        if seconds is not None:
+            observe_stage(stage, seconds)
+    if result.total_bytes_processed:
+        BYTES_PROCESSED.labels(route).inc(result.total_bytes_processed)
+    if result.total_bytes_billed:
+        BYTES_BILLED.labels(route).inc(result.total_bytes_billed)
+    ROWS_RETURNED.labels(route).inc(len(result.rows))
+
+
+class ResultCacheCollector:
+    """Expose QueryResultCache counters at scrape time."""
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    def collect(self):
+        stats = self.cache.stats()
+        for name in ("hits", "stale_hits", "misses", "evictions", "expirations"):
+            yield CounterMetricFamily(
+                f"result_cache_{name}", f"Result cache {name.replace('_', ' ')}", value=stats[name]
+            )
+        yield GaugeMetricFamily("result_cache_entries", "Entries in the result cache", value=stats["entries"])
+        yield GaugeMetricFamily("result_cache_bytes", "Approximate size of the result cache", value=stats["bytes"])
+        yield GaugeMetricFamily("result_cache_hit_ratio", "Result cache hits per lookup", value=stats["hit_ratio"])
+
+
+def configure_timing_log():
+    """Write one JSON line per request to stdout from the timing logger."""
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    timing_logger.addHandler(handler)
+    timing_logger.setLevel(logging.INFO)
+    timing_logger.propagate = False
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing every HTTP request and logging its per-stage breakdown.
+
+    Requests to ``quiet_paths`` (probes and scrapes) are still counted but not logged.
+    """
+
+    def __init__(self, app, quiet_paths=("/health", "/metrics")):
+        self.app = app
+        self.quiet_paths = set(quiet_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = _RequestTimings(scope)
+        token = _current_request.set(timings)
+        status = 500
+        start = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        REQUESTS_IN_PROGRESS.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration = time.perf_counter() - start
+            REQUESTS_IN_PROGRESS.dec()
+            _current_request.reset(token)
+            route = _route_label(scope)
+            REQUEST_DURATION.labels(scope["method"], route).observe(duration)
+            REQUESTS.labels(scope["method"], route, str(status)).inc()
+            if scope["path"] not in self.quiet_paths and timing_logger.isEnabledFor(logging.INFO):
+                timing_logger.info(json.dumps({
+                    "method": scope["method"],
+                    "route": route,
+                    "status": status,
+                    "duration_ms": round(duration * 1000, 3),
+                    "stages_ms": {stage: round(seconds * 1000, 3) for stage, seconds in timings.stages.items()},
+                }))
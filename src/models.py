@@ -1,10 +1,49 @@
 from pydantic import BaseModel
+from datetime import date
 from typing import List, Dict, Any, Optional
+from enum import Enum
+
+
+class ResultFormat(str, Enum):
+    json = "json"
+    ndjson = "ndjson"
+    csv = "csv"
+    arrow = "arrow"
+    parquet = "parquet"
 
 
 class QueryRequest(BaseModel):
     query: str
     parameters: Optional[Dict[str, Any]] = None
+    parameter_types: Optional[Dict[str, str]] = None
+    maximum_bytes_billed: Optional[int] = None
+
+
+class ExportRequest(QueryRequest):
+    max_streams: Optional[int] = None
+
+
+class ExportShard(BaseModel):
+    path: str
+    row_count: int
+    size_bytes: int
+    sha256: str
+
+
+class ExportManifestResponse(BaseModel):
+    export_id: str
+    format: str
+    path: str
+    created_at: str
+    total_rows: int
+    shards: List[ExportShard]
+
+
+class DryRunResponse(BaseModel):
+    total_bytes_processed: int
+    referenced_tables: List[str]
+    maximum_bytes_billed: Optional[int] = None
+    within_budget: bool
 
 
 class QueryResponse(BaseModel):
@@ -12,6 +51,31 @@ class QueryResponse(BaseModel):
     row_count: int
 
 
+class QueryPageResponse(BaseModel):
+    data: List[Dict[str, Any]]
+    row_count: int
+    total_rows: int
+    job_id: str
+    location: Optional[str] = None
+    page_token: Optional[str] = None
+
+
+class JobResponse(BaseModel):
+    job_id: str
+    location: Optional[str] = None
+    query: str
+    state: str
+    error: Optional[str] = None
+    total_bytes_processed: Optional[int] = None
+    total_bytes_billed: Optional[int] = None
+    created_at: str
+    updated_at: str
+
+
+class JobListResponse(BaseModel):
+    jobs: List[JobResponse]
+
+
 class SchemaField(BaseModel):
     name: str
     type: str
@@ -43,6 +107,9 @@ class FillRateRecord(BaseModel):
 class FillRateResponse(BaseModel):
     data: List[FillRateRecord]
     row_count: int
+    start_date: date
+    end_date: date
+    bytes_processed: Optional[int] = None
 
 
 class AttentionRecord(BaseModel):
@@ -59,6 +126,9 @@ class AttentionRecord(BaseModel):
 class AttentionResponse(BaseModel):
     data: List[AttentionRecord]
     row_count: int
+    start_date: date
+    end_date: date
+    bytes_processed: Optional[int] = None
 
 
 class DomainHistoryRecord(BaseModel):
@@ -77,6 +147,46 @@ class DomainHistoryRecord(BaseModel):
 class DomainHistoryResponse(BaseModel):
     data: List[DomainHistoryRecord]
     row_count: int
+    start_date: date
+    end_date: date
+    bytes_processed: Optional[int] = None
+
+
+class DomainBatchRequest(BaseModel):
+    domains: List[str]
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+
+
+class DomainHistoryBatchRequest(BaseModel):
+    domains: List[str]
+    ad_unit_ids: Optional[List[str]] = None
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+
+
+class FillRateBatchResponse(BaseModel):
+    data: Dict[str, List[FillRateRecord]]
+    row_count: int
+    start_date: date
+    end_date: date
+    bytes_processed: Optional[int] = None
+
+
+class AttentionBatchResponse(BaseModel):
+    data: Dict[str, List[AttentionRecord]]
+    row_count: int
+    start_date: date
+    end_date: date
+    bytes_processed: Optional[int] = None
+
+
+class DomainHistoryBatchResponse(BaseModel):
+    data: Dict[str, List[DomainHistoryRecord]]
+    row_count: int
+    start_date: date
+    end_date: date
+    bytes_processed: Optional[int] = None
 
 
 class DomainSiteInfoRecord(BaseModel):
@@ -102,12 +212,91 @@ class DomainSiteInfoRecord(BaseModel):
     updated_at: Optional[str] = None
 
 
+class RankedPublisherRecord(DomainSiteInfoRecord):
+    sort_value: Optional[float] = None
+
+
 class DomainSiteInfoResponse(BaseModel):
     data: Optional[DomainSiteInfoRecord] = None
     found: bool
     message: str
 
 
+class DomainSiteInfoBatchResponse(BaseModel):
+    data: Dict[str, Optional[DomainSiteInfoRecord]]
+    found: int
+    missing: List[str]
+
+
+class PublisherSortField(str, Enum):
+    id_absorption_rate = "id_absorption_rate"
+    avg_ads_to_content_ratio = "avg_ads_to_content_ratio"
+    avg_ads_in_view = "avg_ads_in_view"
+    avg_ad_refresh = "avg_ad_refresh"
+    avg_cpu = "avg_cpu"
+    avg_page_weight = "avg_page_weight"
+    cpu_per_mb = "cpu_per_mb"
+    total_unique_gpids = "total_unique_gpids"
+    total_supply_paths = "total_supply_paths"
+    reseller_count = "reseller_count"
+
+
+class SortOrder(str, Enum):
+    asc = "asc"
+    desc = "desc"
+
+
+class PublisherRankingResponse(BaseModel):
+    data: List[RankedPublisherRecord]
+    row_count: int
+    sort_by: PublisherSortField
+    next_cursor: Optional[str] = None
+
+
+class DashboardSection(BaseModel):
+    status: str
+    row_count: int = 0
+    error: Optional[str] = None
+
+
+class DashboardAdUnit(BaseModel):
+    ad_unit_id: Optional[str] = None
+    fill_rate: Optional[FillRateRecord] = None
+    domain_history: Optional[DomainHistoryRecord] = None
+
+
+class DashboardPublisher(BaseModel):
+    publisher_id: Optional[str] = None
+    attention: List[AttentionRecord] = []
+    ad_units: List[DashboardAdUnit] = []
+
+
+class PublisherDashboardResponse(BaseModel):
+    domain: str
+    status: str
+    sections: Dict[str, DashboardSection]
+    site_info: Optional[DomainSiteInfoRecord] = None
+    publishers: List[DashboardPublisher]
+
+
+class CatalogInvalidateResponse(BaseModel):
+    invalidated: int
+
+
+class CacheStatsResponse(BaseModel):
+    enabled: bool
+    entries: int = 0
+    bytes: int = 0
+    max_entries: int = 0
+    max_bytes: int = 0
+    hits: int = 0
+    stale_hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    hit_ratio: float = 0.0
+
+
 class ErrorResponse(BaseModel):
     error: str
     detail: Optional[str] = None
\ No newline at end of file
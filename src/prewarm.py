@@ -0,0 +1,223 @@
+import asyncio
+import heapq
+import sqlite3
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .admission import INTERACTIVE
+from .bigquery_client import QueryResult
+from .queries import (
+    fill_rate_query, attention_query, domain_history_query, date_range,
+    FILL_RATE_DEFAULT_WINDOW, ATTENTION_DEFAULT_WINDOW, DOMAIN_HISTORY_DEFAULT_WINDOW
+)
+from .rollup import RollupSource, BIDSTREAM, ATTENTION
+
+
+class PrewarmMetric:
+    """A per-domain metric query whose default window is kept warm in the result cache."""
+
+    __slots__ = ("name", "build_query", "default_window", "rollup_source")
+
+    def __init__(
+        self,
+        name: str,
+        build_query: Callable[..., Tuple[str, Dict[str, Any]]],
+        default_window: Tuple[int, int],
+        rollup_source: RollupSource
+    ):
+        self.name = name
+        self.build_query = build_query
+        self.default_window = default_window
+        self.rollup_source = rollup_source
+
+
+PREWARM_METRICS = (
+    PrewarmMetric("fill_rate", fill_rate_query, FILL_RATE_DEFAULT_WINDOW, BIDSTREAM),
+    PrewarmMetric("attention", attention_query, ATTENTION_DEFAULT_WINDOW, ATTENTION),
+    PrewarmMetric("domain_history", domain_history_query, DOMAIN_HISTORY_DEFAULT_WINDOW, BIDSTREAM),
+)
+
+
+class DomainTraffic:
+    """Request counts per domain that decay with a ``half_life`` in seconds, so recent traffic ranks first.
+
+    Counts are kept with forward decay: each request adds a weight that grows
+    over time instead of every count shrinking, so recording is O(1). At most
+    ``max_domains`` domains are tracked; the least requested half is dropped
+    when that is exceeded.
+    """
+
+    def __init__(self, half_life: float = 86400.0, max_domains: int = 100000):
+        self.half_life = half_life
+        self.max_domains = max_domains
+        self._origin = time.monotonic()
+        self._counts: Dict[str, float] = {}
+
+    def _weight(self) -> float:
+        exponent = (time.monotonic() - self._origin) / self.half_life
+        if exponent > 32:
+            # Rebase before the weights lose precision
+            scale = 2.0 ** -exponent
+            self._counts = {domain: count * scale for domain, count in self._counts.items()}
+            self._origin = time.monotonic()
+            exponent = 0.0
+        return 2.0 ** exponent
+
+    def record(self, domains):
+        """Count a request for one domain or a list of domains."""
+        weight = self._weight()
+        for domain in [domains] if isinstance(domains, str) else domains:
+            self._counts[domain] = self._counts.get(domain, 0.0) + weight
+        if len(self._counts) > self.max_domains:
+            keep = heapq.nlargest(self.max_domains // 2, self._counts.items(), key=lambda item: item[1])
+            self._counts = dict(keep)
+
+    def top(self, limit: int) -> List[str]:
+        """The ``limit`` most requested domains, most requested first."""
+        return [domain for domain, _ in heapq.nlargest(limit, self._counts.items(), key=lambda item: item[1])]
+
+
+def _chunks(items: List[str], size: int) -> List[List[str]]:
+    return [items[index:index + size] for index in range(0, len(items), size)]
+
+
+class CachePrewarmer:
+    """Keeps the default-window fill rate, attention and domain history results of top domains in the result cache.
+
+    The domains are the ``top_domains`` most requested ones in ``traffic``,
+    topped up from the most recently pulled publishers in sincera_data.db when
+    ``store`` is given. Every ``interval`` seconds each metric's entries that
+    are missing or no longer fresh are refetched, with up to ``batch_size``
+    domains per BigQuery job using the batch queries, and split into the
+    single-domain entries the endpoints look up. Windows the rollup store
+    already covers are skipped, since those requests never reach BigQuery.
+
+    Around the UTC day rollover it also:
+
+    - warms the next day's windows during the last ``lead_seconds`` of the day,
+      so the first requests after midnight find them cached;
+    - refetches every entry once ``partition_delay`` seconds after midnight,
+      when the previous day's partition has landed, replacing results computed
+      from partial data.
+
+    Requests meanwhile keep being served from stale entries while they are
+    refreshed, so the rollover does not show up in request latency.
+    ``client`` is anything with the AsyncBigQueryClient ``run_query``,
+    ``cache_result`` and ``is_cached`` methods.
+    """
+
+    def __init__(
+        self,
+        client,
+        traffic: DomainTraffic,
+        store=None,
+        rollup_store=None,
+        top_domains: int = 100,
+        batch_size: int = 500,
+        interval: float = 300.0,
+        lead_seconds: float = 900.0,
+        partition_delay: float = 7200.0
+    ):
+        self.client = client
+        self.traffic = traffic
+        self.store = store
+        self.rollup_store = rollup_store
+        self.top_domains = top_domains
+        self.batch_size = batch_size
+        self.interval = interval
+        self.lead_seconds = lead_seconds
+        self.partition_delay = partition_delay
+        self._landed: Optional[date] = None
+
+    async def domains(self) -> List[str]:
+        """The domains to keep warm: the most requested ones, then recently pulled publishers."""
+        domains = self.traffic.top(self.top_domains)
+        if self.store is not None and len(domains) < self.top_domains:
+            try:
+                recent = await asyncio.to_thread(self.store.recent_domains, self.top_domains)
+            except sqlite3.Error as e:
+                print(f"Failed to read recently pulled publishers, prewarming requested domains only: {e}")
+                recent = []
+            for domain in recent:
+                if len(domains) >= self.top_domains:
+                    break
+                if domain not in domains:
+                    domains.append(domain)
+        return domains
+
+    async def _rollup_covers(self, metric: PrewarmMetric, start_date: date, end_date: date) -> bool:
+        if self.rollup_store is None:
+            return False
+        return await asyncio.to_thread(self.rollup_store.covers, metric.rollup_source, start_date, end_date)
+
+    async def _warm(self, metric: PrewarmMetric, domains: List[str], start_date: date, end_date: date, day: date):
+        """Fetch a metric for many domains with one job and cache each domain's rows under its own query.
+
+        ``day`` is the date the default window was resolved for, which keeps
+        entries warmed ahead of midnight fresh through the next day.
+        """
+        query, parameters = metric.build_query(domains, start_date, end_date)
+        result = await self.client.run_query(query, parameters, pool=INTERACTIVE)
+        rows_by_domain: Dict[str, List[Dict[str, Any]]] = {domain: [] for domain in domains}
+        for row in result.rows:
+            if row.get("domain") in rows_by_domain:
+                rows_by_domain[row["domain"]].append(row)
+        for domain, rows in rows_by_domain.items():
+            self.client.cache_result(
+                *metric.build_query(domain, start_date, end_date), QueryResult(rows, job_id=result.job_id), day
+            )
+        return len(rows_by_domain)
+
+    async def refresh(self, now: Optional[datetime] = None) -> int:
+        """Refetch the entries that need it for today's windows, and tomorrow's near midnight; return the job count."""
+        now = now or datetime.now(timezone.utc)
+        today = now.date()
+        midnight = datetime.combine(today, datetime.min.time(), tzinfo=timezone.utc)
+        force = self._landed != today and now >= midnight + timedelta(seconds=self.partition_delay)
+        days = [today]
+        if midnight + timedelta(days=1) - now <= timedelta(seconds=self.lead_seconds):
+            days.append(today + timedelta(days=1))
+
+        domains = await self.domains()
+        jobs = 0
+        for day in days:
+            for metric in PREWARM_METRICS:
+                start_date, end_date = date_range(None, None, metric.default_window, today=day)
+                if not domains or await self._rollup_covers(metric, start_date, end_date):
+                    continue
+                pending = [
+                    domain for domain in domains
+                    if (force and day == today)
+                    or not self.client.is_cached(*metric.build_query(domain, start_date, end_date))
+                ]
+                for chunk in _chunks(pending, self.batch_size):
+                    await self._warm(metric, chunk, start_date, end_date, day)
+                    jobs += 1
+        if force:
+            self._landed = today
+        return jobs
+
+    def _seconds_until_next_run(self, now: datetime) -> float:
+        """Sleep for ``interval``, but wake up for the pre-rollover warm-up, the rollover and the partition landing."""
+        midnight = datetime.combine(now.date(), datetime.min.time(), tzinfo=timezone.utc)
+        next_midnight = midnight + timedelta(days=1)
+        delay = self.interval
+        for event in (
+            next_midnight - timedelta(seconds=self.lead_seconds),
+            next_midnight,
+            midnight + timedelta(seconds=self.partition_delay),
+            next_midnight + timedelta(seconds=self.partition_delay),
+        ):
+            if event > now:
+                delay = min(delay, (event - now).total_seconds())
+        return max(delay, 1.0)
+
+    async def run(self):
+        """Prewarm now and then on schedule until cancelled."""
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                print(f"Failed to prewarm the result cache: {e}")
+            await asyncio.sleep(self._seconds_until_next_run(datetime.now(timezone.utc)))
@@ -0,0 +1,225 @@
+from datetime import date, datetime, timedelta, timezone
+from typing import List, Dict, Any, Optional, Tuple, Union
+
+from .bigquery_client import TypedParameter
+
+
+FILL_RATE_QUERY = """
+    SELECT
+        publisher_id,
+        domain,
+        ad_unit_id_feature as ad_unit_id,
+        sum(ad_requests_est) as ad_requests_est,
+        sum(impressions_est) as impressions_est,
+        safe_divide(sum(impressions_est),sum(ad_requests_est)) as fill_rate
+    FROM ozone.fct_smart_bidstream__root
+    WHERE date_hour >= @start_date
+        AND date_hour < @end_before
+        AND {domain_filter}
+    GROUP BY ALL
+    HAVING ad_requests_est > 1000000
+    ORDER BY ad_requests_est DESC
+    """
+
+ATTENTION_QUERY = """
+    SELECT
+        dv_delivery_domain as domain,
+        publisher_id,
+        sum(tracker_ad_clicks) as tracker_ad_clicks,
+        sum(tracker_ad_hovers) as tracker_ad_hovers,
+        sum(dv_net_iab_viewable_imp) as vie_imps,
+        safe_divide(
+          sum(dv_net_iab_viewable_imp),
+          sum(dv_net_measured_imp)
+        ) as vie_pct,
+        safe_divide(
+          sum(tracker_ad_clicks),
+          sum(dv_net_measured_imp)
+        ) as click_pct,
+        safe_divide(
+          sum(tracker_ad_hovers),
+          sum(dv_net_measured_imp)
+        ) as hover_pct,
+    FROM `ozpr-data-engineering-prod.prod_de_attention_metrics.fct_attention_metrics__beeswax`
+    WHERE ts >= @start_date
+        AND ts < @end_before
+        AND dv_delivery_domain is not null
+        AND {domain_filter}
+    GROUP BY ALL
+    """
+
+DOMAIN_HISTORY_QUERY = """
+    select
+      publisher_id,
+      domain,
+      ad_unit_id_feature as ad_unit_id,
+      sum(ad_requests_est) as ad_requests_est,
+      sum(ad_rev_oz_net_usd_est) as rev_oz_net_usd,
+
+      safe_divide(
+        sum(ad_bids),
+        sum(ad_requests_est)
+      ) as bid_rate,
+
+      safe_divide(
+        sum(ad_rev_bid_net_usd),
+        sum(ad_bids)
+      ) *1000 as bid_cpm,
+
+      safe_divide(
+        sum(impressions_est),
+        sum(ad_bids)
+      ) as win_rate,
+
+      safe_divide(
+        sum(impressions_est),
+        sum(ad_requests_est)
+      ) as fill_rate,
+
+      safe_divide(
+        sum(ad_rev_oz_net_usd_est),
+        sum(impressions_est)
+      ) *1000 as impression_cpm
+
+    from ozone.fct_smart_bidstream__root
+    where date_hour >= @start_date
+    and date_hour < @end_before
+    and {domain_filter}{ad_unit_filter}
+    group by all
+    having ad_requests_est >= 10000
+    """
+
+
+# Default windows as (start, end) days before today, matching the original
+# current_date - N filters; end dates are inclusive
+FILL_RATE_DEFAULT_WINDOW = (30, 30)
+ATTENTION_DEFAULT_WINDOW = (7, 0)
+DOMAIN_HISTORY_DEFAULT_WINDOW = (1, 1)
+
+
+def date_bounds(start_date: date, end_date: date) -> Dict[str, Any]:
+    """Bind an inclusive date range as the half-open ``@start_date``/``@end_before`` partition column bounds.
+
+    The bounds are STRING parameters, which BigQuery coerces to the type of
+    the column they are compared with, so the same predicate works on DATE,
+    DATETIME and TIMESTAMP columns and stays a constant comparison that
+    partitions can be pruned on.
+    """
+    return {
+        "start_date": TypedParameter("STRING", start_date.isoformat()),
+        "end_before": TypedParameter("STRING", (end_date + timedelta(days=1)).isoformat()),
+    }
+
+
+def bounds_dates(parameters: Dict[str, Any]) -> Tuple[date, date]:
+    """Return the inclusive date range bound by ``date_bounds`` parameters."""
+    start_date = date.fromisoformat(parameters["start_date"].value)
+    end_date = date.fromisoformat(parameters["end_before"].value) - timedelta(days=1)
+    return start_date, end_date
+
+
+def date_range(
+    start_date: Optional[date],
+    end_date: Optional[date],
+    default_window: Tuple[int, int],
+    today: Optional[date] = None
+) -> Tuple[date, date]:
+    """Fill in a missing start or end date from a default window in UTC.
+
+    With neither date the window is taken relative to today; BigQuery's
+    current_date is UTC, so the defaults match the dates the original
+    hardcoded filters resolved to. With only one date the other is set to
+    span the window's length from it, and a derived end date never passes
+    today. ``today`` overrides the current date.
+    """
+    if today is None:
+        today = datetime.now(timezone.utc).date()
+    span = timedelta(days=default_window[0] - default_window[1])
+    if start_date is None and end_date is None:
+        start_date = today - timedelta(days=default_window[0])
+        end_date = today - timedelta(days=default_window[1])
+    elif end_date is None:
+        end_date = min(start_date + span, today)
+    elif start_date is None:
+        start_date = end_date - span
+    if start_date > end_date:
+        raise ValueError("start_date must be on or before end_date")
+    return start_date, end_date
+
+
+def _domain_filter(column: str, domains: Union[str, List[str]]) -> Tuple[str, Dict[str, Any]]:
+    """Filter on a single ``@domain`` or, for a list, on one ``@domains`` array parameter."""
+    if isinstance(domains, str):
+        return f"{column} = @domain", {"domain": domains}
+    return f"{column} IN UNNEST(@domains)", {"domains": list(domains)}
+
+
+def fill_rate_query(
+    domains: Union[str, List[str]], start_date: date, end_date: date
+) -> Tuple[str, Dict[str, Any]]:
+    """Build the fill rate query and its parameters for one domain or a list of domains."""
+    domain_filter, parameters = _domain_filter("domain", domains)
+    parameters.update(date_bounds(start_date, end_date))
+    return FILL_RATE_QUERY.format(domain_filter=domain_filter), parameters
+
+
+def attention_query(
+    domains: Union[str, List[str]], start_date: date, end_date: date
+) -> Tuple[str, Dict[str, Any]]:
+    """Build the attention metrics query and its parameters for one domain or a list of domains."""
+    domain_filter, parameters = _domain_filter("dv_delivery_domain", domains)
+    parameters.update(date_bounds(start_date, end_date))
+    return ATTENTION_QUERY.format(domain_filter=domain_filter), parameters
+
+
+def domain_history_query(
+    domains: Union[str, List[str]], start_date: date, end_date: date, ad_unit_ids: Optional[List[str]] = None
+) -> Tuple[str, Dict[str, Any]]:
+    """Build the domain history query and its parameters, optionally filtered by ad unit IDs."""
+    domain_filter, parameters = _domain_filter("domain", domains)
+    parameters.update(date_bounds(start_date, end_date))
+    ad_unit_filter = ""
+    if ad_unit_ids:
+        ad_unit_filter = " and ad_unit_id_feature in UNNEST(@ad_unit_ids)"
+        parameters["ad_unit_ids"] = list(ad_unit_ids)
+    query = DOMAIN_HISTORY_QUERY.format(domain_filter=domain_filter, ad_unit_filter=ad_unit_filter)
+    return query, parameters
+
+
+# Rollup extraction queries return additive sums per UTC day, plus the latest
+# partition timestamp seen, which becomes the incremental refresh watermark
+BIDSTREAM_ROLLUP_QUERY = """
+    SELECT
+        CAST(date_hour AS DATE) as day,
+        publisher_id,
+        domain,
+        ad_unit_id_feature as ad_unit_id,
+        sum(ad_requests_est) as ad_requests_est,
+        sum(impressions_est) as impressions_est,
+        sum(ad_bids) as ad_bids,
+        sum(ad_rev_bid_net_usd) as ad_rev_bid_net_usd,
+        sum(ad_rev_oz_net_usd_est) as ad_rev_oz_net_usd_est,
+        CAST(max(date_hour) AS TIMESTAMP) as last_event_at
+    FROM ozone.fct_smart_bidstream__root
+    WHERE date_hour >= @start_date
+        AND date_hour < @end_before
+    GROUP BY ALL
+    """
+
+ATTENTION_ROLLUP_QUERY = """
+    SELECT
+        CAST(ts AS DATE) as day,
+        dv_delivery_domain as domain,
+        publisher_id,
+        sum(tracker_ad_clicks) as tracker_ad_clicks,
+        sum(tracker_ad_hovers) as tracker_ad_hovers,
+        sum(dv_net_iab_viewable_imp) as dv_net_iab_viewable_imp,
+        sum(dv_net_measured_imp) as dv_net_measured_imp,
+        CAST(max(ts) AS TIMESTAMP) as last_event_at
+    FROM `ozpr-data-engineering-prod.prod_de_attention_metrics.fct_attention_metrics__beeswax`
+    WHERE ts >= @start_date
+        AND ts < @end_before
+        AND dv_delivery_domain is not null
+    GROUP BY ALL
+    """
+
@@ -0,0 +1,196 @@
+import queue
+import re
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional
+
+import pyarrow
+import pyarrow.ipc
+
+
+_ORDER_BY = re.compile(r"\bORDER\s+BY\b", re.IGNORECASE)
+
+
+def contains_order_by(query: str) -> bool:
+    """Whether a query may depend on row order, as google-cloud-bigquery decides it.
+
+    Ordered window functions count too; a false positive only costs parallelism.
+    """
+    return _ORDER_BY.search(query) is not None
+
+
+class ReadSession:
+    """A result table split into independently readable streams, all sharing one Arrow schema."""
+
+    __slots__ = ("schema", "streams", "handle")
+
+    def __init__(self, schema: pyarrow.Schema, streams: List[str], handle: Any = None):
+        self.schema = schema
+        self.streams = streams
+        self.handle = handle
+
+
+class StreamProvider(ABC):
+    """Opens read sessions over query results and reads their streams as Arrow record batches.
+
+    Both methods are blocking and are meant to be run on worker threads.
+    """
+
+    @abstractmethod
+    def open_session(
+        self,
+        query: str,
+        parameters: Optional[Dict[str, Any]] = None,
+        maximum_bytes_billed: Optional[int] = None,
+        max_streams: int = 8
+    ) -> ReadSession:
+        """Run a query and split its results into up to ``max_streams`` streams."""
+
+    @abstractmethod
+    def read_stream(self, session: ReadSession, stream: str) -> Iterator[pyarrow.RecordBatch]:
+        """Yield one stream of a session as Arrow record batches."""
+
+
+class BigQueryStorageProvider(StreamProvider):
+    """Stream provider backed by BigQuery Storage Read API sessions on a query's destination table."""
+
+    def __init__(self, client):
+        self.client = client
+
+    def open_session(
+        self,
+        query: str,
+        parameters: Optional[Dict[str, Any]] = None,
+        maximum_bytes_billed: Optional[int] = None,
+        max_streams: int = 8
+    ) -> ReadSession:
+        session = self.client.create_read_session(query, parameters, maximum_bytes_billed, max_streams)
+        if not session.streams:
+            # An empty result table has no streams and may have no serialized schema either
+            return ReadSession(pyarrow.schema([]), [], session)
+        schema = pyarrow.ipc.read_schema(pyarrow.py_buffer(session.arrow_schema.serialized_schema))
+        return ReadSession(schema, [stream.name for stream in session.streams], session)
+
+    def read_stream(self, session: ReadSession, stream: str) -> Iterator[pyarrow.RecordBatch]:
+        return self.client.iter_stream_record_batches(session.handle, stream)
+
+
+class FakeStreamProvider(StreamProvider):
+    """Stream provider that splits an in-memory Arrow table into streams, for tests and benchmarks.
+
+    Every query returns ``table`` unless a subclass overrides ``table_for``; the
+    result is divided into up to ``max_streams`` contiguous streams of batches
+    of at most ``batch_size`` rows.
+    """
+
+    def __init__(self, table: Optional[pyarrow.Table] = None, batch_size: int = 1024):
+        self.table = table
+        self.batch_size = batch_size
+
+    def table_for(self, query: str, parameters: Optional[Dict[str, Any]] = None) -> pyarrow.Table:
+        return self.table
+
+    def open_session(
+        self,
+        query: str,
+        parameters: Optional[Dict[str, Any]] = None,
+        maximum_bytes_billed: Optional[int] = None,
+        max_streams: int = 8
+    ) -> ReadSession:
+        table = self.table_for(query, parameters)
+        if table.num_rows == 0:
+            return ReadSession(table.schema, [], table)
+        stream_count = min(max_streams, table.num_rows)
+        rows_per_stream = -(-table.num_rows // stream_count)
+        streams = [
+            f"{offset}:{min(offset + rows_per_stream, table.num_rows)}"
+            for offset in range(0, table.num_rows, rows_per_stream)
+        ]
+        return ReadSession(table.schema, streams, table)
+
+    def read_stream(self, session: ReadSession, stream: str) -> Iterator[pyarrow.RecordBatch]:
+        start, end = (int(bound) for bound in stream.split(":"))
+        yield from session.handle.slice(start, end - start).to_batches(max_chunksize=self.batch_size)
+
+
+_DONE = object()
+
+
+class _StreamError:
+    __slots__ = ("error",)
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+def iter_parallel_batches(
+    provider: StreamProvider,
+    session: ReadSession,
+    ordered: bool = True,
+    max_workers: Optional[int] = None,
+    buffer_size: int = 4
+) -> Iterator[pyarrow.RecordBatch]:
+    """Read every stream of a session on its own worker thread and merge the batches into one iterator.
+
+    With ``ordered`` the batches come out stream by stream in session order,
+    the same order a single reader would produce, while later streams keep
+    downloading into bounded buffers of ``buffer_size`` batches. Without it
+    batches are yielded as soon as any stream produces them. A failing stream
+    raises its error from the iterator, and closing the iterator early stops
+    the workers after their current batch.
+    """
+    streams = session.streams
+    if not streams:
+        return
+    stop = threading.Event()
+    if ordered:
+        queues = [queue.Queue(maxsize=buffer_size) for _ in streams]
+    else:
+        shared = queue.Queue(maxsize=buffer_size * len(streams))
+        queues = [shared] * len(streams)
+
+    def put(target: queue.Queue, item: Any) -> bool:
+        while not stop.is_set():
+            try:
+                target.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def read(index: int):
+        batches = provider.read_stream(session, streams[index])
+        try:
+            for batch in batches:
+                if not put(queues[index], batch):
+                    return
+            put(queues[index], _DONE)
+        except BaseException as e:
+            put(queues[index], _StreamError(e))
+        finally:
+            if hasattr(batches, "close"):
+                batches.close()
+
+    executor = None
+    try:
+        executor = ThreadPoolExecutor(max_workers=max_workers or len(streams), thread_name_prefix="read-stream")
+        for index in range(len(streams)):
+            executor.submit(read, index)
+        pending = len(streams)
+        position = 0
+        while pending:
+            item = queues[position].get()
+            if isinstance(item, _StreamError):
+                raise item.error
+            if item is _DONE:
+                pending -= 1
+                if ordered:
+                    position += 1
+                continue
+            yield item
+    finally:
+        # Set on every exit, including the consumer closing the iterator early, so no worker is left waiting
+        stop.set()
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
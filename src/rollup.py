@@ -0,0 +1,340 @@
+import asyncio
+import json
+import sqlite3
+import threading
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from .queries import BIDSTREAM_ROLLUP_QUERY, ATTENTION_ROLLUP_QUERY, date_bounds
+
+
+class RollupSource:
+    """A BigQuery table rolled up into a local table of additive sums per day and key."""
+
+    __slots__ = ("name", "table", "key_columns", "sum_columns", "query")
+
+    def __init__(self, name: str, table: str, key_columns: Tuple[str, ...], sum_columns: Tuple[str, ...], query: str):
+        self.name = name
+        self.table = table
+        self.key_columns = key_columns
+        self.sum_columns = sum_columns
+        self.query = query
+
+    @property
+    def columns(self) -> Tuple[str, ...]:
+        return ("day",) + self.key_columns + self.sum_columns
+
+
+BIDSTREAM = RollupSource(
+    "bidstream",
+    "domain_daily_rollup",
+    ("publisher_id", "domain", "ad_unit_id"),
+    ("ad_requests_est", "impressions_est", "ad_bids", "ad_rev_bid_net_usd", "ad_rev_oz_net_usd_est"),
+    BIDSTREAM_ROLLUP_QUERY,
+)
+
+ATTENTION = RollupSource(
+    "attention",
+    "attention_daily_rollup",
+    ("publisher_id", "domain"),
+    ("tracker_ad_clicks", "tracker_ad_hovers", "dv_net_iab_viewable_imp", "dv_net_measured_imp"),
+    ATTENTION_ROLLUP_QUERY,
+)
+
+ROLLUP_SOURCES = {source.name: source for source in (BIDSTREAM, ATTENTION)}
+
+ROLLUP_PARTITIONS_TABLE = """
+    CREATE TABLE IF NOT EXISTS rollup_partitions (
+        source TEXT NOT NULL,
+        day TEXT NOT NULL,
+        row_count INTEGER NOT NULL,
+        ingested_at TEXT NOT NULL,
+        PRIMARY KEY (source, day)
+    )
+    """
+
+ROLLUP_WATERMARKS_TABLE = """
+    CREATE TABLE IF NOT EXISTS rollup_watermarks (
+        source TEXT PRIMARY KEY,
+        watermark TEXT NOT NULL,
+        updated_at TEXT NOT NULL
+    )
+    """
+
+# Ratios are recomputed from the summed columns, so any window of days gives the
+# same numbers as aggregating the BigQuery tables over it directly
+FILL_RATE_ROLLUP_QUERY = """
+    SELECT
+        publisher_id,
+        domain,
+        ad_unit_id,
+        sum(ad_requests_est) AS ad_requests_est,
+        sum(impressions_est) AS impressions_est,
+        sum(impressions_est) / NULLIF(sum(ad_requests_est), 0) AS fill_rate
+    FROM domain_daily_rollup
+    WHERE domain IN (SELECT value FROM json_each(?))
+        AND day >= ? AND day <= ?
+    GROUP BY publisher_id, domain, ad_unit_id
+    HAVING sum(ad_requests_est) > 1000000
+    ORDER BY ad_requests_est DESC
+    """
+
+ATTENTION_ROLLUP_SERVE_QUERY = """
+    SELECT
+        domain,
+        publisher_id,
+        sum(tracker_ad_clicks) AS tracker_ad_clicks,
+        sum(tracker_ad_hovers) AS tracker_ad_hovers,
+        sum(dv_net_iab_viewable_imp) AS vie_imps,
+        sum(dv_net_iab_viewable_imp) / NULLIF(sum(dv_net_measured_imp), 0) AS vie_pct,
+        sum(tracker_ad_clicks) / NULLIF(sum(dv_net_measured_imp), 0) AS click_pct,
+        sum(tracker_ad_hovers) / NULLIF(sum(dv_net_measured_imp), 0) AS hover_pct
+    FROM attention_daily_rollup
+    WHERE domain IN (SELECT value FROM json_each(?))
+        AND day >= ? AND day <= ?
+    GROUP BY domain, publisher_id
+    """
+
+DOMAIN_HISTORY_ROLLUP_QUERY = """
+    SELECT
+        publisher_id,
+        domain,
+        ad_unit_id,
+        sum(ad_requests_est) AS ad_requests_est,
+        sum(ad_rev_oz_net_usd_est) AS rev_oz_net_usd,
+        sum(ad_bids) / NULLIF(sum(ad_requests_est), 0) AS bid_rate,
+        sum(ad_rev_bid_net_usd) / NULLIF(sum(ad_bids), 0) * 1000 AS bid_cpm,
+        sum(impressions_est) / NULLIF(sum(ad_bids), 0) AS win_rate,
+        sum(impressions_est) / NULLIF(sum(ad_requests_est), 0) AS fill_rate,
+        sum(ad_rev_oz_net_usd_est) / NULLIF(sum(impressions_est), 0) * 1000 AS impression_cpm
+    FROM domain_daily_rollup
+    WHERE domain IN (SELECT value FROM json_each(?))
+        AND day >= ? AND day <= ?{ad_unit_filter}
+    GROUP BY publisher_id, domain, ad_unit_id
+    HAVING sum(ad_requests_est) >= 10000
+    """
+
+
+def _table_statements(source: RollupSource) -> List[str]:
+    columns = ["day TEXT NOT NULL"]
+    columns.extend(f"{column} TEXT" for column in source.key_columns)
+    columns.extend(f"{column} REAL" for column in source.sum_columns)
+    return [
+        f"CREATE TABLE IF NOT EXISTS {source.table} ({', '.join(columns)})",
+        f"CREATE TABLE IF NOT EXISTS {source.table}_staging ({', '.join(columns)})",
+        f"CREATE INDEX IF NOT EXISTS idx_{source.table}_domain_day ON {source.table} (domain, day)",
+        f"CREATE INDEX IF NOT EXISTS idx_{source.table}_day ON {source.table} (day)",
+    ]
+
+
+def _rollup_row(source: RollupSource, row: Dict[str, Any]) -> List[Any]:
+    # BigQuery NUMERIC sums arrive as Decimal, which sqlite3 cannot bind
+    day = row["day"]
+    values = [day.isoformat() if isinstance(day, date) else str(day)]
+    values.extend(None if row.get(column) is None else str(row[column]) for column in source.key_columns)
+    values.extend(None if row.get(column) is None else float(row[column]) for column in source.sum_columns)
+    return values
+
+
+def _domain_list(domains: Union[str, List[str]]) -> str:
+    return json.dumps([domains] if isinstance(domains, str) else list(domains))
+
+
+def _days(start_date: date, end_date: date) -> List[date]:
+    return [start_date + timedelta(days=offset) for offset in range((end_date - start_date).days + 1)]
+
+
+class RollupStore:
+    """Local SQLite copy of the daily sums behind /fill-rate, /attention and /domain-history.
+
+    A refresh stages the rows for a range of days, then swaps them in with a
+    single transaction that replaces those days, records them in
+    ``rollup_partitions`` and advances the source's watermark, so re-running a
+    refresh is idempotent and readers never see a half-written day. A date range
+    is served locally only when every day in it is recorded.
+    """
+
+    def __init__(self, db_path: str = "rollup.db"):
+        self.db_path = db_path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def open(self):
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        statements = [ROLLUP_PARTITIONS_TABLE, ROLLUP_WATERMARKS_TABLE]
+        for source in ROLLUP_SOURCES.values():
+            statements.extend(_table_statements(source))
+        for statement in statements:
+            self._conn.execute(statement)
+        self._conn.commit()
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def watermark(self, source: RollupSource) -> Optional[datetime]:
+        """Return the latest partition timestamp merged for a source, or None before its first refresh."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT watermark FROM rollup_watermarks WHERE source = ?", (source.name,)
+            ).fetchone()
+        return datetime.fromisoformat(row[0]) if row else None
+
+    def begin_refresh(self, source: RollupSource):
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {source.table}_staging")
+            self._conn.commit()
+
+    def stage_rows(self, source: RollupSource, rows: List[Dict[str, Any]]):
+        with self._lock:
+            self._conn.executemany(
+                f"INSERT INTO {source.table}_staging ({', '.join(source.columns)}) "
+                f"VALUES ({', '.join('?' * len(source.columns))})",
+                [_rollup_row(source, row) for row in rows]
+            )
+            self._conn.commit()
+
+    def commit_refresh(
+        self, source: RollupSource, start_date: date, end_date: date, watermark: Optional[datetime]
+    ):
+        """Replace the days from start_date to end_date with the staged rows and advance the watermark."""
+        bounds = (start_date.isoformat(), end_date.isoformat())
+        now = datetime.now(timezone.utc).isoformat()
+        columns = ", ".join(source.columns)
+        with self._lock, self._conn:
+            self._conn.execute(f"DELETE FROM {source.table} WHERE day >= ? AND day <= ?", bounds)
+            self._conn.execute(
+                f"INSERT INTO {source.table} ({columns}) SELECT {columns} FROM {source.table}_staging "
+                "WHERE day >= ? AND day <= ?",
+                bounds
+            )
+            row_counts = dict(self._conn.execute(
+                f"SELECT day, count(*) FROM {source.table}_staging GROUP BY day"
+            ).fetchall())
+            self._conn.execute(f"DELETE FROM {source.table}_staging")
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO rollup_partitions (source, day, row_count, ingested_at) VALUES (?, ?, ?, ?)",
+                [
+                    (source.name, day.isoformat(), row_counts.get(day.isoformat(), 0), now)
+                    for day in _days(start_date, end_date)
+                ]
+            )
+            if watermark is not None:
+                self._conn.execute(
+                    "INSERT INTO rollup_watermarks (source, watermark, updated_at) VALUES (?, ?, ?) "
+                    "ON CONFLICT(source) DO UPDATE SET "
+                    "watermark = max(watermark, excluded.watermark), updated_at = excluded.updated_at",
+                    (source.name, watermark.astimezone(timezone.utc).isoformat(), now)
+                )
+
+    def covers(self, source: RollupSource, start_date: date, end_date: date) -> bool:
+        """Return True if every day from start_date to end_date has been merged for a source."""
+        with self._lock:
+            count = self._conn.execute(
+                "SELECT count(*) FROM rollup_partitions WHERE source = ? AND day >= ? AND day <= ?",
+                (source.name, start_date.isoformat(), end_date.isoformat())
+            ).fetchone()[0]
+        return count == (end_date - start_date).days + 1
+
+    def _select(self, query: str, parameters: List[Any]) -> List[Dict[str, Any]]:
+        with self._lock:
+            cursor = self._conn.execute(query, parameters)
+            columns = [description[0] for description in cursor.description]
+            rows = cursor.fetchall()
+        return [dict(zip(columns, row)) for row in rows]
+
+    def fill_rate(
+        self, domains: Union[str, List[str]], start_date: date, end_date: date
+    ) -> List[Dict[str, Any]]:
+        return self._select(
+            FILL_RATE_ROLLUP_QUERY, [_domain_list(domains), start_date.isoformat(), end_date.isoformat()]
+        )
+
+    def attention(
+        self, domains: Union[str, List[str]], start_date: date, end_date: date
+    ) -> List[Dict[str, Any]]:
+        return self._select(
+            ATTENTION_ROLLUP_SERVE_QUERY, [_domain_list(domains), start_date.isoformat(), end_date.isoformat()]
+        )
+
+    def domain_history(
+        self,
+        domains: Union[str, List[str]],
+        start_date: date,
+        end_date: date,
+        ad_unit_ids: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        parameters = [_domain_list(domains), start_date.isoformat(), end_date.isoformat()]
+        ad_unit_filter = ""
+        if ad_unit_ids:
+            ad_unit_filter = " AND ad_unit_id IN (SELECT value FROM json_each(?))"
+            parameters.append(json.dumps(list(ad_unit_ids)))
+        return self._select(DOMAIN_HISTORY_ROLLUP_QUERY.format(ad_unit_filter=ad_unit_filter), parameters)
+
+
+class RollupManager:
+    """Keep a RollupStore current with incremental, watermark-driven refreshes.
+
+    Each refresh runs one BigQuery job per source over the days from the
+    watermark's date through today, so the bytes scanned per run track the new
+    data rather than the whole history. The first refresh of each UTC day
+    starts ``lookback_days`` earlier, to pick up rows that arrived late for
+    days already merged. Before a source's first refresh the window starts
+    ``backfill_days`` back instead. ``client`` is anything with the
+    AsyncBigQueryClient ``stream_query`` method.
+    """
+
+    def __init__(
+        self,
+        client,
+        store: RollupStore,
+        backfill_days: int = 31,
+        lookback_days: int = 2,
+        page_size: int = 10000
+    ):
+        self.client = client
+        self.store = store
+        self.backfill_days = backfill_days
+        self.lookback_days = lookback_days
+        self.page_size = page_size
+        # The day each source last had its late-data look-back rescanned
+        self._looked_back: Dict[str, date] = {}
+
+    async def refresh(self, source: RollupSource, today: Optional[date] = None) -> Tuple[date, date]:
+        """Re-extract a source from its watermark's day through today, with the look-back once a day, and merge it.
+
+        ``today`` overrides the current UTC date.
+        """
+        if today is None:
+            today = datetime.now(timezone.utc).date()
+        watermark = await asyncio.to_thread(self.store.watermark, source)
+        if watermark is None:
+            start_date = today - timedelta(days=self.backfill_days - 1)
+        else:
+            start_date = min(watermark.astimezone(timezone.utc).date(), today)
+            if self._looked_back.get(source.name) != today:
+                start_date -= timedelta(days=self.lookback_days)
+
+        parameters = date_bounds(start_date, today)
+        latest = None
+        await asyncio.to_thread(self.store.begin_refresh, source)
+        async for page in self.client.stream_query(source.query, parameters, self.page_size):
+            await asyncio.to_thread(self.store.stage_rows, source, page)
+            for row in page:
+                if row.get("last_event_at") is not None and (latest is None or row["last_event_at"] > latest):
+                    latest = row["last_event_at"]
+        await asyncio.to_thread(self.store.commit_refresh, source, start_date, today, latest)
+        self._looked_back[source.name] = today
+        return start_date, today
+
+    async def run(self, interval: float = 3600.0):
+        """Refresh every source now and then every ``interval`` seconds until cancelled."""
+        while True:
+            for source in ROLLUP_SOURCES.values():
+                try:
+                    await self.refresh(source)
+                except Exception as e:
+                    print(f"Failed to refresh {source.name} rollup: {e}")
+            await asyncio.sleep(interval)
@@ -0,0 +1,32 @@
+"""
+Prepare sincera_data.db for the API: switch it to WAL, so the API's read-only
+connections never block on a refresh writing to the file, add the
+(domain, created_at) lookup index unless an equivalent one exists, and add
+the ranking index of each sort field.
+
+Run it once after creating or replacing the file, from whatever writes it;
+the API only opens the database read-only.
+
+Usage: python -m src.sincera_migrate [--db PATH]
+"""
+
+import argparse
+from typing import List, Optional
+
+from .sincera_store import prepare_database
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default="sincera_data.db", help="database to prepare")
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args()
+    prepare_database(args.db)
+    print(f"Prepared {args.db}")
+
+
+if __name__ == "__main__":
+    main()
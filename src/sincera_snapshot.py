@@ -0,0 +1,104 @@
+import asyncio
+import os
+import sqlite3
+from typing import Dict, List, Optional, Tuple
+
+from .models import DomainSiteInfoRecord
+from .sincera_store import PUBLISHER_COLUMNS, parse_categories
+
+
+LATEST_PUBLISHERS_QUERY = f"""
+    SELECT {", ".join(PUBLISHER_COLUMNS)}
+    FROM (
+        SELECT *, ROW_NUMBER() OVER (PARTITION BY domain ORDER BY created_at DESC) AS row_number
+        FROM publisher_data
+    )
+    WHERE row_number = 1
+    """
+
+
+class PublisherEntry:
+    """Compact record for the latest publisher_data row of a domain, with categories already parsed."""
+
+    __slots__ = PUBLISHER_COLUMNS
+
+    def __init__(self, row: Tuple):
+        for column, value in zip(PUBLISHER_COLUMNS, row):
+            setattr(self, column, value)
+        self.categories = parse_categories(self.categories)
+
+    def to_record(self) -> DomainSiteInfoRecord:
+        return DomainSiteInfoRecord.model_construct(
+            **{column: getattr(self, column) for column in PUBLISHER_COLUMNS}
+        )
+
+
+class SinceraSnapshot:
+    """In-memory index of the latest publisher_data row per domain.
+
+    The whole index is rebuilt and swapped in a single assignment whenever the
+    database file (or its WAL) changes, so readers always see either the old or
+    the new snapshot, never a mix of both.
+    """
+
+    def __init__(self, db_path: str = "sincera_data.db", check_interval: float = 30.0):
+        self.db_path = db_path
+        self.check_interval = check_interval
+        self._entries: Dict[str, PublisherEntry] = {}
+        self._version: Optional[Tuple[float, float]] = None
+
+    def _file_version(self) -> Tuple[float, float]:
+        wal_path = f"{self.db_path}-wal"
+        wal_mtime = os.path.getmtime(wal_path) if os.path.exists(wal_path) else 0.0
+        return os.path.getmtime(self.db_path), wal_mtime
+
+    def load(self):
+        """Read the latest row per domain and atomically replace the current index."""
+        version = self._file_version()
+        conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True)
+        try:
+            rows = conn.execute(LATEST_PUBLISHERS_QUERY).fetchall()
+        finally:
+            conn.close()
+        entries = {}
+        for row in rows:
+            entry = PublisherEntry(row)
+            entries[entry.domain] = entry
+        self._entries = entries
+        self._version = version
+
+    def reload_if_changed(self) -> bool:
+        """Reload the index if the database file changed since the last load."""
+        if self._file_version() == self._version:
+            return False
+        self.load()
+        return True
+
+    async def watch(self):
+        """Poll the database file for changes and reload in the background until cancelled."""
+        while True:
+            await asyncio.sleep(self.check_interval)
+            try:
+                await asyncio.to_thread(self.reload_if_changed)
+            except Exception as e:
+                print(f"Failed to reload Sincera snapshot: {e}")
+
+    @property
+    def loaded(self) -> bool:
+        return self._version is not None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_latest(self, domain: str) -> Optional[DomainSiteInfoRecord]:
+        """Return the latest publisher_data row for a domain, or None if it is unknown."""
+        entry = self._entries.get(domain)
+        return entry.to_record() if entry else None
+
+    def get_many(self, domains: List[str]) -> Dict[str, Optional[DomainSiteInfoRecord]]:
+        """Return the latest publisher_data row for each of the given domains."""
+        entries = self._entries
+        return {
+            domain: entries[domain].to_record() if domain in entries else None
+            for domain in domains
+        }
@@ -0,0 +1,300 @@
+import base64
+import json
+import queue
+import sqlite3
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .models import DomainSiteInfoRecord, RankedPublisherRecord
+
+
+PUBLISHER_COLUMNS = (
+    "domain", "publisher_id", "name", "status", "primary_supply_type", "pub_description",
+    "categories", "slug", "avg_ads_to_content_ratio", "avg_ads_in_view",
+    "avg_ad_refresh", "total_unique_gpids", "id_absorption_rate", "avg_page_weight",
+    "avg_cpu", "total_supply_paths", "reseller_count", "owner_domain",
+    "created_at", "updated_at",
+)
+
+LATEST_PUBLISHER_QUERY = f"""
+    SELECT {", ".join(PUBLISHER_COLUMNS)}
+    FROM publisher_data
+    WHERE domain = ?
+    ORDER BY created_at DESC
+    LIMIT 1
+    """
+
+LATEST_PUBLISHERS_FOR_DOMAINS_QUERY = f"""
+    SELECT {", ".join(PUBLISHER_COLUMNS)}
+    FROM (
+        SELECT *, ROW_NUMBER() OVER (PARTITION BY domain ORDER BY created_at DESC) AS row_number
+        FROM publisher_data
+        WHERE domain IN (SELECT value FROM json_each(?))
+    )
+    WHERE row_number = 1
+    """
+
+# Walks the sort index in order from the cursor and keeps each domain's latest row, so a page
+# reads about as many rows as it returns instead of ranking the whole table
+RANKED_PUBLISHERS_QUERY = """
+    SELECT {columns}, id, {sort_expression} AS sort_value
+    FROM publisher_data AS latest
+    WHERE {sort_expression} IS NOT NULL{filters}
+        AND NOT EXISTS (
+            SELECT 1 FROM publisher_data AS newer
+            WHERE newer.domain = latest.domain AND newer.created_at > latest.created_at
+        )
+    ORDER BY {sort_expression} {direction}, id {direction}
+    LIMIT ?
+    """
+
+SORT_EXPRESSIONS = {
+    "id_absorption_rate": "id_absorption_rate",
+    "avg_ads_to_content_ratio": "avg_ads_to_content_ratio",
+    "avg_ads_in_view": "avg_ads_in_view",
+    "avg_ad_refresh": "avg_ad_refresh",
+    "avg_cpu": "avg_cpu",
+    "avg_page_weight": "avg_page_weight",
+    "cpu_per_mb": "CASE WHEN avg_cpu > 0 AND avg_page_weight > 0 THEN avg_cpu / avg_page_weight END",
+    "total_unique_gpids": "total_unique_gpids",
+    "total_supply_paths": "total_supply_paths",
+    "reseller_count": "reseller_count",
+}
+
+SORT_INDEXES = {
+    sort_by: f"CREATE INDEX IF NOT EXISTS idx_publisher_data_sort_{sort_by} ON publisher_data ({expression})"
+    for sort_by, expression in SORT_EXPRESSIONS.items()
+}
+
+RECENT_DOMAINS_QUERY = """
+    SELECT domain
+    FROM publisher_data
+    GROUP BY domain
+    ORDER BY max(created_at) DESC
+    LIMIT ?
+    """
+
+FILTER_COLUMNS = ("status", "primary_supply_type", "owner_domain")
+
+DOMAIN_CREATED_AT_INDEX = """
+    CREATE INDEX IF NOT EXISTS idx_publisher_data_domain_created_at
+    ON publisher_data (domain, created_at DESC)
+    """
+
+
+def has_domain_created_at_index(conn: sqlite3.Connection) -> bool:
+    """Whether publisher_data has an index leading with (domain, created_at), such as its UNIQUE constraint's."""
+    for index in conn.execute("PRAGMA index_list(publisher_data)").fetchall():
+        columns = [info[2] for info in conn.execute(f"PRAGMA index_info('{index[1]}')").fetchall()]
+        if columns[:2] == ["domain", "created_at"]:
+            return True
+    return False
+
+
+def missing_sort_indexes(conn: sqlite3.Connection) -> List[str]:
+    """The sort fields whose ranking index publisher_data lacks."""
+    names = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    return [sort_by for sort_by in SORT_INDEXES if f"idx_publisher_data_sort_{sort_by}" not in names]
+
+
+def prepare_database(db_path: str):
+    """Switch sincera_data.db to WAL and add the lookup and ranking indexes it lacks.
+
+    The (domain, created_at) index is only added unless an equivalent one exists.
+
+    This is a one-off migration run by whoever writes the file (see
+    ``python -m src.sincera_migrate``); the API itself only ever opens the
+    database read-only.
+    """
+    conn = sqlite3.connect(f"file:{db_path}?mode=rw", uri=True)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        if not has_domain_created_at_index(conn):
+            conn.execute(DOMAIN_CREATED_AT_INDEX)
+        for sort_by in missing_sort_indexes(conn):
+            conn.execute(SORT_INDEXES[sort_by])
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def parse_categories(value: Optional[str]) -> Optional[list]:
+    """Parse the categories JSON column, falling back to a single item list."""
+    if not value:
+        return None
+    try:
+        return json.loads(value)
+    except json.JSONDecodeError:
+        return [value]
+
+
+def publisher_record(row: Tuple) -> DomainSiteInfoRecord:
+    """Build a DomainSiteInfoRecord from a row selected in PUBLISHER_COLUMNS order."""
+    record = dict(zip(PUBLISHER_COLUMNS, row))
+    record["categories"] = parse_categories(record["categories"])
+    return DomainSiteInfoRecord(**record)
+
+
+def encode_cursor(sort_value: Any, row_id: int) -> str:
+    """Encode the last row of a page as an opaque keyset pagination cursor."""
+    return base64.urlsafe_b64encode(json.dumps([sort_value, row_id]).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, int]:
+    """Decode a cursor produced by encode_cursor, raising ValueError if it is malformed."""
+    try:
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    return sort_value, int(row_id)
+
+
+class SinceraStore:
+    """Pool of read-only connections to sincera_data.db.
+
+    ``open`` opens ``pool_size`` read-only, memory-mapped connections that are
+    reused for every lookup. It never writes to the file: a database that is
+    missing or unreadable is reported and leaves the store unavailable, so
+    lookups raise sqlite3.OperationalError while the rest of the API keeps
+    serving, and a database without the lookup or ranking indexes only gets a
+    warning. Lookup SQL is constant text, so each connection's statement
+    cache keeps it prepared after the first call. Methods are blocking and are
+    meant to be run on a worker thread.
+    """
+
+    def __init__(self, db_path: str = "sincera_data.db", pool_size: int = 4, mmap_size: int = 256 * 1024 * 1024):
+        self.db_path = db_path
+        self.pool_size = pool_size
+        self.mmap_size = mmap_size
+        self._pool: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        self.available = False
+
+    def open(self):
+        try:
+            for _ in range(self.pool_size):
+                self._pool.put(self._connect())
+            self.available = True
+            with self.connection() as conn:
+                if not has_domain_created_at_index(conn):
+                    print(
+                        f"{self.db_path} has no (domain, created_at) index, so lookups scan publisher_data; "
+                        f"run python -m src.sincera_migrate to add it"
+                    )
+                missing = missing_sort_indexes(conn)
+                if missing:
+                    print(
+                        f"{self.db_path} has no ranking index for {', '.join(missing)}, so those rankings sort "
+                        f"publisher_data on every page; run python -m src.sincera_migrate to add them"
+                    )
+        except sqlite3.Error as e:
+            self.close()
+            print(f"Sincera database {self.db_path} is unavailable: {e}")
+
+    def close(self):
+        self.available = False
+        while not self._pool.empty():
+            self._pool.get_nowait().close()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False, cached_statements=64
+        )
+        conn.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+        conn.execute("PRAGMA query_only=ON")
+        return conn
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a pooled connection for the duration of the block."""
+        if not self.available:
+            raise sqlite3.OperationalError(f"Sincera database {self.db_path} is not available")
+        conn = self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    def get_latest(self, domain: str) -> Optional[DomainSiteInfoRecord]:
+        """Return the latest publisher_data row for a domain, or None if it is unknown."""
+        with self.connection() as conn:
+            row = conn.execute(LATEST_PUBLISHER_QUERY, (domain,)).fetchone()
+        return publisher_record(row) if row else None
+
+    def get_many(self, domains: List[str]) -> Dict[str, Optional[DomainSiteInfoRecord]]:
+        """Return the latest publisher_data row for each of the given domains with a single statement."""
+        with self.connection() as conn:
+            rows = conn.execute(LATEST_PUBLISHERS_FOR_DOMAINS_QUERY, (json.dumps(domains),)).fetchall()
+        records = {domain: None for domain in domains}
+        for row in rows:
+            record = publisher_record(row)
+            records[record.domain] = record
+        return records
+
+    def recent_domains(self, limit: int) -> List[str]:
+        """Return up to ``limit`` domains, most recently pulled from Sincera first."""
+        with self.connection() as conn:
+            return [row[0] for row in conn.execute(RECENT_DOMAINS_QUERY, (limit,)).fetchall()]
+
+    def rank_publishers(
+        self,
+        sort_by: str,
+        descending: bool = True,
+        filters: Optional[Dict[str, str]] = None,
+        min_value: Optional[float] = None,
+        max_value: Optional[float] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[RankedPublisherRecord], Optional[str]]:
+        """Return one page of the latest publisher rows ordered by a metric, plus the cursor for the next page.
+
+        Pages are keyset paginated on (sort value, id) instead of OFFSET, so deep
+        pages do not re-read and discard the rows before them and stay stable
+        while the ranking is walked. The cursor is applied while walking the
+        field's ranking index, before the latest row per domain is picked, so
+        every page costs about the same.
+        """
+        if sort_by not in SORT_EXPRESSIONS:
+            raise ValueError(f"Unsupported sort field: {sort_by}")
+        sort_expression = SORT_EXPRESSIONS[sort_by]
+
+        conditions = []
+        parameters: List[Any] = []
+        for column, value in (filters or {}).items():
+            if column not in FILTER_COLUMNS:
+                raise ValueError(f"Unsupported filter field: {column}")
+            conditions.append(f"{column} = ?")
+            parameters.append(value)
+        if min_value is not None:
+            conditions.append(f"{sort_expression} >= ?")
+            parameters.append(min_value)
+        if max_value is not None:
+            conditions.append(f"{sort_expression} <= ?")
+            parameters.append(max_value)
+        if cursor:
+            last_value, last_id = decode_cursor(cursor)
+            # The plain bound lets SQLite seek the expression indexes, which it cannot do from the row value
+            conditions.append(f"{sort_expression} {'<=' if descending else '>='} ?")
+            conditions.append(f"({sort_expression}, id) {'<' if descending else '>'} (?, ?)")
+            parameters.extend([last_value, last_value, last_id])
+        parameters.append(limit + 1)
+
+        query = RANKED_PUBLISHERS_QUERY.format(
+            columns=", ".join(PUBLISHER_COLUMNS),
+            sort_expression=sort_expression,
+            filters="".join(f" AND {condition}" for condition in conditions),
+            direction="DESC" if descending else "ASC"
+        )
+        with self.connection() as conn:
+            rows = conn.execute(query, parameters).fetchall()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1][-1], rows[-1][-2])
+
+        records = []
+        for row in rows:
+            record = dict(zip(PUBLISHER_COLUMNS, row))
+            record["categories"] = parse_categories(record["categories"])
+            records.append(RankedPublisherRecord(**record, sort_value=row[-1]))
+        return records, next_cursor
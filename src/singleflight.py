@@ -0,0 +1,35 @@
+import asyncio
+from typing import Dict, Any, Callable, Awaitable
+
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key into a single in-flight call.
+
+    The first caller for a key starts the work; callers arriving while it is
+    still running wait on the same task and receive its result or exception.
+    The shared task is shielded, so one caller being cancelled does not cancel
+    the work for the others.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[str, asyncio.Task] = {}
+
+    async def do(self, key: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        """Run ``func`` for ``key`` unless an identical call is already running, then await its result."""
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: asyncio.Task):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        # Mark the exception as retrieved in case every waiter was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    def running(self, key: str) -> bool:
+        """Whether a call for ``key`` is in flight."""
+        return key in self._in_flight
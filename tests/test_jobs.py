@@ -0,0 +1,127 @@
+import asyncio
+
+import pytest
+
+from src.jobs import JobManager, JobNotFoundError, JobNotReadyError, JobStore
+
+
+class StubJobClient:
+    """Stands in for AsyncBigQueryClient: each job reports the states in ``states`` in turn, then stays in the last."""
+
+    def __init__(self, states=("RUNNING", "DONE"), error=None, pages=None):
+        self.states = list(states)
+        self.error = error
+        self.pages = pages if pages is not None else [[{"n": 1}, {"n": 2}], [{"n": 3}]]
+        self.submitted = []
+        self.status_calls = 0
+        self.polls = {}
+
+    async def submit_query(self, query, parameters=None, maximum_bytes_billed=None):
+        job_id = f"job_{len(self.submitted)}"
+        self.submitted.append((query, parameters, maximum_bytes_billed))
+        self.polls[job_id] = 0
+        return {"job_id": job_id, "location": "US", "state": "PENDING"}
+
+    async def get_job_status(self, job_id, location=None):
+        self.status_calls += 1
+        state = self.states[min(self.polls[job_id], len(self.states) - 1)]
+        self.polls[job_id] += 1
+        done = state == "DONE"
+        return {
+            "state": state,
+            "error": self.error if done else None,
+            "total_bytes_processed": 1024 if done else None,
+            "total_bytes_billed": 10485760 if done else None,
+        }
+
+    async def _stream(self, items):
+        for item in items:
+            yield item
+
+    def stream_job_pages(self, job_id, location=None, page_size=None):
+        return self._stream(self.pages)
+
+    def stream_job_record_batches(self, job_id, location=None):
+        return self._stream(["batch"])
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    store.open()
+    yield store
+    store.close()
+
+
+async def collect(chunks):
+    return [chunk async for chunk in chunks]
+
+
+def test_submit_records_the_job(store):
+    client = StubJobClient()
+    manager = JobManager(client, store)
+
+    job = asyncio.run(manager.submit("SELECT 1", {"x": 1}, 1000))
+
+    assert client.submitted == [("SELECT 1", {"x": 1}, 1000)]
+    assert job["job_id"] == "job_0"
+    assert job["state"] == "PENDING"
+    assert store.get("job_0")["query"] == "SELECT 1"
+    assert [listed["job_id"] for listed in asyncio.run(manager.list())] == ["job_0"]
+
+
+def test_get_polls_until_done_then_serves_the_stored_state(store):
+    client = StubJobClient(states=("RUNNING", "DONE"))
+    manager = JobManager(client, store)
+    job_id = asyncio.run(manager.submit("SELECT 1"))["job_id"]
+
+    assert asyncio.run(manager.get(job_id))["state"] == "RUNNING"
+    done = asyncio.run(manager.get(job_id))
+    assert done["state"] == "DONE"
+    assert done["total_bytes_processed"] == 1024
+    assert done["total_bytes_billed"] == 10485760
+
+    asyncio.run(manager.get(job_id))
+    assert client.status_calls == 2
+
+
+def test_results_pages_through_a_finished_job(store):
+    client = StubJobClient(states=("DONE",))
+    manager = JobManager(client, store)
+    job_id = asyncio.run(manager.submit("SELECT n"))["job_id"]
+
+    pages = asyncio.run(collect(asyncio.run(manager.results(job_id))))
+    batches = asyncio.run(collect(asyncio.run(manager.results(job_id, columnar=True))))
+
+    assert pages == [[{"n": 1}, {"n": 2}], [{"n": 3}]]
+    assert batches == ["batch"]
+
+
+def test_results_of_an_unfinished_job_are_not_ready(store):
+    manager = JobManager(StubJobClient(states=("RUNNING",)), store)
+    job_id = asyncio.run(manager.submit("SELECT 1"))["job_id"]
+
+    with pytest.raises(JobNotReadyError, match="RUNNING"):
+        asyncio.run(manager.results(job_id))
+
+
+def test_unknown_job(store):
+    client = StubJobClient()
+    manager = JobManager(client, store)
+
+    with pytest.raises(JobNotFoundError, match="missing"):
+        asyncio.run(manager.get("missing"))
+    with pytest.raises(JobNotFoundError):
+        asyncio.run(manager.results("missing"))
+    assert client.status_calls == 0
+
+
+def test_failed_job_reports_its_error(store):
+    manager = JobManager(StubJobClient(states=("DONE",), error="Syntax error: Unexpected end of script"), store)
+    job_id = asyncio.run(manager.submit("SELECT"))["job_id"]
+
+    job = asyncio.run(manager.get(job_id))
+    assert job["state"] == "DONE"
+    assert job["error"] == "Syntax error: Unexpected end of script"
+    with pytest.raises(Exception, match="failed: Syntax error"):
+        asyncio.run(manager.results(job_id))
@@ -0,0 +1,54 @@
+import asyncio
+import types
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from src import cache as cache_module
+from src.async_bigquery_client import AsyncBigQueryClient
+from src.cache import QueryResultCache
+from src.fake_bigquery import FakeBigQueryClient, synthetic_domain
+from src.prewarm import PREWARM_METRICS, CachePrewarmer, DomainTraffic
+from src.queries import date_range
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controls the time the result cache sees."""
+    now = types.SimpleNamespace(value=0.0)
+    monkeypatch.setattr(cache_module, "time", types.SimpleNamespace(time=lambda: now.value))
+    return now
+
+
+def test_windows_warmed_before_midnight_stay_fresh_after_it(clock):
+    client = AsyncBigQueryClient(
+        FakeBigQueryClient(latency=0, domains=5, query_rows=100),
+        cache=QueryResultCache(ttl_seconds=3600, stale_seconds=3600)
+    )
+    traffic = DomainTraffic()
+    domains = [synthetic_domain(i) for i in range(3)]
+    traffic.record(domains)
+    prewarmer = CachePrewarmer(client, traffic, lead_seconds=900)
+    tomorrow = datetime(2024, 3, 2, tzinfo=timezone.utc)
+
+    async def warm_then_read():
+        before_midnight = tomorrow - timedelta(minutes=10)
+        clock.value = before_midnight.timestamp()
+        await prewarmer.refresh(now=before_midnight)
+
+        clock.value = (tomorrow + timedelta(minutes=5)).timestamp()
+        for metric in PREWARM_METRICS:
+            start_date, end_date = date_range(None, None, metric.default_window, today=tomorrow.date())
+            for domain in domains:
+                query, parameters = metric.build_query(domain, start_date, end_date)
+                assert client.is_cached(query, parameters), (metric.name, domain)
+                result = await client.run_query(query, parameters, use_cache=True)
+                assert result.cache_hit
+
+    try:
+        asyncio.run(warm_then_read())
+        # Fresh hits never start a refresh job of their own
+        assert not client._revalidations
+        assert client.cache.stale_hits == 0
+    finally:
+        client.shutdown()
@@ -0,0 +1,40 @@
+from datetime import date
+
+import pytest
+
+from src.queries import (
+    ATTENTION_DEFAULT_WINDOW, FILL_RATE_DEFAULT_WINDOW, bounds_dates, date_bounds, date_range, fill_rate_query
+)
+
+TODAY = date(2024, 3, 10)
+
+
+@pytest.mark.parametrize("start_date, end_date, window, expected", [
+    (None, None, FILL_RATE_DEFAULT_WINDOW, (date(2024, 2, 9), date(2024, 2, 9))),
+    (None, None, ATTENTION_DEFAULT_WINDOW, (date(2024, 3, 3), date(2024, 3, 10))),
+    # Only a start date: the end follows from it rather than from today
+    (date(2024, 3, 5), None, FILL_RATE_DEFAULT_WINDOW, (date(2024, 3, 5), date(2024, 3, 5))),
+    (date(2024, 2, 1), None, ATTENTION_DEFAULT_WINDOW, (date(2024, 2, 1), date(2024, 2, 8))),
+    (date(2024, 3, 8), None, ATTENTION_DEFAULT_WINDOW, (date(2024, 3, 8), TODAY)),
+    # Only an end date: the start is the window's length before it
+    (None, date(2024, 1, 10), ATTENTION_DEFAULT_WINDOW, (date(2024, 1, 3), date(2024, 1, 10))),
+    (date(2024, 1, 1), date(2024, 1, 31), FILL_RATE_DEFAULT_WINDOW, (date(2024, 1, 1), date(2024, 1, 31))),
+])
+def test_date_range_defaults(start_date, end_date, window, expected):
+    assert date_range(start_date, end_date, window, today=TODAY) == expected
+
+
+def test_date_range_rejects_reversed_and_future_ranges():
+    with pytest.raises(ValueError):
+        date_range(date(2024, 3, 5), date(2024, 3, 1), FILL_RATE_DEFAULT_WINDOW, today=TODAY)
+    with pytest.raises(ValueError):
+        date_range(date(2024, 3, 20), None, ATTENTION_DEFAULT_WINDOW, today=TODAY)
+
+
+def test_metric_queries_bind_half_open_string_bounds():
+    query, parameters = fill_rate_query("a.example", date(2024, 3, 1), date(2024, 3, 7))
+
+    assert "date_hour >= @start_date" in query and "date_hour < @end_before" in query
+    assert (parameters["start_date"].type, parameters["start_date"].value) == ("STRING", "2024-03-01")
+    assert (parameters["end_before"].type, parameters["end_before"].value) == ("STRING", "2024-03-08")
+    assert bounds_dates(date_bounds(date(2024, 3, 1), date(2024, 3, 7))) == (date(2024, 3, 1), date(2024, 3, 7))
@@ -0,0 +1,178 @@
+import asyncio
+import threading
+import time
+
+import pyarrow
+import pytest
+
+from src.async_bigquery_client import AsyncBigQueryClient
+from src.read_streams import FakeStreamProvider, iter_parallel_batches
+
+
+def numbers(rows: int) -> pyarrow.Table:
+    return pyarrow.table({"n": list(range(rows))})
+
+
+def values(batches) -> list:
+    return [value for batch in batches for value in batch.column("n").to_pylist()]
+
+
+def read_stream_threads() -> list:
+    return [thread for thread in threading.enumerate() if thread.name.startswith("read-stream")]
+
+
+def wait_for_workers_to_exit(timeout: float = 2.0) -> list:
+    deadline = time.monotonic() + timeout
+    while read_stream_threads() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return read_stream_threads()
+
+
+class SlowStreamProvider(FakeStreamProvider):
+    """Sleeps before each batch, longer for the streams listed in ``slow_streams``."""
+
+    def __init__(self, table, batch_size=10, delay=0.01, slow_streams=(), slow_delay=0.2):
+        super().__init__(table, batch_size)
+        self.delay = delay
+        self.slow_streams = slow_streams
+        self.slow_delay = slow_delay
+
+    def read_stream(self, session, stream):
+        index = session.streams.index(stream)
+        for batch in super().read_stream(session, stream):
+            time.sleep(self.slow_delay if index in self.slow_streams else self.delay)
+            yield batch
+
+
+class FailingStreamProvider(FakeStreamProvider):
+    """Fails the stream at ``failing_stream`` after its first batch."""
+
+    def __init__(self, table, batch_size=10, failing_stream=1):
+        super().__init__(table, batch_size)
+        self.failing_stream = failing_stream
+
+    def read_stream(self, session, stream):
+        for count, batch in enumerate(super().read_stream(session, stream)):
+            if count == 1 and session.streams.index(stream) == self.failing_stream:
+                raise RuntimeError("stream broke")
+            yield batch
+
+
+def test_ordered_merge_matches_a_single_reader():
+    provider = SlowStreamProvider(numbers(1000), slow_streams=(0,), slow_delay=0.02, delay=0)
+    session = provider.open_session("SELECT n", max_streams=4)
+
+    assert len(session.streams) == 4
+    assert values(iter_parallel_batches(provider, session, ordered=True)) == list(range(1000))
+
+
+def test_unordered_merge_yields_batches_as_they_arrive():
+    provider = SlowStreamProvider(numbers(400), slow_streams=(0,), slow_delay=0.1, delay=0)
+    session = provider.open_session("SELECT n", max_streams=4)
+
+    merged = values(iter_parallel_batches(provider, session, ordered=False))
+
+    assert sorted(merged) == list(range(400))
+    # The slow first stream does not hold back the others
+    assert merged[0] >= 100
+
+
+def test_empty_session_yields_nothing():
+    provider = FakeStreamProvider(numbers(0))
+    session = provider.open_session("SELECT n")
+
+    assert list(iter_parallel_batches(provider, session)) == []
+
+
+@pytest.mark.parametrize("ordered", [True, False])
+def test_closing_the_iterator_early_stops_the_workers(ordered):
+    provider = SlowStreamProvider(numbers(10000), batch_size=10)
+    session = provider.open_session("SELECT n", max_streams=4)
+    batches = iter_parallel_batches(provider, session, ordered=ordered, buffer_size=2)
+
+    next(batches)
+    assert read_stream_threads()
+    batches.close()
+
+    assert wait_for_workers_to_exit() == []
+
+
+@pytest.mark.parametrize("ordered", [True, False])
+def test_worker_error_reaches_the_consumer(ordered):
+    provider = FailingStreamProvider(numbers(400), failing_stream=1)
+    session = provider.open_session("SELECT n", max_streams=4)
+
+    with pytest.raises(RuntimeError, match="stream broke"):
+        list(iter_parallel_batches(provider, session, ordered=ordered))
+    assert wait_for_workers_to_exit() == []
+
+
+def test_cancelling_a_parallel_read_stops_the_workers():
+    client = AsyncBigQueryClient(None, stream_provider=SlowStreamProvider(numbers(100000), batch_size=10))
+
+    async def consume():
+        # Consuming faster than the workers produce keeps a fetch in flight when the task is cancelled
+        async for _ in client.stream_parallel_record_batches("SELECT n", max_streams=4):
+            pass
+
+    async def cancel_mid_read():
+        task = asyncio.create_task(consume())
+        await asyncio.sleep(0.2)
+        assert read_stream_threads()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    try:
+        asyncio.run(cancel_mid_read())
+        assert wait_for_workers_to_exit() == []
+    finally:
+        client.shutdown()
+
+
+def test_parallel_read_through_the_async_client_keeps_stream_order():
+    client = AsyncBigQueryClient(None, stream_provider=FakeStreamProvider(numbers(5000), batch_size=100))
+
+    async def read():
+        return [batch async for batch in client.stream_parallel_record_batches("SELECT n", max_streams=8)]
+
+    try:
+        assert values(asyncio.run(read())) == list(range(5000))
+    finally:
+        client.shutdown()
+
+
+class RecordingStreamProvider(FakeStreamProvider):
+    """Records the stream count each session was opened with."""
+
+    def __init__(self, table, batch_size=100):
+        super().__init__(table, batch_size)
+        self.max_streams = []
+
+    def open_session(self, query, parameters=None, maximum_bytes_billed=None, max_streams=8):
+        self.max_streams.append(max_streams)
+        return super().open_session(query, parameters, maximum_bytes_billed, max_streams)
+
+
+@pytest.mark.parametrize("query, ordered, streams", [
+    ("SELECT n FROM t ORDER BY n", False, 1),
+    ("select n from t order\n  by n desc", False, 1),
+    ("SELECT n FROM t", True, 1),
+    ("SELECT n FROM t", False, 8),
+])
+def test_parallel_read_uses_one_stream_when_order_matters(query, ordered, streams):
+    provider = RecordingStreamProvider(numbers(5000))
+    client = AsyncBigQueryClient(None, stream_provider=provider)
+
+    async def read():
+        return [batch async for batch in client.stream_parallel_record_batches(query, max_streams=8, ordered=ordered)]
+
+    try:
+        merged = values(asyncio.run(read()))
+    finally:
+        client.shutdown()
+    assert provider.max_streams == [streams]
+    if streams == 1:
+        assert merged == list(range(5000))
+    else:
+        assert sorted(merged) == list(range(5000))
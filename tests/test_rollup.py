@@ -0,0 +1,57 @@
+import asyncio
+from datetime import date, datetime, time, timezone
+
+import pytest
+
+from src.queries import bounds_dates
+from src.rollup import BIDSTREAM, RollupManager, RollupStore
+
+
+class StubRollupClient:
+    """Returns one bidstream row for the last day of each requested window, and records the windows."""
+
+    def __init__(self):
+        self.windows = []
+
+    async def stream_query(self, query, parameters=None, page_size=None, maximum_bytes_billed=None):
+        start_date, day = bounds_dates(parameters)
+        self.windows.append((start_date, day))
+        yield [{
+            "day": day,
+            "publisher_id": "1",
+            "domain": "a.example",
+            "ad_unit_id": "unit-0",
+            "ad_requests_est": 100.0,
+            "impressions_est": 10.0,
+            "ad_bids": 50.0,
+            "ad_rev_bid_net_usd": 1.0,
+            "ad_rev_oz_net_usd_est": 0.5,
+            "last_event_at": datetime.combine(day, time(12), tzinfo=timezone.utc),
+        }]
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = RollupStore(str(tmp_path / "rollup.db"))
+    store.open()
+    yield store
+    store.close()
+
+
+def test_refresh_fetches_from_the_watermark_and_looks_back_once_a_day(store):
+    client = StubRollupClient()
+    manager = RollupManager(client, store, backfill_days=31, lookback_days=2)
+
+    async def refresh(today):
+        return await manager.refresh(BIDSTREAM, today=today)
+
+    assert asyncio.run(refresh(date(2024, 3, 10))) == (date(2024, 2, 9), date(2024, 3, 10))
+    # Later runs the same day only re-read the watermark's day
+    assert asyncio.run(refresh(date(2024, 3, 10))) == (date(2024, 3, 10), date(2024, 3, 10))
+    assert asyncio.run(refresh(date(2024, 3, 10))) == (date(2024, 3, 10), date(2024, 3, 10))
+    # The first run of a new day rescans the look-back, the next ones do not
+    assert asyncio.run(refresh(date(2024, 3, 11))) == (date(2024, 3, 8), date(2024, 3, 11))
+    assert asyncio.run(refresh(date(2024, 3, 11))) == (date(2024, 3, 11), date(2024, 3, 11))
+
+    assert client.windows[-1] == (date(2024, 3, 11), date(2024, 3, 11))
+    assert store.covers(BIDSTREAM, date(2024, 2, 9), date(2024, 3, 11))